@@ -2,27 +2,63 @@
 
 from __future__ import annotations
 
+import asyncio
+import datetime
+import io
 import json
 import logging
-from typing import TYPE_CHECKING, Self
+import math
+import sys
+import time
+from queue import Full
+from typing import TYPE_CHECKING, Any, Self
 
 import cherrypy  # type: ignore[import-untyped]
 import cridlib
+import isodate  # type: ignore[import-untyped]
+import uvicorn
 from cloudevents.exceptions import GenericException as CloudEventException
-from cloudevents.http import from_http
-from werkzeug.exceptions import BadRequest, HTTPException, UnsupportedMediaType
+from cloudevents.http import from_dict, from_http
+from opentelemetry import metrics, trace
+from werkzeug.exceptions import (
+    BadRequest,
+    HTTPException,
+    NotAcceptable,
+    NotFound,
+    RequestEntityTooLarge,
+    ServiceUnavailable,
+    TooManyRequests,
+    UnsupportedMediaType,
+)
+from werkzeug.exceptions import NotImplemented as HTTPNotImplemented
 from werkzeug.routing import Map, Rule
 from werkzeug.wrappers import Request, Response
 
+from .broadcast import Broadcaster
+from .dedup import DedupCache
+from .health import Health
+from .metrics import REGISTRY
+from .otel import extract_context, inject_context
+from .ratelimit import RateLimiter
+from .track.latency import LatencyTracker
+from .track.observers.history import HistoryTrackObserver
+from .track.observers.snapshot import Snapshot
+
 if TYPE_CHECKING:  # pragma: no cover
-    from collections.abc import Iterable
+    from collections.abc import Awaitable, Callable, Iterable, MutableMapping
     from queue import Queue
     from wsgiref.types import StartResponse, WSGIEnvironment
 
+    from cloudevents.http.event import CloudEvent
+
+    from nowplaying.broadcast import Subscription
     from nowplaying.options import Options
+    from nowplaying.track.observers.snapshot import SnapshotTrackObserver
 
 
 logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+meter = metrics.get_meter(__name__)
 
 _RABE_CLOUD_EVENTS_SUBS = (
     "ch.rabe.api.events.track.v1.trackStarted",
@@ -32,24 +68,118 @@ _RABE_CLOUD_EVENTS_SUPPORTED_MEDIA_TYPES = (
     "application/cloudevents+json",
     "application/json",
 )
+_RABE_CLOUD_EVENTS_BATCH_MEDIA_TYPE = "application/cloudevents-batch+json"
+_EXCEPTION_QUEUE_FULL = "Event queue is full, retry later"
+_EXCEPTION_RATE_LIMITED = "Too many requests, retry later"
+_EXCEPTION_BATCH_INVALID = "Batch must be a JSON array of CloudEvents"
+_EXCEPTION_BATCH_ENTRY_INVALID = "Batch entry must be a JSON object"
+_EXCEPTION_NOTHING_PLAYING = "No track has been played yet"
+_EXCEPTION_UNKNOWN_FORMAT = "Format must be one of json, xml or txt"
+_EXCEPTION_STREAMING_UNSUPPORTED = "Streaming needs the uvicorn API server"
+_EXCEPTION_HISTORY_INVALID = (
+    "limit and before must be positive integers, since and until ISO 8601 times"
+)
+
+"""Number of tracks on a /history page by default and at most."""
+_HISTORY_LIMIT = 20
+_HISTORY_MAX_LIMIT = 100
+
+"""Formats that may be requested from /nowplaying instead of using Accept."""
+_NOWPLAYING_FORMATS = {
+    "json": "application/json",
+    "xml": "application/xml",
+    "txt": "text/plain",
+}
+
+_REQUEST_DURATION = REGISTRY.histogram(
+    "nowplaying_api_request_duration_seconds",
+    "Time spent handling API requests, streams are not included.",
+    ("endpoint",),
+)
+_OTEL_REQUEST_DURATION = meter.create_histogram(
+    "nowplaying.api.request.duration",
+    unit="s",
+    description="Time spent handling API requests, streams are not included.",
+)
+_REQUESTS = REGISTRY.counter(
+    "nowplaying_api_requests_total",
+    "Handled API requests by response status code.",
+    ("endpoint", "code"),
+)
+_RATE_LIMITED = REGISTRY.counter(
+    "nowplaying_api_rate_limited_total",
+    "Requests rejected because the client exceeded its rate limit.",
+)
+_WEBHOOK_DUPLICATES = REGISTRY.counter(
+    "nowplaying_webhook_duplicates_total",
+    "Webhook events acknowledged without work because they were seen before.",
+)
+
+"""Seconds uvicorn waits for open connections when shutting down."""
+_GRACEFUL_SHUTDOWN_SECONDS = 5
+
+"""Largest message in bytes accepted from WebSocket clients."""
+_WEBSOCKET_MAX_SIZE = 4096
+
+"""WebSocket close codes."""
+_WEBSOCKET_POLICY_VIOLATION = 1008
+_WEBSOCKET_TRY_AGAIN_LATER = 1013
+
+"""Endpoints that may be called without authentication."""
+_PUBLIC_ENDPOINTS = (
+    "metrics",
+    "healthz",
+    "readyz",
+    "nowplaying",
+    "history",
+    "latency",
+    "events",
+    "ws",
+)
 
 
 class ApiServer:
     """The API server."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self: Self,
         options: Options,
         event_queue: Queue,
         realm: str = "nowplaying",
+        dedup: DedupCache | None = None,
+        snapshot: SnapshotTrackObserver | None = None,
+        broadcaster: Broadcaster | None = None,
+        history: HistoryTrackObserver | None = None,
+        latency: LatencyTracker | None = None,
+        health: Health | None = None,
     ) -> None:
         """Create ApiServer."""
         self.options = options
         self.event_queue = event_queue
         self.realm = realm
+        self.dedup = dedup if dedup is not None else DedupCache()
+        self.snapshot = snapshot
+        self.broadcaster = broadcaster if broadcaster is not None else Broadcaster()
+        self.history = history if history is not None else HistoryTrackObserver()
+        self.latency = latency if latency is not None else LatencyTracker()
+        self.health = health if health is not None else Health(event_queue)
+        self.limiter = RateLimiter(options.api_rate_limit, options.api_rate_burst)
 
-        self.url_map = Map([Rule("/webhook", endpoint="webhook")])
+        self.url_map = Map(
+            [
+                Rule("/webhook", endpoint="webhook"),
+                Rule("/metrics", endpoint="metrics"),
+                Rule("/nowplaying", endpoint="nowplaying", methods=["GET", "HEAD"]),
+                Rule("/history", endpoint="history", methods=["GET", "HEAD"]),
+                Rule("/latency", endpoint="latency", methods=["GET", "HEAD"]),
+                Rule("/healthz", endpoint="healthz", methods=["GET", "HEAD"]),
+                Rule("/readyz", endpoint="readyz", methods=["GET", "HEAD"]),
+                Rule("/events", endpoint="events", methods=["GET"]),
+                Rule("/ws", endpoint="ws", websocket=True),
+            ],
+        )
         self._server = None
+        self._uvicorn: uvicorn.Server | None = None
 
     def run_server(self: Self) -> None:
         """Run the API server."""
@@ -63,6 +193,9 @@ class ApiServer:
                 use_debugger=True,
                 use_reloader=True,
             )
+        elif self.options.api_server == "uvicorn":
+            self._uvicorn = uvicorn.Server(self.get_uvicorn_config())
+            self._uvicorn.run()
         else:  # pragma: no cover
             cherrypy.tree.graft(self, "/")
             cherrypy.server.unsubscribe()
@@ -71,14 +204,39 @@ class ApiServer:
 
             self._server.socket_host = self.options.api_bind_address
             self._server.socket_port = self.options.api_port
+            self._server.thread_pool = self.options.api_workers
+            self._server.socket_timeout = self.options.api_keep_alive
 
             self._server.subscribe()
 
             cherrypy.engine.start()
             cherrypy.engine.block()
 
+    def get_uvicorn_config(self: Self) -> uvicorn.Config:
+        """Return the config for serving the ASGI app with uvicorn.
+
+        Uvicorn runs in the daemon's process since the event queue is shared
+        with the main loop, all connections get served from its event loop.
+        """
+        return uvicorn.Config(
+            self.asgi_app,
+            host=self.options.api_bind_address,
+            port=self.options.api_port,
+            interface="asgi3",
+            lifespan="off",
+            timeout_keep_alive=self.options.api_keep_alive,
+            limit_concurrency=self.options.api_max_connections or None,
+            # streams never end by themselves, don't wait for them on shutdown
+            timeout_graceful_shutdown=_GRACEFUL_SHUTDOWN_SECONDS,
+            ws_max_size=_WEBSOCKET_MAX_SIZE,
+            log_config=None,
+        )
+
     def stop_server(self: Self) -> None:
         """Stop the server."""
+        if self._uvicorn is not None:
+            self._uvicorn.should_exit = True
+            return
         if self._server is not None:
             self._server.stop()
         cherrypy.engine.exit()
@@ -97,13 +255,137 @@ class ApiServer:
         start_response: StartResponse,
     ) -> Iterable[bytes]:
         """Return a wsgi app."""
+        response = self.handle_request(Request(environ))
+        return response(environ, start_response)
+
+    async def asgi_app(
+        self: Self,
+        scope: MutableMapping[str, Any],
+        receive: Callable[[], Awaitable[MutableMapping[str, Any]]],
+        send: Callable[[MutableMapping[str, Any]], Awaitable[None]],
+    ) -> None:
+        """Serve the same endpoints as the wsgi app from an event loop.
+
+        Handlers never block for long, so they run directly on the loop.
+        Public endpoints with a ``stream_`` handler keep the connection open
+        and stream to the client, WebSocket connections are handed to the
+        public endpoint's ``connect_`` handler.
+
+        Auth, rate limits and the Content-Length get checked before the body
+        is read so rejected clients can't make us buffer it.
+        """
+        if scope["type"] == "websocket":
+            await self.handle_websocket(scope, receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        started = time.perf_counter()
+        head = Request(_asgi_environ(scope, None))
+        rejected = self.admit_request(head)
+        if rejected is not None:
+            self.record_request(head, rejected, started)
+            await _send_response(rejected, head.environ, send)
+            return
+        body = bytearray()
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if len(body) > self.options.api_max_body_size:
+                # stop reading, the client gets the error right away
+                await _send_response(
+                    _error_response(RequestEntityTooLarge()),
+                    _asgi_environ(scope, b""),
+                    send,
+                )
+                return
+            if not message.get("more_body", False):
+                break
+        environ = _asgi_environ(scope, bytes(body))
         request = Request(environ)
+        stream = getattr(self, f"stream_{self.match_endpoint(request)}", None)
+        if stream is not None and self.is_public(request):
+            await stream(request, receive, send)
+            return
+        await _send_response(
+            self.handle_request(request, admitted=True),
+            environ,
+            send,
+        )
+
+    async def handle_websocket(
+        self: Self,
+        scope: MutableMapping[str, Any],
+        receive: Callable[[], Awaitable[MutableMapping[str, Any]]],
+        send: Callable[[MutableMapping[str, Any]], Awaitable[None]],
+    ) -> None:
+        """Hand a WebSocket connection to its handler or refuse it."""
+        request = Request(_asgi_environ(scope, b""))
+        connect = getattr(self, f"connect_{self.match_endpoint(request)}", None)
+        if connect is None or not self.is_public(request):
+            # closing before accepting makes the server answer with a 403
+            await send({"type": "websocket.close", "code": _WEBSOCKET_POLICY_VIOLATION})
+            return
+        await connect(request, receive, send)
+
+    def handle_request(
+        self: Self,
+        request: Request,
+        *,
+        admitted: bool = False,
+    ) -> Response:
+        """Check auth and limits, dispatch the request and record how long it took.
+
+        Requests that were already checked by :meth:`admit_request` are
+        dispatched right away.
+        """
+        started = time.perf_counter()
+        response = None if admitted else self.admit_request(request)
+        if response is None:
+            response = self.dispatch_request(request)
+        self.record_request(request, response, started)
+        return response
+
+    def admit_request(self: Self, request: Request) -> Response | None:
+        """Return an error response if a request may not be dispatched, else None.
+
+        Authenticated requests are limited before their body is parsed, so a
+        flood of requests gets rejected without doing any work.
+        """
+        if self.is_public(request):
+            return None
         auth = request.authorization
         if auth and self.check_auth(auth.username, auth.password):
-            response = self.dispatch_request(request)
-        else:
-            response = self.auth_required(request)
-        return response(environ, start_response)
+            return self.limit_request(
+                request,
+                auth.username,  # type: ignore[arg-type]
+            )
+        return self.auth_required(request)
+
+    def record_request(
+        self: Self,
+        request: Request,
+        response: Response,
+        started: float,
+    ) -> None:
+        """Record how long a request took and how it was answered."""
+        endpoint = self.match_endpoint(request) or "unknown"
+        duration = time.perf_counter() - started
+        _REQUEST_DURATION.observe(duration, endpoint=endpoint)
+        _OTEL_REQUEST_DURATION.record(duration, {"endpoint": endpoint})
+        _REQUESTS.inc(endpoint=endpoint, code=str(response.status_code))
+
+    def is_public(self: Self, request: Request) -> bool:
+        """Check if the request is for an endpoint without authentication."""
+        return self.match_endpoint(request) in _PUBLIC_ENDPOINTS
+
+    def match_endpoint(self: Self, request: Request) -> str | None:
+        """Return the endpoint of a request or None if nothing matches."""
+        adapter = self.url_map.bind_to_environ(request.environ)
+        try:
+            endpoint, _ = adapter.match()
+        except HTTPException:
+            return None
+        return endpoint
 
     def check_auth(self: Self, username: str | None, password: str | None) -> bool:
         """Check if auth is valid."""
@@ -124,32 +406,100 @@ class ApiServer:
             {"WWW-Authenticate": f'Basic realm="{self.realm}"'},
         )
 
-    def dispatch_request(self: Self, request: Request) -> Response | HTTPException:
+    def limit_request(self: Self, request: Request, username: str) -> Response | None:
+        """Return an error response if a client sends too much, else None.
+
+        Clients are told when to retry once their rate limit is exceeded.
+        Bodies larger than the limit are refused by their Content-Length and
+        reading bodies sent without one stops at the limit.
+        """
+        retry_after = self.limiter.acquire((username, request.remote_addr))
+        if retry_after:
+            _RATE_LIMITED.inc()
+            return _error_response(
+                TooManyRequests(
+                    description=_EXCEPTION_RATE_LIMITED,
+                    retry_after=math.ceil(retry_after),
+                ),
+            )
+        max_body_size = self.options.api_max_body_size
+        if (request.content_length or 0) > max_body_size:
+            return _error_response(RequestEntityTooLarge())
+        request.max_content_length = max_body_size
+        return None
+
+    def dispatch_request(self: Self, request: Request) -> Response:
         """Dispatch requests to handlers."""
         adapter = self.url_map.bind_to_environ(request.environ)
         try:
             endpoint, values = adapter.match()
             return getattr(self, f"on_{endpoint}")(request, **values)
         except HTTPException as e:
-            return Response(
-                json.dumps(e.description),
-                e.code,
-                {"Content-Type": "application/json"},
-            )
+            return _error_response(e)
 
     def on_webhook(self: Self, request: Request) -> Response:
         """Receive a CloudEvent and put it into the event queue."""
         logger.warning("Received a webhook")
-        if (
-            request.headers.get("Content-Type")
-            not in _RABE_CLOUD_EVENTS_SUPPORTED_MEDIA_TYPES
+        with tracer.start_as_current_span(
+            "ApiServer.on_webhook",
+            context=extract_context(request.headers),
+            kind=trace.SpanKind.SERVER,
         ):
-            raise UnsupportedMediaType
+            content_type = request.headers.get("Content-Type")
+            if content_type == _RABE_CLOUD_EVENTS_BATCH_MEDIA_TYPE:
+                return self.on_webhook_batch(request)
+            if content_type not in _RABE_CLOUD_EVENTS_SUPPORTED_MEDIA_TYPES:
+                raise UnsupportedMediaType
+            try:
+                event = from_http(request.headers, request.data)  # type: ignore[arg-type]
+            except CloudEventException as error:
+                raise BadRequest(description=str(error)) from error
+
+            self.validate_event(event)
+            return Response(status=f"200 {self.enqueue_event(event)}")
+
+    def on_webhook_batch(self: Self, request: Request) -> Response:
+        """Receive a batch of CloudEvents and put them into the event queue.
+
+        Every event gets validated and queued on its own, the response lists
+        a status for each event in the order they were sent.
+        """
+        try:
+            batch = json.loads(request.data)
+        except ValueError as error:
+            raise BadRequest(description=_EXCEPTION_BATCH_INVALID) from error
+        if not isinstance(batch, list):
+            raise BadRequest(description=_EXCEPTION_BATCH_INVALID)
+        logger.info("Received batch of %i events", len(batch))
+
+        statuses = [self._handle_batch_entry(entry) for entry in batch]
+
+        response = Response(
+            json.dumps(statuses),
+            200 if all(s["status"] == 200 for s in statuses) else 207,  # noqa: PLR2004
+            {"Content-Type": "application/json"},
+        )
+        if any(s["status"] == ServiceUnavailable.code for s in statuses):
+            response.retry_after = self.options.api_retry_after
+        return response
+
+    def _handle_batch_entry(self: Self, entry: object) -> dict[str, object]:
+        event_id = entry.get("id") if isinstance(entry, dict) else None
         try:
-            event = from_http(request.headers, request.data)  # type: ignore[arg-type]
-        except CloudEventException as error:
-            raise BadRequest(description=str(error)) from error
+            if not isinstance(entry, dict):
+                raise BadRequest(description=_EXCEPTION_BATCH_ENTRY_INVALID)
+            try:
+                event = from_dict(entry)
+            except CloudEventException as error:
+                raise BadRequest(description=str(error)) from error
+            self.validate_event(event)
+            detail = self.enqueue_event(event)
+        except HTTPException as error:
+            return {"id": event_id, "status": error.code, "detail": error.description}
+        return {"id": event_id, "status": 200, "detail": detail}
 
+    def validate_event(self: Self, event: CloudEvent) -> None:
+        """Check that the event id is a RaBe CRID."""
         try:
             crid = cridlib.parse(event["id"])
             logger.debug("Detected CRID: %s", crid)
@@ -158,9 +508,331 @@ class ApiServer:
                 description=f"CRID '{event['id']}' is not a RaBe CRID",
             ) from error
 
+    def enqueue_event(self: Self, event: CloudEvent) -> str:
+        """Queue an event for the main loop unless it was seen before.
+
+        The event continues the trace it carries or the webhook's trace, the
+        main loop picks it up from the event.
+        """
         logger.info("Received event: %s", event)
 
+        with tracer.start_as_current_span(
+            "ApiServer.enqueue_event",
+            context=extract_context(event),
+            attributes={"cloudevents.event_id": event["id"]},
+        ):
+            inject_context(event)
+            return self._enqueue_event(event)
+
+    def _enqueue_event(self: Self, event: CloudEvent) -> str:
         if event["type"] in _RABE_CLOUD_EVENTS_SUBS:
-            self.event_queue.put(event)
+            key = (event["id"], event["source"])
+            if not self.dedup.add(key):
+                _WEBHOOK_DUPLICATES.inc()
+                logger.info("Ignoring duplicate event: %s", event)
+                return "Event Already Received"
+            try:
+                self.event_queue.put_nowait(event)
+            except Full as error:
+                # let the producer retry the rejected event later
+                self.dedup.discard(key)
+                raise ServiceUnavailable(
+                    description=_EXCEPTION_QUEUE_FULL,
+                    retry_after=self.options.api_retry_after,
+                ) from error
+
+        return "Event Received"
+
+    def on_nowplaying(self: Self, request: Request) -> Response:
+        """Serve the current track as JSON, XML or plain text.
+
+        The representation is picked with the format query parameter or the
+        Accept header. Responses carry a strong ETag so clients polling with
+        If-None-Match get a 304 until the track changes.
+        """
+        snapshot = self.snapshot.snapshot if self.snapshot is not None else None
+        if snapshot is None:
+            raise NotFound(description=_EXCEPTION_NOTHING_PLAYING)
+        if "format" in request.args:
+            try:
+                mimetype = _NOWPLAYING_FORMATS[request.args["format"]]
+            except KeyError as error:
+                raise NotAcceptable(description=_EXCEPTION_UNKNOWN_FORMAT) from error
+        else:
+            mimetype = request.accept_mimetypes.best_match(
+                Snapshot.MIMETYPES,
+                default=Snapshot.MIMETYPES[0],
+            )
+        body, etag = snapshot.representations[mimetype]
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.last_modified = snapshot.last_modified
+        response.cache_control.no_cache = True
+        response.vary.add("Accept")
+        return response.make_conditional(request)
+
+    def on_history(self: Self, request: Request) -> Response:
+        """Serve a page of recently played tracks, newest first.
+
+        Pages hold up to limit tracks that started at or after since and
+        before until, the next page is requested by passing the returned
+        next cursor as before.
+        """
+        try:
+            limit = int(request.args.get("limit", _HISTORY_LIMIT))
+            before = int(request.args["before"]) if "before" in request.args else None
+            since = _parse_time(request.args.get("since"))
+            until = _parse_time(request.args.get("until"))
+        except (ValueError, isodate.ISO8601Error) as error:
+            raise BadRequest(description=_EXCEPTION_HISTORY_INVALID) from error
+        if limit < 1 or (before is not None and before < 0):
+            raise BadRequest(description=_EXCEPTION_HISTORY_INVALID)
+        records, cursor = self.history.page(
+            min(limit, _HISTORY_MAX_LIMIT),
+            before,
+            since,
+            until,
+        )
+        # records are serialized already, only the envelope gets rendered
+        body = f'{{"tracks": [{", ".join(records)}], "next": {json.dumps(cursor)}}}'
+        response = Response(body, mimetype="application/json")
+        response.cache_control.no_cache = True
+        return response
+
+    def on_latency(self: Self, _: Request) -> Response:
+        """Serve latency percentiles per observer and the objective they are held to."""
+        latency = self.latency
+        response = Response(
+            json.dumps(
+                {
+                    "objective": {
+                        "seconds": latency.objective,
+                        "percentile": latency.percentile,
+                        "window": latency.window,
+                    },
+                    "observers": latency.summary(),
+                },
+            ),
+            mimetype="application/json",
+        )
+        response.cache_control.no_cache = True
+        return response
+
+    def on_healthz(self: Self, _: Request) -> Response:
+        """Report if the main loop is alive, 503 if it is stuck."""
+        return _health_response(*self.health.liveness())
+
+    def on_readyz(self: Self, _: Request) -> Response:
+        """Report if events are accepted and the state of observers and shows."""
+        return _health_response(*self.health.readiness())
+
+    def on_events(self: Self, _: Request) -> Response:
+        """Refuse to stream from a WSGI server."""
+        raise HTTPNotImplemented(description=_EXCEPTION_STREAMING_UNSUPPORTED)
+
+    async def stream_events(
+        self: Self,
+        request: Request,
+        receive: Callable[[], Awaitable[MutableMapping[str, Any]]],
+        send: Callable[[MutableMapping[str, Any]], Awaitable[None]],
+    ) -> None:
+        """Stream track and show changes as Server-Sent Events.
+
+        Clients resume with Last-Event-ID from the broadcaster's history and
+        may pick the events they want with a comma separated events query
+        parameter. Idle connections get a comment as heartbeat.
+        """
+        subscription = self.broadcaster.subscribe(
+            _parse_last_event_id(request.headers.get("Last-Event-ID")),
+            _parse_events(request.args.get("events")),
+        )
+        watcher = asyncio.ensure_future(_close_on_disconnect(receive, subscription))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            },
+        )
+        try:
+            while not subscription.closed:
+                message = await subscription.get(self.options.api_sse_heartbeat)
+                if subscription.closed:
+                    break
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": message.sse if message else b": heartbeat\n\n",
+                        "more_body": True,
+                    },
+                )
+        finally:
+            watcher.cancel()
+            self.broadcaster.unsubscribe(subscription)
+        await send({"type": "http.response.body", "body": b""})
+
+    async def connect_ws(
+        self: Self,
+        request: Request,
+        receive: Callable[[], Awaitable[MutableMapping[str, Any]]],
+        send: Callable[[MutableMapping[str, Any]], Awaitable[None]],
+    ) -> None:
+        """Send track and show changes to a WebSocket subscriber.
+
+        Every message is sent as a JSON text frame with its id, event and data.
+        Subscribers pick their events with the same query parameters as the
+        Server-Sent Events stream and may change them at any time by sending
+        ``{"events": [...]}``, or ``{"events": null}`` for all events.
+        Subscribers that fall behind get closed with 1013 (Try Again Later).
+        """
+        if (await receive())["type"] != "websocket.connect":
+            return
+        subscription = self.broadcaster.subscribe(
+            _parse_last_event_id(request.args.get("last_event_id")),
+            _parse_events(request.args.get("events")),
+        )
+        await send({"type": "websocket.accept"})
+        reader = asyncio.ensure_future(_read_websocket(receive, subscription))
+        try:
+            while (message := await subscription.get()) is not None:
+                await send({"type": "websocket.send", "text": message.json})
+        finally:
+            reader.cancel()
+            self.broadcaster.unsubscribe(subscription)
+        if subscription.evicted:
+            await send({"type": "websocket.close", "code": _WEBSOCKET_TRY_AGAIN_LATER})
+
+    def on_metrics(self: Self, _: Request) -> Response:
+        """Export metrics in the Prometheus text format."""
+        return Response(
+            REGISTRY.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
+def _error_response(error: HTTPException) -> Response:
+    response = Response(
+        json.dumps(error.description),
+        error.code,
+        {"Content-Type": "application/json"},
+    )
+    response.retry_after = getattr(error, "retry_after", None)
+    return response
+
+
+async def _send_response(
+    response: Response,
+    environ: WSGIEnvironment,
+    send: Callable[[MutableMapping[str, Any]], Awaitable[None]],
+) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [
+                (key.lower().encode("latin-1"), value.encode("latin-1"))
+                for key, value in response.get_wsgi_headers(environ).items()
+            ],
+        },
+    )
+    await send({"type": "http.response.body", "body": response.get_data()})
+
+
+def _health_response(ok: bool, report: dict[str, Any]) -> Response:  # noqa: FBT001
+    response = Response(
+        json.dumps({"status": "ok" if ok else "fail", **report}),
+        200 if ok else 503,
+        mimetype="application/json",
+    )
+    response.cache_control.no_cache = True
+    return response
+
+
+def _parse_time(value: str | None) -> datetime.datetime | None:
+    if not value:
+        return None
+    time = isodate.parse_datetime(value)
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=datetime.UTC)
+    return time
+
+
+def _parse_last_event_id(value: str | None) -> int | None:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def _parse_events(value: str | None) -> list[str] | None:
+    return value.split(",") if value else None
+
+
+async def _close_on_disconnect(
+    receive: Callable[[], Awaitable[MutableMapping[str, Any]]],
+    subscription: Subscription,
+) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+    subscription.close()
+
+
+async def _read_websocket(
+    receive: Callable[[], Awaitable[MutableMapping[str, Any]]],
+    subscription: Subscription,
+) -> None:
+    while (message := await receive())["type"] != "websocket.disconnect":
+        try:
+            events = json.loads(message.get("text") or "")["events"]
+        except (ValueError, TypeError, KeyError):
+            logger.debug("Ignoring invalid WebSocket message: %s", message)
+            continue
+        if events is None or isinstance(events, list):
+            subscription.select(events)
+    subscription.close()
+
+
+def _asgi_environ(
+    scope: MutableMapping[str, Any],
+    body: bytes | None,
+) -> WSGIEnvironment:
+    """Build a WSGI environ from an ASGI scope so werkzeug can parse it.
 
-        return Response(status="200 Event Received")
+    Without a body the environ keeps the Content-Length the client sent so
+    requests can be checked before their body is read.
+    """
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ: WSGIEnvironment = {
+        "REQUEST_METHOD": scope.get("method", "GET"),
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body or b""),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope["headers"]:
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        if name in environ:
+            value = f"{environ[name]},{value}"
+        environ[name] = value
+    if body is not None:
+        # the body was read completely, chunked requests have no content length
+        environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
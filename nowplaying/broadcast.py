@@ -0,0 +1,185 @@
+"""Broadcast track changes to subscribers of the streaming API endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import logging
+from collections import deque
+from threading import Lock
+from typing import TYPE_CHECKING, Self
+
+from .metrics import REGISTRY
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+"""Default number of messages kept for subscribers resuming a stream."""
+DEFAULT_HISTORY = 100
+
+"""Default number of messages waiting for a subscriber before it gets evicted."""
+DEFAULT_QUEUE_SIZE = 64
+
+_SUBSCRIBERS = REGISTRY.gauge(
+    "nowplaying_broadcast_subscribers",
+    "Number of connected stream subscribers.",
+)
+_EVICTIONS = REGISTRY.counter(
+    "nowplaying_broadcast_evictions_total",
+    "Subscribers disconnected because they did not keep up.",
+)
+
+
+class Message:
+    """A broadcast message serialized once for all subscribers."""
+
+    def __init__(self: Self, message_id: int, event: str, data: str) -> None:
+        """Create Message and pre-render its Server-Sent Events and WebSocket frames.
+
+        The data must already be serialized as JSON.
+        """
+        self.id = message_id
+        self.event = event
+        self.data = data
+        self.sse = f"id: {message_id}\nevent: {event}\ndata: {data}\n\n".encode()
+        self.json = f'{{"id": {message_id}, "event": "{event}", "data": {data}}}'
+
+
+class Subscription:
+    """Bounded queue of messages for one subscriber on an event loop.
+
+    Subscribers that fall behind by more than ``queue_size`` messages get
+    evicted so a stalled client can't hold memory or delay the others.
+    """
+
+    def __init__(
+        self: Self,
+        loop: asyncio.AbstractEventLoop,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        events: Iterable[str] | None = None,
+    ) -> None:
+        """Create Subscription."""
+        self.loop = loop
+        self.select(events)
+        self.closed = False
+        self.evicted = False
+        self._queue: asyncio.Queue[Message | None] = asyncio.Queue(queue_size)
+
+    def select(self: Self, events: Iterable[str] | None) -> None:
+        """Change the events the subscriber is interested in."""
+        self.events = set(events) if events is not None else None
+
+    def wants(self: Self, message: Message) -> bool:
+        """Check if the subscriber is interested in a message."""
+        return self.events is None or message.event in self.events
+
+    def put(self: Self, message: Message) -> None:
+        """Queue a message, must be called on the subscriber's loop."""
+        if self.closed or not self.wants(message):
+            return
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            _EVICTIONS.inc()
+            logger.warning("Evicting subscriber that fell behind")
+            self.evicted = True
+            self.close()
+
+    def close(self: Self) -> None:
+        """Close the subscription and wake up a pending :meth:`get`."""
+        self.closed = True
+        with contextlib.suppress(asyncio.QueueFull):
+            self._queue.put_nowait(None)
+
+    async def get(self: Self, timeout: float | None = None) -> Message | None:
+        """Return the next message or None on timeout or once closed."""
+        if self.closed:
+            return None
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+
+class Broadcaster:
+    """Fan out messages to subscriptions on any number of event loops.
+
+    Messages can be published from any thread. They are serialized once and
+    handed to each loop with a single callback. The last ``history`` messages
+    are kept in a ring buffer so reconnecting subscribers can resume where
+    they left off.
+    """
+
+    def __init__(
+        self: Self,
+        history: int = DEFAULT_HISTORY,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ) -> None:
+        """Create Broadcaster."""
+        self.queue_size = queue_size
+        self._lock = Lock()
+        self._ids = itertools.count(1)
+        self._history: deque[Message] = deque(maxlen=history)
+        self._subscriptions: set[Subscription] = set()
+
+    def publish(self: Self, event: str, data: str) -> Message:
+        """Publish a message to all subscribers."""
+        with self._lock:
+            message = Message(next(self._ids), event, data)
+            self._history.append(message)
+            loops: dict[asyncio.AbstractEventLoop, list[Subscription]] = {}
+            for subscription in self._subscriptions:
+                loops.setdefault(subscription.loop, []).append(subscription)
+        for loop, subscriptions in loops.items():
+            with contextlib.suppress(RuntimeError):  # loop already closed
+                loop.call_soon_threadsafe(_fan_out, message, subscriptions)
+        return message
+
+    def subscribe(
+        self: Self,
+        last_id: int | None = None,
+        events: Iterable[str] | None = None,
+    ) -> Subscription:
+        """Subscribe from the running loop, replaying messages after ``last_id``.
+
+        At most ``queue_size`` messages get replayed, older ones are skipped so
+        resuming subscribers don't get evicted before they read anything.
+        """
+        subscription = Subscription(
+            asyncio.get_running_loop(),
+            self.queue_size,
+            events,
+        )
+        with self._lock:
+            if last_id is not None:
+                backlog = [
+                    message
+                    for message in self._history
+                    if message.id > last_id and subscription.wants(message)
+                ]
+                if self.queue_size and len(backlog) > self.queue_size:
+                    logger.info(
+                        "Skipping %i messages a resuming subscriber missed",
+                        len(backlog) - self.queue_size,
+                    )
+                    backlog = backlog[-self.queue_size :]
+                for message in backlog:
+                    subscription.put(message)
+            self._subscriptions.add(subscription)
+            _SUBSCRIBERS.set(len(self._subscriptions))
+        return subscription
+
+    def unsubscribe(self: Self, subscription: Subscription) -> None:
+        """Remove a subscription."""
+        subscription.close()
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            _SUBSCRIBERS.set(len(self._subscriptions))
+
+
+def _fan_out(message: Message, subscriptions: list[Subscription]) -> None:
+    for subscription in subscriptions:
+        subscription.put(message)
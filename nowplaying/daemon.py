@@ -1,31 +1,71 @@
 """Nowplaying Daemon."""
 
+import contextlib
+import datetime
 import logging
 import os
 import signal
 import sys
 import time
-from queue import Queue
+from collections import deque
+from pathlib import Path
+from queue import Empty, Full
 from threading import Thread
 from typing import TYPE_CHECKING, Any, Self
 
+import pytz
+from opentelemetry import trace
+
+from . import health
 from .api import ApiServer
+from .broadcast import Broadcaster
+from .dedup import DedupCache
+from .event_queue import EventQueue
 from .input import observer as input_observers
 from .input.handler import InputHandler
-from .misc.saemubox import SaemuBox
+from .metrics import REGISTRY
+from .misc.saemubox import SaemuBox, SaemuBoxError
 from .options import Options
+from .otel import extract_context
+from .reorder import ReorderBuffer
+from .runtime import AsyncRuntime
+from .show.cache import ShowCache
 from .track.handler import TrackEventHandler
+from .track.latency import LatencyTracker
+from .track.observers.broadcast import BroadcastTrackObserver
 from .track.observers.dab_audio_companion import DabAudioCompanionTrackObserver
+from .track.observers.history import HistoryTrackObserver
 from .track.observers.icecast import IcecastTrackObserver
 from .track.observers.smc_ftp import SmcFtpTrackObserver
+from .track.observers.snapshot import SnapshotTrackObserver
 from .track.observers.ticker import TickerTrackObserver
+from .track.outbox import Outbox
+from .track.retry import RetryPolicy
 
 if TYPE_CHECKING:  # pragma: no cover
     from cloudevents.http.event import CloudEvent
 
 _EXCEPTION_NOWPLAYING_MAIN = "Error in main"
+_EXCEPTION_NOWPLAYING_SAEMUBOX = "Error reading from Sämubox"
+_EXCEPTION_NOWPLAYING_EVENT = "Error handling event, dropping it"
+
+"""Marker put on the event queue to wake up the main loop without an event."""
+WAKEUP = object()
+
+"""Seconds to wait before waking up again for a deadline that passed already."""
+OVERDUE_RETRY_SECONDS = 1.0
 
 logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+_MAIN_LOOP_LAG = REGISTRY.gauge(
+    "nowplaying_main_loop_lag_seconds",
+    "How late the main loop woke up for its last deadline.",
+)
+_PENDING_DROPPED = REGISTRY.counter(
+    "nowplaying_main_loop_dropped_total",
+    "Events dropped because too many were waiting to be handled.",
+)
 
 
 class NowPlayingDaemon:
@@ -38,7 +78,25 @@ class NowPlayingDaemon:
         """Create NowPlayingDaemon."""
         self.options = options
 
-        self.event_queue: Queue = Queue()
+        self.runtime: AsyncRuntime | None = None
+        self.event_queue = EventQueue(
+            maxsize=options.api_queue_size,
+            policy=options.api_queue_policy,
+        )
+        self.reorder_buffer = ReorderBuffer(window=options.reorder_window)
+        self.snapshot = SnapshotTrackObserver()
+        self.history = HistoryTrackObserver(size=options.api_history_size)
+        self.latency = LatencyTracker(
+            objective=options.latency_objective,
+            percentile=options.latency_percentile,
+            window=options.latency_window,
+        )
+        self.broadcaster = Broadcaster(
+            history=options.api_stream_history,
+            queue_size=options.api_stream_queue_size,
+        )
+        self._pending_events: deque[CloudEvent] = deque()
+        self._overdue = False
         self.saemubox = SaemuBox(
             self.options.saemubox_ip,
             self.options.check_saemubox_sender,
@@ -54,11 +112,19 @@ class NowPlayingDaemon:
         try:
             self.register_signal_handlers()
 
+            self.runtime = self.get_runtime()
+            if self.runtime is not None:
+                self.runtime.start()
+
             input_handler = self.get_input_handler()
         except Exception:
             logger.exception(_EXCEPTION_NOWPLAYING_MAIN)
             sys.exit(-1)
 
+        Thread(target=self._watch_saemubox, daemon=True).start()
+        if self.options.input_file:
+            Thread(target=self._watch_input_file, daemon=True).start()
+
         _thread = Thread(target=self._main_loop, args=(input_handler,))
         _thread.daemon = True
         _thread.start()
@@ -67,7 +133,22 @@ class NowPlayingDaemon:
 
     def _start_apiserver(self: Self) -> None:
         """Start the API server."""
-        self._api = ApiServer(self.options, self.event_queue)
+        self._api = ApiServer(
+            self.options,
+            self.event_queue,
+            dedup=DedupCache(
+                maxsize=self.options.api_dedup_size,
+                ttl=self.options.api_dedup_ttl,
+            ),
+            snapshot=self.snapshot,
+            broadcaster=self.broadcaster,
+            history=self.history,
+            latency=self.latency,
+            health=health.Health(
+                self.event_queue,
+                max_busy=self.options.health_max_busy,
+            ),
+        )
         self._api.run_server()  # blocking
 
     def _stop_apiserver(self: Self) -> None:
@@ -82,24 +163,166 @@ class NowPlayingDaemon:
         """
         logger.info("Starting main loop")
         while True:
+            self.run_once(input_handler)
+
+    def run_once(self: Self, input_handler: InputHandler) -> None:
+        """Handle events once and back off if that fails.
+
+        Errors like a Sämubox that didn't send anything yet would otherwise
+        make the main loop spin as fast as it can.
+        """
+        try:
+            self.handle_events(input_handler)
+        except Exception:
+            logger.exception(_EXCEPTION_NOWPLAYING_MAIN)
+            time.sleep(self.options.saemubox_retry_seconds)
+
+    def handle_events(self: Self, input_handler: InputHandler) -> None:
+        """Wait for the next wakeup and pass everything that arrived on.
+
+        Blocks on the event queue until a webhook, a Sämubox change or an input
+        file change wakes us up or until the next deadline of an input observer
+        or the reorder buffer passes. A deadline that is still passed after the
+        last wakeup gets retried after :data:`OVERDUE_RETRY_SECONDS`.
+
+        Events are kept if the Sämubox can't be read and are retried on the
+        next wakeup, only the newest ``api_queue_size`` of them are kept. Events
+        that fail to be handled get dropped.
+        """
+        remaining = self.get_time_to_deadline(input_handler)
+        timeout = None if remaining is None else max(remaining, 0.0)
+        overdue = remaining is not None and remaining <= 0
+        if overdue and self._overdue:
+            # the last wakeup didn't move the deadline, don't spin on it
+            timeout = OVERDUE_RETRY_SECONDS
+        self._overdue = overdue
+        started = time.monotonic()
+        health.loop_waiting()
+        self.wait_for_events(timeout)
+        health.loop_busy()
+        if remaining is not None:
+            # deadlines passed while handling the last events count as lag too
+            _MAIN_LOOP_LAG.set(max(time.monotonic() - started - remaining, 0.0))
+        self._add_pending(self.reorder_buffer.pop_ready())
+
+        saemubox_id = self.poll_saemubox()
+
+        while self._pending_events:
+            logger.debug("Queue size: %i", len(self._pending_events))
+            event = self._pending_events.popleft()
+            self.handle_event(input_handler, saemubox_id, event)
+
+        input_handler.update(saemubox_id)
+
+    def handle_event(
+        self: Self,
+        input_handler: InputHandler,
+        saemubox_id: int,
+        event: "CloudEvent",
+    ) -> None:
+        """Pass an event on to the input observers, dropping it if that fails."""
+        logger.info(
+            "Handling update from event: %s, source: %s",
+            event["type"],
+            event["source"],
+        )
+        with tracer.start_as_current_span(
+            "NowPlayingDaemon.handle_event",
+            context=extract_context(event),
+            attributes={"cloudevents.event_type": event["type"]},
+        ):
             try:
-                saemubox_id = self.poll_saemubox()
-
-                while not self.event_queue.empty():
-                    logger.debug("Queue size: %i", self.event_queue.qsize())
-                    event: CloudEvent = self.event_queue.get()
-                    logger.info(
-                        "Handling update from event: %s, source: %s",
-                        event["type"],
-                        event["source"],
-                    )
-                    input_handler.update(saemubox_id, event)
-
-                input_handler.update(saemubox_id)
+                input_handler.update(saemubox_id, event)
             except Exception:
-                logger.exception(_EXCEPTION_NOWPLAYING_MAIN)
+                logger.exception(_EXCEPTION_NOWPLAYING_EVENT)
+
+    def _add_pending(self: Self, events: list["CloudEvent"]) -> None:
+        """Keep events for the main loop, dropping the oldest ones if too many."""
+        maxsize = self.options.api_queue_size
+        for event in events:
+            if 0 < maxsize <= len(self._pending_events):
+                _PENDING_DROPPED.inc()
+                logger.warning(
+                    "Too many events waiting, dropping %s",
+                    self._pending_events.popleft(),
+                )
+            self._pending_events.append(event)
+
+    def wait_for_events(self: Self, timeout: float | None) -> None:
+        """Block on the event queue and move everything on it to the reorder buffer.
+
+        Without a reorder window events are handled in the order they arrived.
+        """
+        try:
+            item = self.event_queue.get(timeout=timeout)
+            while True:
+                if item is not WAKEUP and self.reorder_buffer.window > 0:
+                    self.reorder_buffer.push(item)
+                elif item is not WAKEUP:
+                    self._add_pending([item])
+                item = self.event_queue.get_nowait()
+        except Empty:
+            pass
+
+    def get_time_to_deadline(self: Self, input_handler: InputHandler) -> float | None:
+        """Return seconds until the next deadline, negative once it passed.
+
+        Returns None if no deadline is set so we only wake up on events.
+        """
+        timeouts = []
+        deadline = input_handler.next_deadline()
+        if deadline is not None:
+            now = datetime.datetime.now(pytz.timezone("UTC"))
+            timeouts.append((deadline - now).total_seconds())
+        release = self.reorder_buffer.next_release()
+        if release is not None:
+            timeouts.append(release - time.monotonic())
+        return min(timeouts, default=None)
+
+    def wakeup(self: Self) -> None:
+        """Wake up the main loop without passing an event."""
+        # a full queue wakes up the main loop anyway
+        with contextlib.suppress(Full):
+            self.event_queue.put_nowait(WAKEUP)
+
+    def _watch_saemubox(self: Self) -> None:  # pragma: no cover
+        """Wake up the main loop whenever the Sämubox output changes.
+
+        Should be run in a thread.
+        """
+        # TODO(hairmare): v3 remove once replaced with pathfinder
+        # https://github.com/radiorabe/nowplaying/issues/179
+        last_id = None
+        while True:
+            try:
+                saemubox_id = self.saemubox.wait_for_output_id()
+            except SaemuBoxError:
+                logger.exception(_EXCEPTION_NOWPLAYING_SAEMUBOX)
+                time.sleep(self.options.saemubox_retry_seconds)
+                continue
+            if saemubox_id != last_id:
+                last_id = saemubox_id
+                self.wakeup()
+
+    def _watch_input_file(self: Self) -> None:  # pragma: no cover
+        """Wake up the main loop whenever the legacy input file changes.
 
-            time.sleep(self.options.sleep_seconds)
+        Should be run in a thread.
+        """
+        # TODO(hairmare): v3 remove once legacy xml is gone
+        # https://github.com/radiorabe/nowplaying/issues/179
+        path = Path(self.options.input_file)
+        last_mtime = path.stat().st_mtime
+        while True:
+            time.sleep(self.options.input_file_poll_seconds)
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                logger.exception("Error reading input file %s", path)
+                continue
+            if mtime != last_mtime:
+                last_mtime = mtime
+                self.wakeup()
 
     def register_signal_handlers(self: Self) -> None:
         """Register signal handler."""
@@ -113,13 +336,34 @@ class NowPlayingDaemon:
         if signum in [signal.SIGINT, signal.SIGKILL]:
             logger.info("Signal %i caught, terminating.", signum)
             self._stop_apiserver()
+            if self.runtime is not None:
+                self.runtime.stop()
             sys.exit(os.EX_OK)
 
+    def get_runtime(self: Self) -> AsyncRuntime | None:
+        """Get the AsyncRuntime if the asyncio runtime is enabled."""
+        if self.options.runtime != "asyncio":
+            return None
+        return AsyncRuntime(max_workers=self.options.runtime_workers)
+
     def get_track_handler(self: Self) -> TrackEventHandler:  # pragma: no cover
         """Get TrackEventHandler."""
         # TODO(hairmare): test once options have been refactored with v3
         # https://github.com/radiorabe/nowplaying/issues/179
-        handler = TrackEventHandler()
+        handler = TrackEventHandler(
+            runtime=self.runtime,
+            timeout=self.options.observer_timeout,
+            queue_size=self.options.observer_queue_size,
+            retry_policy=RetryPolicy(
+                attempts=self.options.observer_retry_attempts,
+                backoff=self.options.observer_retry_backoff,
+                budget=self.options.observer_retry_budget,
+            ),
+            outbox=Outbox(self.options.outbox_file)
+            if self.options.outbox_file
+            else None,
+            latency=self.latency,
+        )
         for url in self.options.icecast:
             handler.register_observer(
                 IcecastTrackObserver(
@@ -142,6 +386,9 @@ class NowPlayingDaemon:
                     ),
                 ),
             )
+        handler.register_observer(self.snapshot)
+        handler.register_observer(self.history)
+        handler.register_observer(BroadcastTrackObserver(self.broadcaster))
         handler.register_observer(
             TickerTrackObserver(
                 options=TickerTrackObserver.Options(
@@ -160,24 +407,34 @@ class NowPlayingDaemon:
                 ),
             )
 
+        handler.replay_outbox()
         return handler
 
     def get_input_handler(self: Self) -> InputHandler:  # pragma: no cover
         """Get InputHandler."""
         # TODO(hairmare): test once options have been refactored with v3
         # https://github.com/radiorabe/nowplaying/issues/179
-        handler = InputHandler()
+        handler = InputHandler(runtime=self.runtime)
         track_handler = self.get_track_handler()
+        show_cache = (
+            ShowCache(self.options.show_cache_file)
+            if self.options.show_cache_file
+            else None
+        )
 
         klangbecken = input_observers.KlangbeckenInputObserver(
             self.options.current_show_url,
             self.options.input_file,
+            show_cache,
+            self.wakeup,
         )
         klangbecken.add_track_handler(track_handler)
         handler.register_observer(klangbecken)
 
         nonklangbecken = input_observers.NonKlangbeckenInputObserver(
             self.options.current_show_url,
+            show_cache,
+            self.wakeup,
         )
         nonklangbecken.add_track_handler(track_handler)
         handler.register_observer(nonklangbecken)
@@ -185,14 +442,14 @@ class NowPlayingDaemon:
         return handler
 
     def poll_saemubox(self: Self) -> int:  # pragma: no cover
-        """Poll Saemubox for new data.
+        """Get the last output id the Sämubox watcher received.
 
         Should be run once per main loop.
 
         TODO(hairmare) v3 remove once replaced with pathfinder
         https://github.com/radiorabe/nowplaying/issues/179
         """
-        saemubox_id = self.saemubox.get_active_output_id()
+        saemubox_id = self.saemubox.get_last_output_id()
         logger.debug("Sämubox id: %i", saemubox_id)
 
         if self.last_input != saemubox_id:
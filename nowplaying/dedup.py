@@ -0,0 +1,77 @@
+"""Remember recently received events to drop duplicate deliveries."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Hashable
+
+"""Default number of remembered events."""
+DEFAULT_MAXSIZE = 1024
+
+"""Default seconds an event is remembered."""
+DEFAULT_TTL = 3600.0
+
+
+class DedupCache:
+    """Time bounded LRU set of keys.
+
+    Keys expire after ``ttl`` seconds and the least recently added keys get
+    evicted once more than ``maxsize`` keys are remembered.
+
+    >>> cache = DedupCache(maxsize=2)
+    >>> cache.add("a"), cache.add("a")
+    (True, False)
+    >>> cache.add("b"), cache.add("c"), "a" in cache
+    (True, True, False)
+    """
+
+    def __init__(
+        self: Self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        ttl: float = DEFAULT_TTL,
+    ) -> None:
+        """Create DedupCache."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = Lock()
+        self._keys: OrderedDict[Hashable, float] = OrderedDict()
+
+    def add(self: Self, key: Hashable) -> bool:
+        """Remember a key and return False if it was already known."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._keys:
+                return False
+            self._keys[key] = now + self.ttl
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+        return True
+
+    def discard(self: Self, key: Hashable) -> None:
+        """Forget a key so it is accepted again."""
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def __contains__(self: Self, key: Hashable) -> bool:
+        """Check if a key is remembered and has not expired."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return key in self._keys
+
+    def __len__(self: Self) -> int:
+        """Return the number of remembered keys."""
+        return len(self._keys)
+
+    def _expire(self: Self, now: float) -> None:
+        # keys are ordered by insertion and share one ttl so they expire in order
+        while self._keys:
+            key, expires = next(iter(self._keys.items()))
+            if expires > now:
+                return
+            del self._keys[key]
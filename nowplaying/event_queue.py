@@ -0,0 +1,108 @@
+"""Bounded queue between the API server and the main loop."""
+
+from __future__ import annotations
+
+import logging
+import time
+from queue import Full, Queue
+from typing import Any, Self
+
+from cloudevents.http import CloudEvent
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+"""Default number of events waiting for the main loop."""
+DEFAULT_QUEUE_SIZE = 1000
+
+"""Policies applied when the queue is full."""
+POLICY_REJECT = "reject"
+POLICY_COALESCE = "coalesce"
+POLICIES = (POLICY_REJECT, POLICY_COALESCE)
+
+_QUEUE_DEPTH = REGISTRY.gauge(
+    "nowplaying_event_queue_depth",
+    "Number of events waiting for the main loop.",
+)
+_QUEUE_WAIT = REGISTRY.histogram(
+    "nowplaying_event_queue_wait_seconds",
+    "Time events spent waiting in the queue.",
+)
+_QUEUE_REJECTED = REGISTRY.counter(
+    "nowplaying_event_queue_rejected_total",
+    "Events rejected because the queue was full.",
+)
+_QUEUE_COALESCED = REGISTRY.counter(
+    "nowplaying_event_queue_coalesced_total",
+    "Queued events replaced by a newer event from the same source.",
+)
+
+
+class EventQueue(Queue):
+    """Bounded FIFO queue that records how long items wait.
+
+    With the coalesce policy a full queue replaces the queued event from the
+    same source with the new one instead of refusing it, the newest state of
+    a source is all the main loop needs. If no event from the same source is
+    queued, or with the reject policy, :meth:`put_nowait` raises
+    :class:`queue.Full` so callers can push back on the producer.
+    """
+
+    def __init__(
+        self: Self,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        policy: str = POLICY_REJECT,
+    ) -> None:
+        """Create EventQueue."""
+        super().__init__(maxsize)
+        self.policy = policy
+
+    def put(
+        self: Self,
+        item: Any,  # noqa: ANN401
+        block: bool = True,  # noqa: FBT001, FBT002
+        timeout: float | None = None,
+    ) -> None:
+        """Put an item on the queue, coalescing or rejecting it when full."""
+        if self.policy == POLICY_COALESCE and self._coalesce(item):
+            return
+        try:
+            super().put(item, block, timeout)
+        except Full:
+            _QUEUE_REJECTED.inc()
+            logger.warning("Event queue is full, rejecting %s", item)
+            raise
+
+    def _coalesce(self: Self, item: Any) -> bool:  # noqa: ANN401
+        """Replace a queued event from the same source if the queue is full."""
+        if not isinstance(item, CloudEvent):
+            return False
+        with self.not_full:
+            if not 0 < self.maxsize <= self._qsize():
+                return False
+            index = self._find_source(item["source"])
+            if index is None:
+                return False
+            del self.queue[index]
+            self._put(item)
+            self.not_empty.notify()
+        _QUEUE_COALESCED.inc()
+        logger.info("Coalesced queued event from %s", item["source"])
+        return True
+
+    def _find_source(self: Self, source: str) -> int | None:
+        for index, (_, queued) in enumerate(self.queue):
+            if isinstance(queued, CloudEvent) and queued["source"] == source:
+                return index
+        return None
+
+    def _put(self: Self, item: Any) -> None:  # noqa: ANN401
+        self.queue.append((time.monotonic(), item))
+        _QUEUE_DEPTH.set(len(self.queue))
+
+    def _get(self: Self) -> Any:  # noqa: ANN401
+        queued, item = self.queue.popleft()
+        _QUEUE_DEPTH.set(len(self.queue))
+        _QUEUE_WAIT.observe(time.monotonic() - queued)
+        return item
@@ -0,0 +1,114 @@
+"""Liveness and readiness of the daemon.
+
+The main loop, delivery workers and show client update gauges as they go,
+checking health only reads them so probes never wait for anything.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any, Self
+
+from .metrics import REGISTRY
+
+if TYPE_CHECKING:  # pragma: no cover
+    from queue import Queue
+
+"""Default seconds the main loop may be busy before it is considered stuck."""
+DEFAULT_MAX_BUSY = 120.0
+
+LOOP_HEARTBEAT = REGISTRY.gauge(
+    "nowplaying_main_loop_heartbeat_timestamp_seconds",
+    "Last time the main loop started or finished handling events.",
+)
+LOOP_BUSY_SINCE = REGISTRY.gauge(
+    "nowplaying_main_loop_busy_since_timestamp_seconds",
+    "Time the main loop started handling events, 0 while it waits for events.",
+)
+OBSERVER_LAST_SUCCESS = REGISTRY.gauge(
+    "nowplaying_observer_last_success_timestamp_seconds",
+    "Last time an observer delivered a track event successfully.",
+    ("observer",),
+)
+SHOW_LAST_UPDATE = REGISTRY.gauge(
+    "nowplaying_show_last_update_timestamp_seconds",
+    "Last time the current show was fetched successfully.",
+)
+
+
+def loop_waiting() -> None:
+    """Mark the main loop as waiting for events."""
+    LOOP_BUSY_SINCE.set(0.0)
+    LOOP_HEARTBEAT.set(time.time())
+
+
+def loop_busy() -> None:
+    """Mark the main loop as handling events."""
+    now = time.time()
+    LOOP_HEARTBEAT.set(now)
+    LOOP_BUSY_SINCE.set(now)
+
+
+def observer_delivered(observer: str) -> None:
+    """Mark a successful delivery by an observer labeled by name and endpoint."""
+    OBSERVER_LAST_SUCCESS.set(time.time(), observer=observer)
+
+
+def show_updated() -> None:
+    """Mark a successful show update."""
+    SHOW_LAST_UPDATE.set(time.time())
+
+
+class Health:
+    """Report liveness and readiness from the health gauges.
+
+    The daemon is alive unless the main loop has been busy handling events
+    for more than ``max_busy`` seconds, for example stuck in a blocking call.
+    It is ready once the main loop ran and while the event queue accepts
+    events. Observers and the show data are reported but don't affect
+    readiness, a failing sink shouldn't stop us from accepting events.
+    """
+
+    def __init__(
+        self: Self,
+        event_queue: Queue,
+        max_busy: float = DEFAULT_MAX_BUSY,
+    ) -> None:
+        """Create Health."""
+        self.event_queue = event_queue
+        self.max_busy = max_busy
+
+    def liveness(self: Self, now: float | None = None) -> tuple[bool, dict[str, Any]]:
+        """Return if the daemon is alive and the main loop report."""
+        now = time.time() if now is None else now
+        busy_since = LOOP_BUSY_SINCE.get()
+        busy_for = now - busy_since if busy_since else 0.0
+        alive = busy_for <= self.max_busy
+        return alive, {
+            "main_loop": {
+                "ok": alive,
+                "heartbeat_age": _age(LOOP_HEARTBEAT.get(), now),
+                "busy_for": busy_for,
+            },
+        }
+
+    def readiness(self: Self, now: float | None = None) -> tuple[bool, dict[str, Any]]:
+        """Return if the daemon is ready and the full report."""
+        now = time.time() if now is None else now
+        alive, report = self.liveness(now)
+        depth = self.event_queue.qsize()
+        maxsize = self.event_queue.maxsize
+        accepting = maxsize <= 0 or depth < maxsize
+        started = LOOP_HEARTBEAT.get() > 0
+        report["main_loop"]["started"] = started
+        report["event_queue"] = {"ok": accepting, "depth": depth, "maxsize": maxsize}
+        report["observers"] = {
+            labels["observer"]: {"last_success_age": _age(value, now)}
+            for labels, value in OBSERVER_LAST_SUCCESS.items()
+        }
+        report["show"] = {"age": _age(SHOW_LAST_UPDATE.get(), now)}
+        return alive and started and accepting, report
+
+
+def _age(timestamp: float, now: float) -> float | None:
+    return max(now - timestamp, 0.0) if timestamp else None
@@ -6,12 +6,20 @@ import logging
 import logging.handlers
 from typing import TYPE_CHECKING, Self
 
+from opentelemetry import trace
+
+from nowplaying.runtime import call_async, call_sync
+
 if TYPE_CHECKING:  # pragma: no cover
+    import datetime
+
     from cloudevents.http.event import CloudEvent
 
     from nowplaying.input.observer import InputObserver
+    from nowplaying.runtime import AsyncRuntime
 
 logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
 
 _EXCEPTION_INPUT_UPDATE_FAIL = "Failed to update observer."
 
@@ -20,11 +28,15 @@ class InputHandler:
     """Inform all registered input-event observers about an input status.
 
     This is the subject of the classical observer pattern.
+
+    Observers may implement :meth:`InputObserver.update` as a coroutine. If the
+    handler has an :class:`AsyncRuntime` all updates run on its event loop.
     """
 
-    def __init__(self: Self) -> None:
+    def __init__(self: Self, runtime: AsyncRuntime | None = None) -> None:
         """Create InputHandler."""
         self._observers: list[InputObserver] = []
+        self._runtime = runtime
 
     def register_observer(self: Self, observer: InputObserver) -> None:
         """Register an observer."""
@@ -35,14 +47,44 @@ class InputHandler:
         """Remove an observer."""
         self._observers.remove(observer)
 
+    @tracer.start_as_current_span("InputHandler.update")
     def update(self: Self, saemubox_id: int, event: CloudEvent | None = None) -> None:
         """Update all observers."""
+        if self._runtime is not None:
+            self._runtime.run(self.update_async(saemubox_id, event))
+            return
+
         for observer in self._observers:
             logger.debug("Sending update event to observer %s", observer.__class__)
 
             try:
-                observer.update(saemubox_id, event)
+                call_sync(observer.update, saemubox_id, event)
             except Exception:  # pragma: no cover
                 # TODO(hairmare): test once replaced with non generic exception
                 # https://github.com/radiorabe/nowplaying/issues/180
                 logger.exception(_EXCEPTION_INPUT_UPDATE_FAIL)
+
+    async def update_async(
+        self: Self,
+        saemubox_id: int,
+        event: CloudEvent | None = None,
+    ) -> None:
+        """Update all observers from an event loop."""
+        for observer in self._observers:
+            logger.debug("Sending update event to observer %s", observer.__class__)
+
+            try:
+                await call_async(observer.update, saemubox_id, event)
+            except Exception:  # pragma: no cover
+                # TODO(hairmare): test once replaced with non generic exception
+                # https://github.com/radiorabe/nowplaying/issues/180
+                logger.exception(_EXCEPTION_INPUT_UPDATE_FAIL)
+
+    def next_deadline(self: Self) -> datetime.datetime | None:
+        """Return the earliest deadline of all observers, if any."""
+        deadlines = [
+            deadline
+            for observer in self._observers
+            if (deadline := observer.next_deadline()) is not None
+        ]
+        return min(deadlines, default=None)
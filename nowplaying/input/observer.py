@@ -13,17 +13,23 @@ from typing import TYPE_CHECKING, Self
 
 import isodate  # type: ignore[import-untyped]
 import pytz
+from opentelemetry import trace
 
 from nowplaying.show import client
 from nowplaying.show.show import Show
 from nowplaying.track.track import DEFAULT_ARTIST, DEFAULT_TITLE, Track
 
 if TYPE_CHECKING:  # pragma: no cover
+    import datetime
+    from collections.abc import Callable
+
     from cloudevents.http.event import CloudEvent
 
+    from nowplaying.show.cache import ShowCache
     from nowplaying.track.handler import TrackEventHandler
 
 logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
 
 _EXCEPTION_INPUT_MISSING_SONG_TAG = "No <song> tag found"
 _EXCEPTION_INPUT_MISSING_TIMESTAMP = "Song timestamp attribute is missing"
@@ -35,7 +41,12 @@ class InputObserver(ABC):
     _SHOW_NAME_KLANGBECKEN = "Klangbecken"
     _SHOW_URL_KLANGBECKEN = "http://www.rabe.ch/sendungen/musik/klangbecken.html"
 
-    def __init__(self: Self, current_show_url: str) -> None:
+    def __init__(
+        self: Self,
+        current_show_url: str,
+        show_cache: ShowCache | None = None,
+        on_show_change: Callable[[], None] | None = None,
+    ) -> None:
         """Create InputObserver."""
         self.show: Show
         self.track_handler: TrackEventHandler
@@ -45,7 +56,11 @@ class InputObserver(ABC):
 
         self.current_show_url = current_show_url
 
-        self.showclient = client.ShowClient(current_show_url)
+        self.showclient = client.ShowClient(
+            current_show_url,
+            cache=show_cache,
+            on_change=on_show_change,
+        )
         self.show = self.showclient.get_show_info()
 
     def add_track_handler(self: Self, track_handler: TrackEventHandler) -> None:
@@ -60,6 +75,14 @@ class InputObserver(ABC):
         if self.handle_id(saemubox_id, event):
             self.handle(event)
 
+    def next_deadline(self: Self) -> datetime.datetime | None:
+        """Return when this observer needs to be updated without an event.
+
+        The daemon sleeps until the earliest deadline of all observers unless
+        woken up by an event. Observers that only react to events return None.
+        """
+        return None
+
     @abstractmethod
     # TODO(hairmare): v3 remove this method
     # https://github.com/radiorabe/nowplaying/issues/179
@@ -95,6 +118,8 @@ class KlangbeckenInputObserver(InputObserver):
         self: Self,
         current_show_url: str,
         input_file: str | None = None,
+        show_cache: ShowCache | None = None,
+        on_show_change: Callable[[], None] | None = None,
     ) -> None:  # pragma: no coverage
         """Create KlangbeckenInputObserver."""
         # TODO(hairmare): test once input file is replaced with api
@@ -110,7 +135,7 @@ class KlangbeckenInputObserver(InputObserver):
             self.last_modify_time = Path(self.input_file).stat().st_mtime
 
         self.track: Track
-        super().__init__(current_show_url)
+        super().__init__(current_show_url, show_cache, on_show_change)
 
     def handles(self: Self, event: CloudEvent | None) -> bool:
         """Check if we need to handle the event."""
@@ -151,6 +176,7 @@ class KlangbeckenInputObserver(InputObserver):
         """Handle RaBe CloudEevent."""
         self._handle(event)
 
+    @tracer.start_as_current_span("KlangbeckenInputObserver._handle")
     def _handle(self: Self, event: CloudEvent | None = None) -> None:
         """Handle actual RaBe CloudEevent.
 
@@ -303,6 +329,7 @@ class KlangbeckenInputObserver(InputObserver):
         track.set_title(event.data["item.title"])
 
         event_time = isodate.parse_datetime(event["time"])
+        track.set_event_time(event_time)
         if event["type"] == "ch.rabe.api.events.track.v1.trackStarted":
             track.set_starttime(event_time)
         elif event["type"] == "ch.rabe.api.events.track.v1.trackFinished":
@@ -350,6 +377,16 @@ class NonKlangbeckenInputObserver(InputObserver):
         # only handle non-Klangbecken
         return saemubox_id != 1
 
+    def next_deadline(self: Self) -> datetime.datetime | None:
+        """Wake up when the current show ends so the next one gets picked up.
+
+        The show doesn't get updated while Klangbecken is on air, waking up
+        for it then would only spin the main loop once the show ended.
+        """
+        if self.previous_saemubox_id == 1:
+            return None
+        return self.show.endtime
+
     def handle(self: Self, _: CloudEvent | None = None) -> None:
         """Handle Track."""
         self.show = self.showclient.get_show_info()
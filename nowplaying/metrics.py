@@ -0,0 +1,223 @@
+"""Lightweight metrics exported in the Prometheus text format.
+
+Metrics are module level singletons registered on :data:`REGISTRY`. Updating
+a metric only takes the metric's own lock so hot paths never contend on a
+global lock.
+
+>>> registry = Registry()
+>>> requests = registry.counter("requests_total", "Requests.", ("code",))
+>>> requests.inc(code="200")
+>>> print(registry.render().strip())
+# HELP requests_total Requests.
+# TYPE requests_total counter
+requests_total{code="200"} 1.0
+"""
+
+from __future__ import annotations
+
+import bisect
+from threading import Lock
+from typing import TYPE_CHECKING, Self, TypeVar
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator
+
+_M = TypeVar("_M", bound="Metric")
+
+"""Default histogram buckets in seconds, tuned for webhook and delivery times."""
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Metric:
+    """Base for all metrics with optional labels."""
+
+    type = "untyped"
+
+    def __init__(
+        self: Self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        """Create Metric."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def _key(self: Self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self: Self, key: tuple[str, ...], **extra: str) -> str:
+        pairs = [*zip(self.labelnames, key, strict=True), *extra.items()]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+    def get(self: Self, **labels: str) -> float:
+        """Return the current value for the given labels."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def items(self: Self) -> list[tuple[dict[str, str], float]]:
+        """Return the labels and value of every sample."""
+        with self._lock:
+            values = list(self._values.items())
+        return [(dict(zip(self.labelnames, key, strict=True)), v) for key, v in values]
+
+    def samples(self: Self) -> Iterator[str]:
+        """Yield the sample lines of the metric."""
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{self._labels(key)} {float(value)}"
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    type = "counter"
+
+    def inc(self: Self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the counter."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def set(self: Self, value: float, **labels: str) -> None:
+        """Set the gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self: Self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Create Histogram."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self._histograms: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self: Self, value: float, **labels: str) -> None:
+        """Record a value."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # bucket counts followed by the +Inf count and the sum
+            histogram = self._histograms.setdefault(
+                key,
+                [0.0] * (len(self.buckets) + 2),
+            )
+            histogram[index] += 1
+            histogram[-1] += value
+
+    def get_count(self: Self, **labels: str) -> float:
+        """Return the number of observed values for the given labels."""
+        histogram = self._histograms.get(self._key(labels))
+        return sum(histogram[:-1]) if histogram else 0.0
+
+    def samples(self: Self) -> Iterator[str]:
+        """Yield the bucket, sum and count lines of the histogram."""
+        with self._lock:
+            histograms = [(key, list(value)) for key, value in self._histograms.items()]
+        for key, histogram in histograms:
+            cumulative = 0.0
+            for bound, count in zip(
+                (*self.buckets, "+Inf"),
+                histogram[:-1],
+                strict=True,
+            ):
+                cumulative += count
+                labels = self._labels(key, le=str(bound))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {histogram[-1]}"
+            yield f"{self.name}_count{self._labels(key)} {cumulative}"
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self: Self) -> None:
+        """Create Registry."""
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self: Self, metric: _M) -> _M:
+        """Register a metric, replacing any metric with the same name."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self: Self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> Counter:
+        """Create and register a Counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self: Self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+    ) -> Gauge:
+        """Create and register a Gauge."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self: Self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create and register a Histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self: Self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+"""The registry exported on the /metrics endpoint."""
+REGISTRY = Registry()
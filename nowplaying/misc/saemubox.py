@@ -111,6 +111,17 @@ class SaemuBox:
         self.__update()
         return self.output
 
+    def wait_for_output_id(self):  # pragma: no cover
+        """Block until the Sämubox sends data and return the active output id."""
+        select.select([self.sock], [], [])
+        return self.get_active_output_id()
+
+    def get_last_output_id(self):  # pragma: no cover
+        """Return the last received output id without reading from the socket."""
+        if not self.output:
+            raise SaemuBoxError("No data received from SaemuBox yet")
+        return self.output
+
     def get_active_output_name(self):  # pragma: no cover
         self.__update()
         return self.output_mapping[self.output]
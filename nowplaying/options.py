@@ -17,13 +17,16 @@ from nowplaying.track.observers.ticker import TickerTrackObserver
 class Options:
     """Contain all hardcoded and loaded from configargparse options."""
 
-    """How many seconds the main daemon loop sleeps."""
-    sleep_seconds = 1
+    """How many seconds between checks of the legacy input file for changes."""
+    input_file_poll_seconds = 1
+
+    """How many seconds to wait before reading from the Sämubox after an error."""
+    saemubox_retry_seconds = 1
 
     """Default socket of 2 minutes, to prevent endless hangs on HTTP requests."""
     socket_default_timeout = 120
 
-    def __init__(self: Self) -> None:
+    def __init__(self: Self) -> None:  # noqa: PLR0915
         """Configure configargparse."""
         self.__args = configargparse.ArgParser(
             default_config_files=["/etc/nowplaying/conf.d/*.conf", "~/.nowplayingrc"],
@@ -65,6 +68,101 @@ class Options:
         self.ticker_output_file: str = ""
         TickerTrackObserver.Options.args(self.__args)
 
+        self.observer_timeout: float = 30.0
+        self.__args.add_argument(
+            "--observer-timeout",
+            type=float,
+            dest="observer_timeout",
+            help="Seconds each track observer gets to deliver an update",
+            default=30.0,
+        )
+        self.observer_queue_size: int = 4
+        self.__args.add_argument(
+            "--observer-queue-size",
+            type=int,
+            dest="observer_queue_size",
+            help=(
+                "Max number of events waiting for each track observer, "
+                "new tracks always replace waiting ones"
+            ),
+            default=4,
+        )
+        self.observer_retry_attempts: int = 3
+        self.__args.add_argument(
+            "--observer-retry-attempts",
+            type=int,
+            dest="observer_retry_attempts",
+            help=(
+                "Max attempts for deliveries to Icecast, DAB+ and SMC, "
+                "pass 1 to disable retries"
+            ),
+            default=3,
+        )
+        self.observer_retry_backoff: float = 1.0
+        self.__args.add_argument(
+            "--observer-retry-backoff",
+            type=float,
+            dest="observer_retry_backoff",
+            help="Seconds before the first retry, doubles with every retry",
+            default=1.0,
+        )
+        self.observer_retry_budget: float = 60.0
+        self.__args.add_argument(
+            "--observer-retry-budget",
+            type=float,
+            dest="observer_retry_budget",
+            help="Seconds after which a failed delivery is no longer retried",
+            default=60.0,
+        )
+        self.outbox_file: str = ""
+        self.__args.add_argument(
+            "--outbox-file",
+            dest="outbox_file",
+            help=(
+                "SQLite file recording pending track observer deliveries so "
+                "they get replayed after a restart, disabled by default"
+            ),
+            default="",
+        )
+        self.health_max_busy: float = 120.0
+        self.__args.add_argument(
+            "--health-max-busy",
+            type=float,
+            dest="health_max_busy",
+            help=(
+                "Seconds the main loop may spend handling events before /healthz "
+                "reports it as stuck"
+            ),
+            default=120.0,
+        )
+        self.latency_objective: float = 10.0
+        self.__args.add_argument(
+            "--latency-objective",
+            type=float,
+            dest="latency_objective",
+            help=(
+                "Seconds from a track starting until every observer should have "
+                "delivered it, a warning gets logged while an observer misses it"
+            ),
+            default=10.0,
+        )
+        self.latency_percentile: float = 99.0
+        self.__args.add_argument(
+            "--latency-percentile",
+            type=float,
+            dest="latency_percentile",
+            help="Percentile of deliveries that must meet the latency objective",
+            default=99.0,
+        )
+        self.latency_window: float = 3600.0
+        self.__args.add_argument(
+            "--latency-window",
+            type=float,
+            dest="latency_window",
+            help="Seconds of deliveries latency percentiles are computed over",
+            default=3600.0,
+        )
+
         self.current_show_url: str = ""
         self.__args.add_argument(
             "-s",
@@ -72,6 +170,17 @@ class Options:
             dest="current_show_url",
             help="Current Show URL e.g. 'https://libretime.int.example.org/api/live-info-v2/format/json'",
         )
+        self.show_cache_file: str = ""
+        self.__args.add_argument(
+            "--show-cache-file",
+            dest="show_cache_file",
+            help=(
+                "JSON file the show schedule is cached in so shows are known "
+                "right after a restart and during LibreTime outages, "
+                "disabled by default"
+            ),
+            default="",
+        )
         # TODO(hairmare): v3 remove this option
         # https://github.com/radiorabe/nowplaying/issues/179
         self.input_file: str = "/home/endlosplayer/Eingang/now-playing.xml"
@@ -106,6 +215,180 @@ class Options:
             help="API Auth Users",
             default={"rabe": "rabe"},
         )
+        self.api_server: str = "cherrypy"
+        self.__args.add_argument(
+            "--api-server",
+            dest="api_server",
+            choices=["cherrypy", "uvicorn"],
+            help=(
+                "Serve the API from a CherryPy thread pool or from an asyncio "
+                "event loop with uvicorn (default: cherrypy)"
+            ),
+            default="cherrypy",
+        )
+        self.api_workers: int = 10
+        self.__args.add_argument(
+            "--api-workers",
+            type=int,
+            dest="api_workers",
+            help="Number of CherryPy worker threads serving API requests",
+            default=10,
+        )
+        self.api_keep_alive: int = 10
+        self.__args.add_argument(
+            "--api-keep-alive",
+            type=int,
+            dest="api_keep_alive",
+            help="Seconds idle API connections are kept open",
+            default=10,
+        )
+        self.api_max_connections: int = 0
+        self.__args.add_argument(
+            "--api-max-connections",
+            type=int,
+            dest="api_max_connections",
+            help=(
+                "Max concurrent connections uvicorn accepts before answering "
+                "503, 0 for no limit"
+            ),
+            default=0,
+        )
+        self.api_sse_heartbeat: float = 15.0
+        self.__args.add_argument(
+            "--api-sse-heartbeat",
+            type=float,
+            dest="api_sse_heartbeat",
+            help="Seconds between heartbeats on idle Server-Sent Events streams",
+            default=15.0,
+        )
+        self.api_stream_history: int = 100
+        self.__args.add_argument(
+            "--api-stream-history",
+            type=int,
+            dest="api_stream_history",
+            help="Number of messages kept for stream clients resuming a stream",
+            default=100,
+        )
+        self.api_stream_queue_size: int = 64
+        self.__args.add_argument(
+            "--api-stream-queue-size",
+            type=int,
+            dest="api_stream_queue_size",
+            help=(
+                "Number of messages waiting for a stream client before it "
+                "gets disconnected as too slow"
+            ),
+            default=64,
+        )
+        self.api_history_size: int = 1000
+        self.__args.add_argument(
+            "--api-history-size",
+            type=int,
+            dest="api_history_size",
+            help="Number of recently played tracks served from /history",
+            default=1000,
+        )
+        self.api_queue_size: int = 1000
+        self.__args.add_argument(
+            "--api-queue-size",
+            type=int,
+            dest="api_queue_size",
+            help="Max number of webhook events waiting for the main loop",
+            default=1000,
+        )
+        self.api_queue_policy: str = "reject"
+        self.__args.add_argument(
+            "--api-queue-policy",
+            dest="api_queue_policy",
+            choices=["reject", "coalesce"],
+            help=(
+                "Reject webhook events with 503 when the queue is full or "
+                "replace the queued event from the same source (default: reject)"
+            ),
+            default="reject",
+        )
+        self.api_retry_after: int = 5
+        self.__args.add_argument(
+            "--api-retry-after",
+            type=int,
+            dest="api_retry_after",
+            help="Seconds clients should wait before retrying rejected events",
+            default=5,
+        )
+        self.api_rate_limit: float = 10.0
+        self.__args.add_argument(
+            "--api-rate-limit",
+            type=float,
+            dest="api_rate_limit",
+            help=(
+                "Requests per second each user and address may send to "
+                "authenticated endpoints, 0 disables rate limiting"
+            ),
+            default=10.0,
+        )
+        self.api_rate_burst: int = 50
+        self.__args.add_argument(
+            "--api-rate-burst",
+            type=int,
+            dest="api_rate_burst",
+            help="Requests each user and address may send at once",
+            default=50,
+        )
+        self.api_max_body_size: int = 1048576
+        self.__args.add_argument(
+            "--api-max-body-size",
+            type=int,
+            dest="api_max_body_size",
+            help="Largest request body in bytes the API accepts",
+            default=1048576,
+        )
+        self.api_dedup_size: int = 1024
+        self.__args.add_argument(
+            "--api-dedup-size",
+            type=int,
+            dest="api_dedup_size",
+            help="Number of recent webhook event ids remembered to drop duplicates",
+            default=1024,
+        )
+        self.api_dedup_ttl: float = 3600.0
+        self.__args.add_argument(
+            "--api-dedup-ttl",
+            type=float,
+            dest="api_dedup_ttl",
+            help="Seconds a webhook event id is remembered to drop duplicates",
+            default=3600.0,
+        )
+        self.reorder_window: float = 0.5
+        self.__args.add_argument(
+            "--reorder-window",
+            type=float,
+            dest="reorder_window",
+            help=(
+                "Seconds webhook events are held back so late events can be "
+                "put back into the order they happened in, 0 disables reordering"
+            ),
+            default=0.5,
+        )
+        self.runtime: str = "threads"
+        self.__args.add_argument(
+            "--runtime",
+            dest="runtime",
+            choices=["threads", "asyncio"],
+            help=(
+                "Run observers directly from the main loop thread or from an "
+                "asyncio event loop that supports async observers "
+                "(default: threads)"
+            ),
+            default="threads",
+        )
+        self.runtime_workers: int = 16
+        self.__args.add_argument(
+            "--runtime-workers",
+            type=int,
+            dest="runtime_workers",
+            help="Max threads the asyncio runtime uses for sync observers",
+            default=16,
+        )
         self.otlp_enable: bool = False
         self.__args.add_argument(
             "--instrumentation-otlp-enable",
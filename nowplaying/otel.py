@@ -1,23 +1,59 @@
 """OpenTelemetry for nowplaying.
 
-This sets up our logging stack to use OpenTelemetry.
+This sets up our logging, tracing and metrics stack to use OpenTelemetry.
+
+Trace context travels with CloudEvents in their ``traceparent`` and
+``tracestate`` attributes as defined by the CloudEvents distributed tracing
+extension, this carries it from the webhook through the event queue.
 """
 
+from __future__ import annotations
+
 import logging
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import Self, no_type_check
+from typing import TYPE_CHECKING, Any, Protocol, Self, no_type_check
 
+from opentelemetry import metrics, trace
 from opentelemetry._logs import set_logger_provider
 from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
+from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler, LogRecord
 from opentelemetry.sdk._logs.export import (
     BatchLogRecordProcessor,
     ConsoleLogExporter,
     SimpleLogRecordProcessor,
 )
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+if TYPE_CHECKING:  # pragma: no cover
+    from opentelemetry.context import Context
+
+_PROPAGATOR = TraceContextTextMapPropagator()
+
+
+class Carrier(Protocol):
+    """Anything trace context can be read from, like CloudEvents and headers."""
+
+    def get(self: Self, key: str) -> Any:  # noqa: ANN401
+        """Return the value of a key or None."""
+
+    def __getitem__(self: Self, key: str) -> Any:  # noqa: ANN401
+        """Return the value of a key."""
+
+
+class MutableCarrier(Carrier, Protocol):
+    """Anything trace context can be written to, like CloudEvents."""
+
+    def __setitem__(self: Self, key: str, value: Any) -> None:  # noqa: ANN401
+        """Set the value of a key."""
 
 
 @no_type_check
@@ -47,18 +83,51 @@ class SourceAttributeFilter(logging.Filter):  # pragma: no cover
         return True
 
 
+def extract_context(event: Carrier) -> Context | None:
+    """Return the trace context carried by an event, if any."""
+    carrier = {
+        key: event[key] for key in _PROPAGATOR.fields if event.get(key) is not None
+    }
+    return _PROPAGATOR.extract(carrier) if carrier else None
+
+
+def inject_context(event: MutableCarrier) -> None:
+    """Carry the current trace context along with an event."""
+    carrier: dict[str, str] = {}
+    _PROPAGATOR.inject(carrier)
+    for key, value in carrier.items():
+        event[key] = value
+
+
 def setup_otel(*, otlp_enable: bool = False) -> None:  # pragma: no cover
-    """Configure opentelemetry logging to stdout and collector."""
+    """Configure opentelemetry logging to stdout and collector.
+
+    Traces and metrics only get exported to the collector.
+    """
     root = logging.getLogger()
     root.setLevel(logging.INFO)
 
-    logger_provider = LoggerProvider(
-        resource=Resource.create(
-            {
-                "service.name": "nowplaying",
-            },
-        ),
+    resource = Resource.create(
+        {
+            "service.name": "nowplaying",
+        },
     )
+
+    tracer_provider = TracerProvider(resource=resource)
+    metric_readers = []
+    if otlp_enable:
+        tracer_provider.add_span_processor(
+            BatchSpanProcessor(OTLPSpanExporter(insecure=True)),
+        )
+        metric_readers.append(
+            PeriodicExportingMetricReader(OTLPMetricExporter(insecure=True)),
+        )
+    trace.set_tracer_provider(tracer_provider)
+    metrics.set_meter_provider(
+        MeterProvider(resource=resource, metric_readers=metric_readers),
+    )
+
+    logger_provider = LoggerProvider(resource=resource)
     set_logger_provider(logger_provider)
 
     console_exporter = ConsoleLogExporter(
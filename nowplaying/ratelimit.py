@@ -0,0 +1,61 @@
+"""Limit how many requests each client may send."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Hashable
+
+"""Default number of clients whose buckets are remembered."""
+DEFAULT_MAXSIZE = 1024
+
+
+class RateLimiter:
+    """Token bucket per client.
+
+    Every client may send ``burst`` requests at once, its bucket refills at
+    ``rate`` tokens per second. Buckets of the least recently seen clients
+    get forgotten once more than ``maxsize`` clients are known, a forgotten
+    client starts over with a full bucket. A rate of 0 disables limiting.
+
+    >>> limiter = RateLimiter(rate=1.0, burst=2)
+    >>> [limiter.acquire("client", now=0.0) for _ in range(3)]
+    [0.0, 0.0, 1.0]
+    >>> limiter.acquire("client", now=1.0)
+    0.0
+    """
+
+    def __init__(
+        self: Self,
+        rate: float,
+        burst: int,
+        maxsize: int = DEFAULT_MAXSIZE,
+    ) -> None:
+        """Create RateLimiter."""
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._lock = Lock()
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+
+    def acquire(self: Self, key: Hashable, now: float | None = None) -> float:
+        """Take a token and return 0 or the seconds until one is available."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(self.burst), now))
+            tokens = min(tokens + (now - updated) * self.rate, float(self.burst))
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
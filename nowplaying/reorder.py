@@ -0,0 +1,129 @@
+"""Put webhook events back into the order they happened in."""
+
+from __future__ import annotations
+
+import datetime
+import heapq
+import itertools
+import logging
+import time
+from typing import TYPE_CHECKING, Self
+
+import isodate  # type: ignore[import-untyped]
+
+from .metrics import REGISTRY
+
+if TYPE_CHECKING:  # pragma: no cover
+    from cloudevents.http.event import CloudEvent
+
+logger = logging.getLogger(__name__)
+
+"""Default seconds events are held back to wait for earlier events."""
+DEFAULT_WINDOW = 0.5
+
+_TRACK_STARTED = "ch.rabe.api.events.track.v1.trackStarted"
+
+_REORDER_DEPTH = REGISTRY.gauge(
+    "nowplaying_reorder_buffer_depth",
+    "Number of events held back by the reorder buffer.",
+)
+_REORDER_DROPPED = REGISTRY.counter(
+    "nowplaying_reorder_dropped_total",
+    "Events dropped by the reorder buffer because they were obsolete.",
+    ("reason",),
+)
+
+
+class ReorderBuffer:
+    """Order events by their CloudEvent time within a fixed window.
+
+    Every event is held back for ``window`` seconds after it arrived so events
+    that happened earlier but arrived later can overtake it. Events are kept in
+    a heap so nothing gets sorted as a whole and the latency an event picks up
+    is bounded by the window.
+
+    Events that are obsolete are dropped instead of being released:
+
+    * events older than the last released event from the same source arrived
+      too late to be put back into order
+    * events released together with a newer trackStarted event from the same
+      source are superseded by it
+    """
+
+    def __init__(self: Self, window: float = DEFAULT_WINDOW) -> None:
+        """Create ReorderBuffer."""
+        self.window = window
+        self._heap: list[tuple[datetime.datetime, bool, int, float, CloudEvent]] = []
+        self._counter = itertools.count()
+        self._released: dict[str, datetime.datetime] = {}
+
+    def __len__(self: Self) -> int:
+        """Return the number of events held back."""
+        return len(self._heap)
+
+    def push(self: Self, event: CloudEvent, now: float | None = None) -> None:
+        """Add an event that arrived at monotonic time ``now``."""
+        now = time.monotonic() if now is None else now
+        event_time = _event_time(event)
+        released = self._released.get(event["source"])
+        if released is not None and event_time < released:
+            _REORDER_DROPPED.inc(reason="late")
+            logger.warning("Dropping event that arrived too late: %s", event)
+            return
+        # a track finishes before the next one starts at the same time
+        heapq.heappush(
+            self._heap,
+            (
+                event_time,
+                event["type"] == _TRACK_STARTED,
+                next(self._counter),
+                now + self.window,
+                event,
+            ),
+        )
+        _REORDER_DEPTH.set(len(self._heap))
+
+    def next_release(self: Self) -> float | None:
+        """Return the monotonic time the next event gets released at."""
+        if not self._heap:
+            return None
+        return self._heap[0][3]
+
+    def pop_ready(self: Self, now: float | None = None) -> list[CloudEvent]:
+        """Remove and return all events whose window passed in event time order."""
+        now = time.monotonic() if now is None else now
+        ready: list[tuple[datetime.datetime, CloudEvent]] = []
+        while self._heap and self._heap[0][3] <= now:
+            event_time, *_, event = heapq.heappop(self._heap)
+            ready.append((event_time, event))
+        _REORDER_DEPTH.set(len(self._heap))
+
+        latest_start = {
+            event["source"]: index
+            for index, (_, event) in enumerate(ready)
+            if event["type"] == _TRACK_STARTED
+        }
+        events = []
+        for index, (event_time, event) in enumerate(ready):
+            source = event["source"]
+            self._released[source] = max(
+                self._released.get(source, event_time),
+                event_time,
+            )
+            if index < latest_start.get(source, -1):
+                _REORDER_DROPPED.inc(reason="superseded")
+                logger.info("Dropping superseded event: %s", event)
+                continue
+            events.append(event)
+        return events
+
+
+def _event_time(event: CloudEvent) -> datetime.datetime:
+    """Return the time of an event, events without one happened just now."""
+    value = event.get("time")
+    if not value:
+        return datetime.datetime.now(datetime.UTC)
+    event_time = isodate.parse_datetime(value)
+    if event_time.tzinfo is None:
+        event_time = event_time.replace(tzinfo=datetime.UTC)
+    return event_time
@@ -0,0 +1,94 @@
+"""Asyncio runtime for nowplaying.
+
+Observers may implement their hooks as either plain functions or coroutine
+functions. The helpers in this module take care of calling both kinds the same
+way, running plain functions in an executor when called from the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+from typing import TYPE_CHECKING, Any, Self
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable, Coroutine
+    from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """Run an asyncio event loop in a background thread.
+
+    Coroutines get submitted from any other thread and sync code called from the
+    loop runs in a bounded thread pool.
+    """
+
+    def __init__(self: Self, max_workers: int | None = None) -> None:
+        """Create AsyncRuntime."""
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="nowplaying-runtime",
+            ),
+        )
+        self._thread = Thread(
+            target=self.loop.run_forever,
+            name="nowplaying-asyncio",
+            daemon=True,
+        )
+
+    def start(self: Self) -> None:
+        """Start the event loop thread."""
+        logger.info("Starting asyncio runtime")
+        self._thread.start()
+
+    def stop(self: Self) -> None:
+        """Stop the event loop and wait for its thread to finish."""
+        logger.info("Stopping asyncio runtime")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    def submit(self: Self, coro: Coroutine[Any, Any, Any]) -> Future:
+        """Schedule a coroutine on the loop and return a future for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(
+        self: Self,
+        coro: Coroutine[Any, Any, Any],
+        timeout: float | None = None,
+    ) -> Any:  # noqa: ANN401
+        """Run a coroutine on the loop and block until it is done.
+
+        Must not be called from the loop thread itself.
+        """
+        return self.submit(coro).result(timeout)
+
+
+async def call_async(func: Callable[..., Any], *args: Any) -> Any:  # noqa: ANN401
+    """Await a coroutine function or run a plain function in the executor."""
+    if inspect.iscoroutinefunction(func):
+        return await func(*args)
+    return await asyncio.to_thread(func, *args)
+
+
+def call_sync(
+    func: Callable[..., Any],
+    *args: Any,  # noqa: ANN401
+    runtime: AsyncRuntime | None = None,
+) -> Any:  # noqa: ANN401
+    """Call a plain function or run a coroutine function to completion.
+
+    Coroutine functions run on the runtime if one is given or on a temporary
+    event loop otherwise.
+    """
+    if not inspect.iscoroutinefunction(func):
+        return func(*args)
+    if runtime is not None:
+        return runtime.run(func(*args))
+    return asyncio.run(func(*args))
@@ -0,0 +1,74 @@
+"""Persist the show timeline to survive restarts and LibreTime outages."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from threading import get_ident
+from typing import TYPE_CHECKING, Self
+
+from .show import Show
+from .timeline import ShowTimeline
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+"""Version of the cache file format, files with other versions are ignored."""
+VERSION = 1
+
+
+class ShowCache:
+    """Keep the last timeline LibreTime sent in a JSON file.
+
+    The file gets replaced atomically on every save so a crash never leaves
+    a half written cache behind. The cached validators allow the first
+    lookup after a restart to be answered with 304 Not Modified.
+    """
+
+    def __init__(self: Self, path: str) -> None:
+        """Create ShowCache."""
+        self.path = Path(path)
+
+    def load(self: Self) -> tuple[ShowTimeline, dict[str, str]] | None:
+        """Return the cached timeline and validators if there are any."""
+        try:
+            data = json.loads(self.path.read_text())
+            if data["version"] != VERSION:
+                logger.warning("Ignoring show cache with version %s", data["version"])
+                return None
+            timeline = ShowTimeline(Show.from_dict(show) for show in data["shows"])
+            validators = dict(data["validators"])
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception("Failed to load show cache from %s", self.path)
+            return None
+        logger.info("Loaded %i shows from %s", len(timeline), self.path)
+        return timeline, validators
+
+    def save(
+        self: Self,
+        timeline: ShowTimeline,
+        validators: Mapping[str, str],
+    ) -> None:
+        """Replace the cached timeline and validators."""
+        data = json.dumps(
+            {
+                "version": VERSION,
+                "validators": dict(validators),
+                "shows": [show.to_dict() for show in timeline],
+            },
+        )
+        # every thread writes its own temporary file so concurrent saves of
+        # clients sharing the cache don't interfere
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{get_ident()}")
+        try:
+            tmp.write_text(data)
+            tmp.replace(self.path)
+        except OSError:
+            logger.exception("Failed to save show cache to %s", self.path)
+            tmp.unlink(missing_ok=True)
@@ -5,15 +5,29 @@ from __future__ import annotations
 import datetime
 import logging
 import logging.handlers
+import math
 import re
+import time
 from html.entities import entitydefs
+from http import HTTPStatus
 from re import Match
-from typing import Self
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Self
 
 import pytz
 import requests
+from requests.adapters import HTTPAdapter
+
+from nowplaying.health import show_updated
+from nowplaying.metrics import REGISTRY
 
 from .show import Show
+from .timeline import ShowTimeline
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+
+    from .cache import ShowCache
 
 logger = logging.getLogger(__name__)
 
@@ -22,79 +36,262 @@ _EXCEPTION_SHOWCLIENT_NO_NAME = "Missing show name"
 _EXCEPTION_SHOWCLIENT_NO_START = "Missing show start time"
 _EXCEPTION_SHOWCLIENT_NO_END = "Missing show end time"
 
+"""Seconds to wait for a connection to LibreTime."""
+CONNECT_TIMEOUT = 3.05
+
+"""Seconds to wait for LibreTime to answer once connected."""
+READ_TIMEOUT = 30.0
+
+"""Max connections kept open to LibreTime."""
+POOL_MAXSIZE = 4
+
+"""Default seconds until show info gets revalidated even if the show still runs."""
+DEFAULT_MAX_AGE = 300.0
+
+_LOOKUP_DURATION = REGISTRY.histogram(
+    "nowplaying_show_lookup_duration_seconds",
+    "Time spent fetching the current show.",
+)
+_LOOKUP_FAILURES = REGISTRY.counter(
+    "nowplaying_show_lookup_failures_total",
+    "Show lookups that failed to fetch or parse the current show.",
+)
+_LOOKUP_NOT_MODIFIED = REGISTRY.counter(
+    "nowplaying_show_lookup_not_modified_total",
+    "Show lookups answered with 304 Not Modified.",
+)
+
 
 class ShowClientError(Exception):
     """ShowClient related exception."""
 
 
+def create_session(pool_maxsize: int = POOL_MAXSIZE) -> requests.Session:
+    """Create a session that keeps up to ``pool_maxsize`` connections alive.
+
+    Callers wait for a free connection instead of opening more of them.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_maxsize,
+        pool_block=True,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+"""Session shared by all show clients so lookups reuse open connections."""
+SESSION = create_session()
+
+
 class ShowClient:
     """Fetches the show info from LibreTime now-playing v2 endpoint.
 
-    Every show has a name, a start and endtime and an optional URL.
+    Every show has a name, a start and endtime and an optional URL. The
+    current and upcoming shows are kept in a :class:`ShowTimeline` so show
+    changes are resolved locally until the timeline runs out. LibreTime is
+    asked in a background thread so callers get the last known show right
+    away, even while LibreTime is slow or down. With a :class:`ShowCache`
+    the timeline survives restarts so shows are known before LibreTime
+    answered the first time.
+
+    Lookups go through a shared :class:`requests.Session` so they don't pay
+    for a new TCP and TLS handshake every time. They are conditional on the
+    ETag and Last-Modified validators of the last show parsed, the show is
+    reused instead of downloaded and parsed again while LibreTime answers
+    with 304. ``on_change`` gets called whenever a background update changed
+    the show so the caller doesn't have to wait for the next deadline to
+    pick it up.
     """
 
     __DEFAULT_SHOW_DURATION = 3  # 3 seconds
+    __NEXT_SHOW_LEAD = datetime.timedelta(minutes=15)
     __cleanup_show_name_regexp = re.compile(r"&(\w+?);")
     __show_datetime_format = "%Y-%m-%d %H:%M:%S"
 
-    def __init__(self: Self, current_show_url: str) -> None:
+    def __init__(
+        self: Self,
+        current_show_url: str,
+        session: requests.Session | None = None,
+        max_age: float = DEFAULT_MAX_AGE,
+        cache: ShowCache | None = None,
+        on_change: Callable[[], None] | None = None,
+    ) -> None:
         """Create Show."""
         self.current_show_url = current_show_url
+        self.session = SESSION if session is None else session
+        self.max_age = max_age
+        self.cache = cache
+        self.on_change = on_change
+        self._validators: dict[str, str] = {}
+        self.timeline = ShowTimeline()
+
+        # start with the cached timeline, it gets revalidated on first use
+        cached = cache.load() if cache is not None else None
+        if cached is not None:
+            self.timeline, self._validators = cached
 
         self.show = Show()
         self.showtz = pytz.timezone(zone="UTC")
 
+        self._lock = Lock()
+        self._refresh: Thread | None = None
+        self._retry_at = 0.0
+        self._updated = -math.inf
+
+    @property
+    def stale(self: Self) -> bool:
+        """Return True if the show info wasn't revalidated within ``max_age``."""
+        return time.monotonic() - self._updated > self.max_age
+
     def get_show_info(self: Self, *, force_update: bool = False) -> Show:
-        """Return a Show object."""
+        """Return the freshest Show without waiting for LibreTime.
+
+        Forced updates and updates of expired or stale show info run in the
+        background, the last known show is returned until they finished.
+        """
         if force_update:
-            self.update()
-        else:
-            self.lazy_update()
+            self.revalidate(force=True)
+        self.lazy_update()
 
         return self.show
 
     def lazy_update(self: Self) -> None:
-        """Only update the info if we expect that a new show has started."""
-        if datetime.datetime.now(pytz.timezone("UTC")) > self.show.endtime:
-            logger.info("Show expired, going to update show info")
-            self.update()
+        """Only update the info if we expect that a new show has started.
 
+        Shows that start according to the timeline are picked up without
+        asking LibreTime, it only gets asked in the background once the
+        timeline runs out or is older than ``max_age``.
+        """
+        now = datetime.datetime.now(pytz.timezone("UTC"))
+        with self._lock:
+            expired = now > self.show.endtime
+            if expired:
+                show = self.__resolve_show(now)
+                if show is not None:
+                    logger.info(
+                        'Show "%s" started according to the timeline',
+                        show.name,
+                    )
+                    self.show = show
+                    expired = False
+                else:
+                    # serve the default show information until updated
+                    self.show = self.__default_show(now, self.timeline)
+
+        if expired:
+            logger.info("Show expired, going to update show info")
+            self.revalidate()
+        elif self.stale:
+            logger.warning("Show info is stale, going to update show info")
+            self.revalidate()
         else:
             logger.debug("Show still running, won't update show info")
 
+    def revalidate(self: Self, *, force: bool = False) -> None:
+        """Update the show info in a background thread.
+
+        Nothing happens while an update is running. Unless forced, updates
+        happen at most every few seconds so a failing LibreTime doesn't get
+        hammered.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._refresh is not None and self._refresh.is_alive():
+                return
+            if not force and now < self._retry_at:
+                return
+            self._retry_at = now + self.__DEFAULT_SHOW_DURATION
+            self._refresh = Thread(
+                target=self.__refresh,
+                name="ShowClient",
+                daemon=True,
+            )
+            self._refresh.start()
+
+    def __refresh(self: Self) -> None:
+        try:
+            self.update()
+        except Exception:
+            logger.exception(_EXCEPTION_SHOWCLIENT_NO_SHOW)
+
     def update(self: Self) -> None:
-        """Update state."""
-        self.show = Show()  # Create a new show object
+        """Update state.
 
-        # Set the show's default end time to now + 30 seconds to prevent updates
-        # happening every second and hammering the web service if something
-        # goes wrong later.
-        self.show.set_endtime(
-            datetime.datetime.now(pytz.timezone("UTC"))
-            + datetime.timedelta(seconds=self.__DEFAULT_SHOW_DURATION),
-        )
+        The last known show and timeline are kept if LibreTime can't be
+        reached or sends invalid show information.
+        """
+        now = datetime.datetime.now(pytz.timezone("UTC"))
 
+        started = time.perf_counter()
         try:
             # try to get the current show informations from loopy's cast web
             # service
-            data = requests.get(self.current_show_url, timeout=60).json()
+            response = self.session.get(
+                self.current_show_url,
+                headers=self._validators,
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+            )
+            not_modified = response.status_code == HTTPStatus.NOT_MODIFIED
+            data = None if not_modified else response.json()
 
             logger.debug("Got show info: %s", data)
 
         except Exception:
+            _LOOKUP_FAILURES.inc()
             logger.exception(_EXCEPTION_SHOWCLIENT_NO_SHOW)
             # ignoring missing show update
             return
+        finally:
+            _LOOKUP_DURATION.observe(time.perf_counter() - started)
+
+        if data is None:
+            self.__reuse_timeline(now)
+            return
 
         self.showtz = pytz.timezone(zone=data["station"]["timezone"])
 
+        # parse the upcoming shows so show changes can be resolved locally
+        next_shows = self.__parse_next_shows(data)
+
         # pick the current show
         show_data = self.__pick_current_show(data)
 
         if not show_data:
             logger.warning("Failed to find a current or upcoming show, bailing out.")
+            timeline = ShowTimeline(next_shows)
+            self.__publish(response, timeline, self.__default_show(now, timeline))
             return
 
+        show = Show()
+        self.__parse_show(show_data, show)
+
+        # Check if the endtime is in the past
+        # This prevents stale (wrong) show informations from beeing pushed to
+        # the live stream and stops hammering the service every second
+        if show.endtime < datetime.datetime.now(pytz.timezone("UTC")):
+            logger.error("Show endtime %s is in the past", show.endtime)
+
+            raise ShowClientError(  # noqa: TRY003
+                f"Show end time ({show.endtime}) is in the past",  # noqa: EM102
+            )
+
+        logger.info(
+            'Show "%s" started and runs from %s till %s',
+            show.name,
+            show.starttime,
+            show.endtime,
+        )
+        logger.debug(show)
+        timeline = ShowTimeline(
+            [show, *(s for s in next_shows if s.starttime >= show.endtime)],
+        )
+        self.__publish(response, timeline, show)
+
+    def __parse_show(self: Self, show_data: dict[str, str], show: Show) -> None:
+        """Set the name, start and end time and URL of a show from LibreTime."""
         # get the name of the show, aka real_name
         # ex.: Stereo Freeze
         real_name = show_data["name"]
@@ -104,7 +301,7 @@ class ShowClient:
             raise ShowClientError(_EXCEPTION_SHOWCLIENT_NO_NAME)
 
         real_name = self.__cleanup_show_name(real_name)
-        self.show.set_name(real_name)
+        show.set_name(real_name)
 
         # get the show's end time in order to time the next lookup.
         # ex.: 2012-04-28 19:00:00 (missing a tzoffset and localized!)
@@ -121,7 +318,7 @@ class ShowClient:
         )
 
         # store as UTC datetime object
-        self.show.set_endtime(endtime.astimezone(pytz.timezone("UTC")))
+        show.set_endtime(endtime.astimezone(pytz.timezone("UTC")))
 
         # get the show's start time
         # ex.: 2012-04-28 18:00:00
@@ -139,17 +336,7 @@ class ShowClient:
         )
 
         # store as UTC datetime object
-        self.show.set_starttime(starttime.astimezone(pytz.timezone("UTC")))
-
-        # Check if the endtime is in the past
-        # This prevents stale (wrong) show informations from beeing pushed to
-        # the live stream and stops hammering the service every second
-        if self.show.endtime < datetime.datetime.now(pytz.timezone("UTC")):
-            logger.error("Show endtime %s is in the past", self.show.endtime)
-
-            raise ShowClientError(  # noqa: TRY003
-                f"Show end time ({self.show.endtime}) is in the past",  # noqa: EM102
-            )
+        show.set_starttime(starttime.astimezone(pytz.timezone("UTC")))
 
         # get the show's URL
         # ex.: http://www.rabe.ch/sendungen/entertainment/onda-libera.html
@@ -158,15 +345,108 @@ class ShowClient:
         if len(url) == 0:
             logger.error("No url found")
         else:
-            self.show.set_url(url)
+            show.set_url(url)
 
-        logger.info(
-            'Show "%s" started and runs from %s till %s',
-            self.show.name,
-            starttime,
-            endtime,
+    def __parse_next_shows(self: Self, data: dict[str, dict]) -> list[Show]:
+        """Parse the upcoming shows, skipping the ones that are incomplete."""
+        shows = []
+        for show_data in data["shows"]["next"] or []:
+            show = Show()
+            try:
+                self.__parse_show(show_data, show)
+            except (ShowClientError, KeyError, TypeError, ValueError):
+                logger.warning("Skipping incomplete upcoming show: %s", show_data)
+                continue
+            shows.append(show)
+        return shows
+
+    def __publish(
+        self: Self,
+        response: requests.Response,
+        timeline: ShowTimeline,
+        show: Show,
+    ) -> None:
+        """Serve a show and timeline and remember the validators they came with."""
+        validators = {}
+        if etag := response.headers.get("ETag"):
+            validators["If-None-Match"] = etag
+        if last_modified := response.headers.get("Last-Modified"):
+            validators["If-Modified-Since"] = last_modified
+        with self._lock:
+            previous = self.show
+            if (show.name, show.starttime, show.endtime) == (
+                previous.name,
+                previous.starttime,
+                previous.endtime,
+            ):
+                # same show as before, keep it from being announced again
+                show.uuid = previous.uuid
+            self._validators = validators
+            self.timeline = timeline
+            self.show = show
+            self._updated = time.monotonic()
+        show_updated()
+        if self.cache is not None:
+            self.cache.save(timeline, validators)
+        self.__notify(previous, show)
+
+    def __notify(self: Self, previous: Show, show: Show) -> None:
+        """Call ``on_change`` if an update replaced the show."""
+        if self.on_change is not None and show.uuid != previous.uuid:
+            self.on_change()
+
+    def __resolve_show(self: Self, now: datetime.datetime) -> Show | None:
+        """Return the current show or the next one if it starts soon."""
+        show = self.timeline.at(now)
+        if show is None:
+            show = self.timeline.next(now)
+            if show is None or show.starttime >= now + self.__NEXT_SHOW_LEAD:
+                return None
+        return show
+
+    def __default_show(
+        self: Self,
+        now: datetime.datetime,
+        timeline: ShowTimeline,
+    ) -> Show:
+        """Return a show without information that lasts until the next update."""
+        show = Show()
+
+        # Set the show's default end time to now + 3 seconds to prevent updates
+        # happening every second and hammering the web service if something
+        # goes wrong.
+        show.set_endtime(
+            now + datetime.timedelta(seconds=self.__DEFAULT_SHOW_DURATION),
         )
-        logger.debug(self.show)
+
+        # don't update again until the next show in the timeline gets picked
+        upcoming = timeline.next(now)
+        if upcoming is not None:
+            wake = upcoming.starttime - self.__NEXT_SHOW_LEAD
+            if wake > show.endtime:
+                logger.info(
+                    'Waiting for "%s" starting at %s',
+                    upcoming.name,
+                    upcoming.starttime,
+                )
+                show.set_endtime(wake)
+        return show
+
+    def __reuse_timeline(self: Self, now: datetime.datetime) -> None:
+        """Use the timeline after LibreTime answered with 304 Not Modified."""
+        _LOOKUP_NOT_MODIFIED.inc()
+        with self._lock:
+            show = self.__resolve_show(now)
+            if show is None:
+                logger.warning("No current show in the timeline, bailing out.")
+                show = self.__default_show(now, self.timeline)
+            else:
+                logger.debug("Show info not modified, reusing %s", show)
+            previous = self.show
+            self.show = show
+            self._updated = time.monotonic()
+        show_updated()
+        self.__notify(previous, show)
 
     def __cleanup_show_name(self: Self, name: str) -> str:
         """Cleanup name by undoing htmlspecialchars from libretime zf1 mvc."""
@@ -204,9 +484,13 @@ class ShowClient:
                     ),
                 )
                 logger.warning(next_start)
-                if next_start < datetime.datetime.now(
-                    pytz.timezone("UTC"),
-                ) + datetime.timedelta(minutes=15):
+                if (
+                    next_start
+                    < datetime.datetime.now(
+                        pytz.timezone("UTC"),
+                    )
+                    + self.__NEXT_SHOW_LEAD
+                ):
                     logger.info("Next show starts soon enough, using it")
                     return show
             return None
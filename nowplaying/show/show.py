@@ -4,7 +4,7 @@ import datetime
 import logging
 import logging.handlers
 import uuid
-from typing import Self
+from typing import Any, Self
 
 import pytz
 
@@ -67,6 +67,27 @@ class Show:
         # The show's end time as a datetime object
         self.endtime = endtime
 
+    def to_dict(self: Self) -> dict[str, Any]:
+        """Return Show as a dict of JSON serializable values."""
+        return {
+            "uuid": self.uuid,
+            "name": self.name,
+            "url": self.url,
+            "starttime": self.starttime.isoformat(),
+            "endtime": self.endtime.isoformat(),
+        }
+
+    @classmethod
+    def from_dict(cls: type[Self], data: dict[str, Any]) -> Self:
+        """Create Show from the output of :meth:`to_dict`."""
+        show = cls()
+        show.uuid = data["uuid"]
+        show.set_name(data["name"])
+        show.set_url(data["url"])
+        show.set_starttime(datetime.datetime.fromisoformat(data["starttime"]))
+        show.set_endtime(datetime.datetime.fromisoformat(data["endtime"]))
+        return show
+
     def __str__(self: Self) -> str:
         """Stringify Show."""
         return (
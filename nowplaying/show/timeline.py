@@ -0,0 +1,52 @@
+"""Timeline of the shows LibreTime scheduled."""
+
+from __future__ import annotations
+
+import bisect
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:  # pragma: no cover
+    import datetime
+    from collections.abc import Iterable, Iterator
+
+    from .show import Show
+
+
+class ShowTimeline:
+    """Shows sorted by start time.
+
+    Show changes get resolved by binary search on the start times so the
+    schedule only needs to be fetched once for all the shows it contains.
+
+    >>> import datetime
+    >>> timeline = ShowTimeline()
+    >>> timeline.at(datetime.datetime.now(datetime.UTC)) is None
+    True
+    """
+
+    def __init__(self: Self, shows: Iterable[Show] = ()) -> None:
+        """Create ShowTimeline."""
+        self._shows = sorted(shows, key=lambda show: show.starttime)
+        self._starttimes = [show.starttime for show in self._shows]
+
+    def __len__(self: Self) -> int:
+        """Return the number of shows in the timeline."""
+        return len(self._shows)
+
+    def __iter__(self: Self) -> Iterator[Show]:
+        """Iterate over the shows in the order they start."""
+        return iter(self._shows)
+
+    def at(self: Self, when: datetime.datetime) -> Show | None:
+        """Return the show running at ``when`` if there is one."""
+        index = bisect.bisect_right(self._starttimes, when) - 1
+        if index >= 0 and when < self._shows[index].endtime:
+            return self._shows[index]
+        return None
+
+    def next(self: Self, when: datetime.datetime) -> Show | None:
+        """Return the first show starting after ``when`` if there is one."""
+        index = bisect.bisect_right(self._starttimes, when)
+        if index < len(self._shows):
+            return self._shows[index]
+        return None
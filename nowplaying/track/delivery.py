@@ -0,0 +1,342 @@
+"""Per observer delivery of track events."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future
+from threading import Condition, Thread
+from typing import TYPE_CHECKING, Any, Self
+
+from opentelemetry import context, metrics, trace
+
+from nowplaying.health import observer_delivered
+from nowplaying.metrics import REGISTRY
+from nowplaying.runtime import call_sync
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Coroutine
+
+    from opentelemetry.context import Context
+
+    from nowplaying.runtime import AsyncRuntime
+
+    from .latency import LatencyTracker
+    from .observers.base import TrackObserver
+    from .retry import RetryPolicy
+    from .track import Track
+
+logger = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+meter = metrics.get_meter(__name__)
+
+_EXCEPTION_DELIVERY_ERROR = {
+    "track_started": "Observer failed to start track",
+    "track_finished": "Observer failed to finish track",
+}
+
+"""Max number of events waiting for delivery to a single observer."""
+DEFAULT_QUEUE_SIZE = 4
+
+_DELIVERY_DURATION = REGISTRY.histogram(
+    "nowplaying_observer_delivery_duration_seconds",
+    "Time observers took to handle track events, including retries.",
+    ("observer", "hook"),
+)
+_OTEL_DELIVERY_DURATION = meter.create_histogram(
+    "nowplaying.observer.delivery.duration",
+    unit="s",
+    description="Time observers took to handle track events, including retries.",
+)
+_DELIVERIES = REGISTRY.counter(
+    "nowplaying_observer_deliveries_total",
+    "Track events handled by observers by their outcome.",
+    ("observer", "endpoint", "hook", "status"),
+)
+
+
+def observer_label(observer: TrackObserver) -> str:
+    """Return the name and endpoint that tell observers of the same kind apart."""
+    endpoint = observer.get_endpoint()
+    return f"{observer.get_name()} {endpoint}" if endpoint else observer.get_name()
+
+
+class DeliveryResult:
+    """Outcome of sending a track event to one observer."""
+
+    def __init__(  # noqa: PLR0913
+        self: Self,
+        observer: TrackObserver,
+        duration: float,
+        *,
+        ok: bool,
+        timed_out: bool = False,
+        superseded: bool = False,
+        error: BaseException | None = None,
+        attempts: int = 1,
+    ) -> None:
+        """Create DeliveryResult."""
+        self.name = observer.get_name()
+        self.endpoint = observer.get_endpoint()
+        self.duration = duration
+        self.ok = ok
+        self.timed_out = timed_out
+        self.superseded = superseded
+        self.error = error
+        self.attempts = attempts
+
+    @property
+    def status(self: Self) -> str:
+        """Return a short status for logging."""
+        if self.ok:
+            return "ok"
+        if self.timed_out:
+            return "timeout"
+        if self.superseded:
+            return "superseded"
+        return "failed"
+
+    def __str__(self: Self) -> str:
+        """Stringify DeliveryResult."""
+        return f"{self.name} {self.endpoint} {self.status} in {self.duration:.3f}s"
+
+
+class DeliveryWorker:
+    """Deliver track events to a single observer from its own thread.
+
+    Events wait in a small queue while the observer is busy. A new track-started
+    event supersedes everything still waiting so a slow observer only ever
+    catches up with the newest track instead of replaying stale ones.
+
+    With a :class:`RetryPolicy` failed deliveries get retried until they
+    succeed, the policy gives up or a newer track arrives.
+
+    With a :class:`LatencyTracker` successful track-started deliveries get
+    recorded against the time of the event that announced the track.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self: Self,
+        observer: TrackObserver,
+        timeout: float,
+        runtime: AsyncRuntime | None = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        retry_policy: RetryPolicy | None = None,
+        latency: LatencyTracker | None = None,
+    ) -> None:
+        """Create DeliveryWorker and start its thread."""
+        self.observer = observer
+        self.label = observer_label(observer)
+        self.timeout = timeout
+        self.retry_policy = retry_policy
+        self.latency = latency
+        self._runtime = runtime
+        self._queue_size = queue_size
+        self._pending: deque[
+            tuple[str, Track, float, Future[DeliveryResult], Context]
+        ] = deque()
+        self._condition = Condition()
+        self._running = True
+        self._thread = Thread(
+            target=self._run,
+            name=f"nowplaying-delivery-{observer.get_name()}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def submit(self: Self, hook: str, track: Track) -> Future[DeliveryResult]:
+        """Queue an event for delivery and return a future for its result."""
+        future: Future[DeliveryResult] = Future()
+        with self._condition:
+            if hook == "track_started":
+                self._drop_pending()
+            elif len(self._pending) >= self._queue_size:
+                self._drop(self._pending.popleft())
+            # deliveries continue the trace of the event that caused them
+            self._pending.append(
+                (hook, track, time.monotonic(), future, context.get_current()),
+            )
+            self._condition.notify()
+        return future
+
+    def stop(self: Self) -> None:
+        """Stop the worker once the current delivery is done."""
+        with self._condition:
+            self._running = False
+            self._drop_pending()
+            self._condition.notify()
+
+    def _drop_pending(self: Self) -> None:
+        while self._pending:
+            self._drop(self._pending.popleft())
+
+    def _drop(
+        self: Self,
+        item: tuple[str, Track, float, Future[DeliveryResult], Context],
+    ) -> None:
+        hook, track, queued, future, _ = item
+        logger.info(
+            "Dropping superseded %s event for observer %s: %s",
+            hook,
+            self.observer.get_name(),
+            track,
+        )
+        result = DeliveryResult(
+            self.observer,
+            time.monotonic() - queued,
+            ok=False,
+            superseded=True,
+        )
+        self._record(hook, result, delivered=False)
+        future.set_result(result)
+
+    def _record(
+        self: Self, hook: str, result: DeliveryResult, *, delivered: bool
+    ) -> None:
+        observer = type(self.observer).__name__
+        if result.ok:
+            observer_delivered(self.label)
+        if delivered:
+            _DELIVERY_DURATION.observe(result.duration, observer=observer, hook=hook)
+            _OTEL_DELIVERY_DURATION.record(
+                result.duration,
+                {"observer": observer, "hook": hook, "status": result.status},
+            )
+        _DELIVERIES.inc(
+            observer=observer,
+            endpoint=result.endpoint,
+            hook=hook,
+            status=result.status,
+        )
+
+    def _run(self: Self) -> None:
+        while True:
+            with self._condition:
+                while self._running and not self._pending:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                hook, track, _, future, trace_context = self._pending.popleft()
+            token = context.attach(trace_context)
+            try:
+                future.set_result(self.deliver(hook, track))
+            finally:
+                context.detach(token)
+
+    def deliver(self: Self, hook: str, track: Track) -> DeliveryResult:
+        """Call the observer right away and retry according to the policy."""
+        observer = type(self.observer).__name__
+        with tracer.start_as_current_span(
+            f"{observer}.{hook}",
+            attributes={
+                "nowplaying.observer": observer,
+                "nowplaying.observer.endpoint": self.observer.get_endpoint(),
+            },
+        ) as span:
+            result = self._deliver(hook, track)
+            span.set_attribute("nowplaying.delivery.status", result.status)
+            span.set_attribute("nowplaying.delivery.attempts", result.attempts)
+            if not result.ok:
+                span.set_status(trace.StatusCode.ERROR, result.status)
+        self._record(hook, result, delivered=True)
+        if self.latency is not None and result.ok and hook == "track_started":
+            self.latency.track_delivered(self.label, track)
+        return result
+
+    def _deliver(self: Self, hook: str, track: Track) -> DeliveryResult:
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            result = self._attempt(hook, track, started, attempt)
+            if result.ok or self.retry_policy is None:
+                return result
+            delay = self.retry_policy.delay(attempt)
+            if not self.retry_policy.should_retry(
+                attempt,
+                time.monotonic() - started,
+                delay,
+            ):
+                return result
+            logger.info(
+                "Retrying %s event for observer %s in %.2fs after attempt %i",
+                hook,
+                self.observer.get_name(),
+                delay,
+                attempt,
+            )
+            if self._wait_for_retry(delay):
+                logger.info(
+                    "Cancelling retry of %s event for observer %s, newer track",
+                    hook,
+                    self.observer.get_name(),
+                )
+                return DeliveryResult(
+                    self.observer,
+                    time.monotonic() - started,
+                    ok=False,
+                    superseded=True,
+                    error=result.error,
+                    attempts=attempt,
+                )
+            attempt += 1
+
+    def _wait_for_retry(self: Self, delay: float) -> bool:
+        """Wait before retrying and return True if a newer track arrived."""
+        with self._condition:
+            return self._condition.wait_for(self._has_newer_track, timeout=delay)
+
+    def _has_newer_track(self: Self) -> bool:
+        return not self._running or any(
+            hook == "track_started" for hook, *_ in self._pending
+        )
+
+    def _attempt(
+        self: Self,
+        hook: str,
+        track: Track,
+        started: float,
+        attempt: int,
+    ) -> DeliveryResult:
+        logger.debug("Sending %s event to observer %s", hook, self.observer.__class__)
+        method = getattr(self.observer, hook)
+        try:
+            if inspect.iscoroutinefunction(method):
+                call_sync(
+                    _wait_for,
+                    method(track),
+                    self.timeout,
+                    runtime=self._runtime,
+                )
+            else:
+                method(track)
+        except TimeoutError as error:
+            return DeliveryResult(
+                self.observer,
+                time.monotonic() - started,
+                ok=False,
+                timed_out=True,
+                error=error,
+                attempts=attempt,
+            )
+        except Exception as error:
+            logger.exception(_EXCEPTION_DELIVERY_ERROR[hook])
+            return DeliveryResult(
+                self.observer,
+                time.monotonic() - started,
+                ok=False,
+                error=error,
+                attempts=attempt,
+            )
+        return DeliveryResult(
+            self.observer,
+            time.monotonic() - started,
+            ok=True,
+            attempts=attempt,
+        )
+
+
+async def _wait_for(coro: Coroutine[Any, Any, Any], timeout: float) -> None:
+    await asyncio.wait_for(coro, timeout)
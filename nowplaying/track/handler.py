@@ -2,78 +2,247 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import logging.handlers
+import time
+from functools import partial
 from typing import TYPE_CHECKING, Self
 
+from .delivery import DEFAULT_QUEUE_SIZE, DeliveryResult, DeliveryWorker
+
 if TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Future
+
+    from nowplaying.runtime import AsyncRuntime
+
+    from .latency import LatencyTracker
     from .observers.base import TrackObserver
+    from .outbox import Outbox
+    from .retry import RetryPolicy
     from .track import Track
 
 
 logger = logging.getLogger(__name__)
 
-_EXCEPTION_TRACK_HANDLER_ERROR_START = "Observer failed to start track"
-_EXCEPTION_TRACK_HANDLER_ERROR_FINISH = "Observer failed to finish track"
+"""Seconds an observer gets to handle an event unless it sets its own timeout."""
+DEFAULT_OBSERVER_TIMEOUT = 30.0
 
 
 class TrackEventHandler:
     """Inform all registered track-event observers about a track change.
 
     This is the subject of the classical observer pattern
+
+    Every observer has its own :class:`DeliveryWorker` so all observers get
+    called concurrently and a backlogged observer never holds up the others.
+    Each observer has its own deadline. The handler stops waiting for slow
+    observers once their deadline passed and they catch up with the newest
+    track in the background.
+
+    Observers that set :attr:`TrackObserver.retry` get failed deliveries
+    retried according to the handler's :class:`RetryPolicy`.
+
+    With an :class:`Outbox` every track-started delivery gets recorded until it
+    succeeded so :meth:`replay_outbox` can catch up after a restart.
+
+    With a :class:`LatencyTracker` every delivered track-started event records
+    how long after the event announcing the track it was delivered.
+
+    Observers may implement their hooks as coroutines. If the handler has an
+    :class:`AsyncRuntime` these get awaited on its event loop.
     """
 
-    def __init__(self: Self) -> None:
+    def __init__(  # noqa: PLR0913
+        self: Self,
+        runtime: AsyncRuntime | None = None,
+        timeout: float = DEFAULT_OBSERVER_TIMEOUT,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        retry_policy: RetryPolicy | None = None,
+        outbox: Outbox | None = None,
+        latency: LatencyTracker | None = None,
+    ) -> None:
         """Initialize the track event handler."""
         self.__observers: list[TrackObserver] = []
+        self.__workers: dict[TrackObserver, DeliveryWorker] = {}
+        self._runtime = runtime
+        self._timeout = timeout
+        self._queue_size = queue_size
+        self._retry_policy = retry_policy
+        self._outbox = outbox
+        self._latency = latency
 
     def register_observer(self: Self, observer: TrackObserver) -> None:
         """Register an observer to be informed about track changes."""
         logger.info("Registering TrackObserver '%s'", observer.__class__.__name__)
         self.__observers.append(observer)
+        self.__workers[observer] = DeliveryWorker(
+            observer,
+            timeout=self.get_timeout(observer),
+            runtime=self._runtime,
+            queue_size=self._queue_size,
+            retry_policy=self._retry_policy if observer.retry else None,
+            latency=self._latency,
+        )
 
     def remove_observer(self: Self, observer: TrackObserver) -> None:
         """Remove an observer from the list of observers."""
         self.__observers.remove(observer)
+        self.__workers.pop(observer).stop()
 
     def get_observers(self: Self) -> list:
         """Return register observers to allow inspecting them."""
         return self.__observers
 
-    def track_started(self: Self, track: Track) -> None:
+    def get_timeout(self: Self, observer: TrackObserver) -> float:
+        """Return how many seconds an observer gets to handle an event."""
+        return observer.timeout or self._timeout
+
+    def track_started(self: Self, track: Track) -> list[DeliveryResult]:
         """Inform all registered track-event observers about a track started event."""
-        logger.info(
-            "Sending track-started event to %s observers: %s",
-            len(self.__observers),
-            track,
-        )
+        return self._dispatch("track_started", track)
 
-        for observer in self.__observers:
-            logger.debug(
-                "Sending track-started event to observer %s",
-                observer.__class__,
-            )
+    def track_finished(self: Self, track: Track) -> list[DeliveryResult]:
+        """Inform all registered track-event observers about a track finished event."""
+        return self._dispatch("track_finished", track)
 
-            try:
-                observer.track_started(track)
-            except Exception:
-                logger.exception(_EXCEPTION_TRACK_HANDLER_ERROR_START)
+    async def track_started_async(self: Self, track: Track) -> list[DeliveryResult]:
+        """Inform all observers about a track started event from an event loop."""
+        return await self._dispatch_async("track_started", track)
 
-    def track_finished(self: Self, track: Track) -> None:
-        """Inform all registered track-event observers about a track finished event."""
+    async def track_finished_async(self: Self, track: Track) -> list[DeliveryResult]:
+        """Inform all observers about a track finished event from an event loop."""
+        return await self._dispatch_async("track_finished", track)
+
+    def _submit(
+        self: Self,
+        hook: str,
+        track: Track,
+    ) -> list[tuple[TrackObserver, Future[DeliveryResult]]]:
         logger.info(
-            "Sending track-finished event to %s observers: %s",
+            "Sending %s event to %s observers: %s",
+            hook.replace("_", "-"),
             len(self.__observers),
             track,
         )
-
+        return [
+            (observer, self._submit_to(observer, hook, track))
+            for observer in self.__observers
+        ]
+
+    def _submit_to(
+        self: Self,
+        observer: TrackObserver,
+        hook: str,
+        track: Track,
+    ) -> Future[DeliveryResult]:
+        if self._outbox is None or hook != "track_started":
+            return self.__workers[observer].submit(hook, track)
+        delivery_id = self._outbox.add(_outbox_key(observer), track)
+        future = self.__workers[observer].submit(hook, track)
+        future.add_done_callback(partial(self._mark_done, delivery_id))
+        return future
+
+    def _mark_done(
+        self: Self,
+        delivery_id: int,
+        future: Future[DeliveryResult],
+    ) -> None:
+        if self._outbox is not None and future.result().ok:
+            self._outbox.done(delivery_id)
+
+    def replay_outbox(self: Self) -> None:
+        """Deliver tracks that observers missed before the last restart."""
+        if self._outbox is None:
+            return
         for observer in self.__observers:
-            logger.debug(
-                "Sending track-finished event to observer %s",
-                observer.__class__,
+            track = self._outbox.pending(_outbox_key(observer))
+            if track is None:
+                continue
+            logger.info(
+                "Replaying track-started event to observer %s: %s",
+                observer.get_name(),
+                track,
             )
-
-            try:
-                observer.track_finished(track)
-            except Exception:
-                logger.exception(_EXCEPTION_TRACK_HANDLER_ERROR_FINISH)
+            self._submit_to(observer, "track_started", track)
+
+    def _dispatch(self: Self, hook: str, track: Track) -> list[DeliveryResult]:
+        started = time.monotonic()
+        results = [
+            self._wait(observer, started, future)
+            for observer, future in self._submit(hook, track)
+        ]
+        self._log_results(hook, results)
+        return results
+
+    def _wait(
+        self: Self,
+        observer: TrackObserver,
+        started: float,
+        future: Future[DeliveryResult],
+    ) -> DeliveryResult:
+        remaining = started + self.get_timeout(observer) - time.monotonic()
+        try:
+            return future.result(timeout=max(remaining, 0))
+        except TimeoutError as error:
+            return _timed_out(observer, started, error)
+
+    async def _dispatch_async(
+        self: Self,
+        hook: str,
+        track: Track,
+    ) -> list[DeliveryResult]:
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(
+                self._wait_async(observer, started, future)
+                for observer, future in self._submit(hook, track)
+            ),
+        )
+        self._log_results(hook, results)
+        return results
+
+    async def _wait_async(
+        self: Self,
+        observer: TrackObserver,
+        started: float,
+        future: Future[DeliveryResult],
+    ) -> DeliveryResult:
+        remaining = started + self.get_timeout(observer) - time.monotonic()
+        try:
+            # shield the delivery so giving up on waiting does not cancel it
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)),
+                max(remaining, 0),
+            )
+        except TimeoutError as error:
+            return _timed_out(observer, started, error)
+
+    def _log_results(self: Self, hook: str, results: list[DeliveryResult]) -> None:
+        for result in results:
+            if result.timed_out:
+                logger.warning(
+                    "Observer %s did not finish %s within its deadline",
+                    result,
+                    hook,
+                )
+            else:
+                logger.debug("Observer %s", result)
+
+
+def _outbox_key(observer: TrackObserver) -> str:
+    return f"{observer.get_name()} {observer.get_endpoint()}"
+
+
+def _timed_out(
+    observer: TrackObserver,
+    started: float,
+    error: TimeoutError,
+) -> DeliveryResult:
+    return DeliveryResult(
+        observer,
+        time.monotonic() - started,
+        ok=False,
+        timed_out=True,
+        error=error,
+    )
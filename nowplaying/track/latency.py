@@ -0,0 +1,141 @@
+"""Track how long it takes until a started track is on air everywhere."""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import math
+import time
+from collections import deque
+from threading import Lock
+from typing import TYPE_CHECKING, Self
+
+from nowplaying.metrics import REGISTRY
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .track import Track
+
+logger = logging.getLogger(__name__)
+
+"""Default latency objective in seconds."""
+DEFAULT_OBJECTIVE = 10.0
+
+"""Default percentile of deliveries that must meet the objective."""
+DEFAULT_PERCENTILE = 99.0
+
+"""Default seconds of deliveries the percentiles are computed over."""
+DEFAULT_WINDOW = 3600.0
+
+"""Percentiles reported in summaries."""
+PERCENTILES = (50.0, 90.0, 99.0)
+
+_LATENCY = REGISTRY.histogram(
+    "nowplaying_track_latency_seconds",
+    "Time from the event announcing a track until an observer delivered it.",
+    ("observer",),
+)
+_BREACHED = REGISTRY.gauge(
+    "nowplaying_track_latency_slo_breached",
+    "1 if an observer currently misses the latency objective.",
+    ("observer",),
+)
+
+
+class LatencyTracker:
+    """Record end-to-end latencies per observer over a sliding window.
+
+    The latency of a delivery is the time between the CloudEvent that
+    announced the track and the moment the observer finished delivering it.
+    Tracks that didn't come from an event, like the ones of shows without
+    track information or outbox replays, aren't recorded.
+
+    An observer misses the objective while the configured percentile of its
+    latencies within the window is above ``objective`` seconds, this gets
+    logged once when it starts and ends.
+
+    >>> tracker = LatencyTracker(objective=1.0, percentile=50.0)
+    >>> tracker.record("Ticker", 0.5, now=0.0)
+    >>> tracker.summary(now=0.0)["Ticker"]["p50"]
+    0.5
+    """
+
+    def __init__(
+        self: Self,
+        objective: float = DEFAULT_OBJECTIVE,
+        percentile: float = DEFAULT_PERCENTILE,
+        window: float = DEFAULT_WINDOW,
+    ) -> None:
+        """Create LatencyTracker."""
+        self.objective = objective
+        self.percentile = percentile
+        self.window = window
+        self._lock = Lock()
+        self._latencies: dict[str, deque[tuple[float, float]]] = {}
+        self._breached: set[str] = set()
+
+    def track_delivered(self: Self, observer: str, track: Track) -> None:
+        """Record that an observer finished delivering a started track."""
+        if track.event_time is None:
+            return
+        latency = datetime.datetime.now(datetime.UTC) - track.event_time
+        self.record(observer, max(latency.total_seconds(), 0.0))
+
+    def record(
+        self: Self,
+        observer: str,
+        latency: float,
+        now: float | None = None,
+    ) -> None:
+        """Record a latency in seconds and check the objective."""
+        now = time.monotonic() if now is None else now
+        _LATENCY.observe(latency, observer=observer)
+        with self._lock:
+            latencies = self._latencies.setdefault(observer, deque())
+            latencies.append((now, latency))
+            self._expire(latencies, now)
+            value = _percentile(sorted(v for _, v in latencies), self.percentile)
+            breached = value > self.objective
+            changed = breached != (observer in self._breached)
+            if breached:
+                self._breached.add(observer)
+            else:
+                self._breached.discard(observer)
+        _BREACHED.set(float(breached), observer=observer)
+        if changed and breached:
+            logger.warning(
+                "Observer %s misses the latency objective, p%g is %.3fs > %.3fs",
+                observer,
+                self.percentile,
+                value,
+                self.objective,
+            )
+        elif changed:
+            logger.info("Observer %s meets the latency objective again", observer)
+
+    def summary(self: Self, now: float | None = None) -> dict[str, dict[str, float]]:
+        """Return latency percentiles of every observer within the window."""
+        now = time.monotonic() if now is None else now
+        summary = {}
+        with self._lock:
+            for observer, latencies in self._latencies.items():
+                self._expire(latencies, now)
+                values = sorted(latency for _, latency in latencies)
+                if not values:
+                    continue
+                summary[observer] = {
+                    "count": len(values),
+                    **{f"p{p:g}": _percentile(values, p) for p in PERCENTILES},
+                    "max": values[-1],
+                    "breached": observer in self._breached,
+                }
+        return summary
+
+    def _expire(self: Self, latencies: deque[tuple[float, float]], now: float) -> None:
+        while latencies and latencies[0][0] < now - self.window:
+            latencies.popleft()
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    """Return the nearest-rank percentile of sorted values."""
+    rank = math.ceil(percentile / 100 * len(values))
+    return values[max(rank, 1) - 1]
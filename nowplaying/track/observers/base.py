@@ -18,6 +18,12 @@ class TrackObserver(ABC):
 
     name = "TrackObserver"
 
+    """Seconds the observer gets per event, None uses the handler's default."""
+    timeout: float | None = None
+
+    """Set to True to have failed deliveries retried, failures must raise."""
+    retry: bool = False
+
     class Options(ABC):
         """Abstract base class for add TrackObserver.Options."""
 
@@ -33,6 +39,10 @@ class TrackObserver(ABC):
         """Get name."""
         return self.name
 
+    def get_endpoint(self: Self) -> str:
+        """Get the endpoint the observer delivers to, if any."""
+        return ""
+
     @abstractmethod
     def track_started(self: Self, track: Track) -> None:  # pragma: no cover
         """Track started."""
@@ -40,3 +50,25 @@ class TrackObserver(ABC):
     @abstractmethod
     def track_finished(self: Self, track: Track) -> None:  # pragma: no cover
         """Track finished."""
+
+
+class AsyncTrackObserver(TrackObserver):
+    """Abstract base class for TrackObservers implemented as coroutines.
+
+    The :class:`TrackEventHandler` awaits these on its event loop instead of
+    running them in a thread.
+    """
+
+    @abstractmethod
+    async def track_started(  # type: ignore[override]
+        self: Self,
+        track: Track,
+    ) -> None:  # pragma: no cover
+        """Track started."""
+
+    @abstractmethod
+    async def track_finished(  # type: ignore[override]
+        self: Self,
+        track: Track,
+    ) -> None:  # pragma: no cover
+        """Track finished."""
@@ -0,0 +1,45 @@
+"""BroadcastTrackObserver feeds the streaming API endpoints."""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import TYPE_CHECKING, Self
+
+from nowplaying.track.observers.base import TrackObserver
+
+if TYPE_CHECKING:  # pragma: no cover
+    from nowplaying.broadcast import Broadcaster
+    from nowplaying.track.track import Track
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastTrackObserver(TrackObserver):
+    """Publish track events and show changes to a :class:`Broadcaster`.
+
+    Tracks get published as ``track_started`` and ``track_finished`` messages.
+    A ``show_changed`` message is published before the first track of a show,
+    shows are told apart by their name and URL since the show client creates
+    a new show object on every update.
+    """
+
+    name = "Broadcast"
+
+    def __init__(self: Self, broadcaster: Broadcaster) -> None:
+        """Create BroadcastTrackObserver."""
+        self.broadcaster = broadcaster
+        self._show: tuple[str, str] | None = None
+
+    def track_started(self: Self, track: Track) -> None:
+        """Publish the track and its show if it changed."""
+        show = getattr(track, "show", None)
+        if show is not None and (show.name, show.url) != self._show:
+            self._show = (show.name, show.url)
+            logger.info("Broadcasting show change to %s", show.name)
+            self.broadcaster.publish("show_changed", json.dumps(show.to_dict()))
+        self.broadcaster.publish("track_started", json.dumps(track.to_dict()))
+
+    def track_finished(self: Self, track: Track) -> None:
+        """Publish the finished track."""
+        self.broadcaster.publish("track_finished", json.dumps(track.to_dict()))
@@ -18,6 +18,7 @@ class DabAudioCompanionTrackObserver(TrackObserver):
     """Update track data in a DAB+ transmission through the 'Audio Companion' API."""
 
     name = "DAB+ Audio Companion"
+    retry = True
 
     class Options(TrackObserver.Options):  # pragma: no coverage
         @classmethod
@@ -52,6 +53,9 @@ class DabAudioCompanionTrackObserver(TrackObserver):
             % (self.base_url, self.dls_enabled),
         )
 
+    def get_endpoint(self):
+        return self.base_url
+
     def track_started(self, track: Track):
         logger.info(f"Updating DAB+ DLS for track: {track.artist} - {track.title}")
         # TODO v3 remove _track_started_plain
@@ -95,9 +99,10 @@ class DabAudioCompanionTrackObserver(TrackObserver):
             f"data: {params} is DL+: {self.last_frame_was_dl_plus}",
         )
 
-        resp = requests.post(self.base_url, params)
+        resp = requests.post(self.base_url, params, timeout=60)
         if resp.status_code != 200:
             logger.error(f"DAB+ Audio Companion API call failed: {resp.text}")
+            resp.raise_for_status()
 
     def _track_started_plain(self, track):
         # TODO v3 remove once we always send DLS with v3
@@ -120,7 +125,9 @@ class DabAudioCompanionTrackObserver(TrackObserver):
 
         logger.info("DAB+ Audio Companion URL: " + update_url)
 
-        urllib.request.urlopen(update_url)
+        # errors propagate so failed updates get retried
+        with urllib.request.urlopen(update_url, timeout=60):
+            pass
 
     def track_finished(self, track):
         return True
@@ -0,0 +1,112 @@
+"""HistoryTrackObserver remembers the last tracks for the /history endpoint."""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+from threading import Lock
+from typing import TYPE_CHECKING, Self
+
+from nowplaying.track.observers.base import TrackObserver
+
+if TYPE_CHECKING:  # pragma: no cover
+    import datetime
+
+    from nowplaying.track.track import Track
+
+logger = logging.getLogger(__name__)
+
+"""Default number of tracks kept in the history."""
+DEFAULT_SIZE = 1000
+
+
+class HistoryTrackObserver(TrackObserver):
+    """Keep the last ``size`` tracks in a fixed-size ring buffer.
+
+    Every track is stored once as its start time and pre-serialized JSON, the
+    buffer is allocated up front so memory use doesn't grow with uptime.
+    Tracks are numbered in the order they started, these numbers serve as
+    cursors for paging back through the history.
+
+    >>> history = HistoryTrackObserver(size=2)
+    >>> history.page()
+    ([], None)
+    """
+
+    name = "History"
+
+    def __init__(self: Self, size: int = DEFAULT_SIZE) -> None:
+        """Create HistoryTrackObserver."""
+        self.size = size
+        self._lock = Lock()
+        self._starttimes: list[float] = [0.0] * size
+        self._records: list[str] = [""] * size
+        self._next = 0
+
+    def __len__(self: Self) -> int:
+        """Return the number of tracks in the history."""
+        return min(self._next, self.size)
+
+    def track_started(self: Self, track: Track) -> None:
+        """Add a track to the history, replacing the oldest one when full."""
+        record = json.dumps(track.to_dict())
+        with self._lock:
+            slot = self._next % self.size
+            # tracks start in order, keep the start times sorted for bisecting
+            previous = self._starttimes[(self._next - 1) % self.size]
+            starttime = track.starttime.timestamp()
+            self._starttimes[slot] = (
+                max(starttime, previous) if self._next else starttime
+            )
+            self._records[slot] = record
+            self._next += 1
+        logger.debug("Added track to history: %s", track)
+
+    def track_finished(self: Self, _: Track) -> None:
+        """Tracks are added to the history when they start."""
+
+    def page(
+        self: Self,
+        limit: int = 20,
+        before: int | None = None,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+    ) -> tuple[list[str], int | None]:
+        """Return a page of tracks, newest first, and the cursor for the next one.
+
+        Tracks that started at or after ``since`` and before ``until`` are
+        found by binary search on their start time, ``before`` is the cursor
+        returned with the previous page.
+        """
+        with self._lock:
+            oldest = max(self._next - self.size, 0)
+            start, end = oldest, self._next
+            view = _StartTimes(self, oldest)
+            if since is not None:
+                start += bisect.bisect_left(view, since.timestamp())
+            if until is not None:
+                end = oldest + bisect.bisect_left(view, until.timestamp())
+            if before is not None:
+                end = min(end, before)
+            first = max(start, end - limit)
+            records = [
+                self._records[number % self.size]
+                for number in range(end - 1, first - 1, -1)
+            ]
+        return records, first if first > start else None
+
+
+class _StartTimes:
+    """Start times of the history in order as a sequence for :mod:`bisect`."""
+
+    def __init__(self: Self, history: HistoryTrackObserver, oldest: int) -> None:
+        self._history = history
+        self._oldest = oldest
+
+    def __len__(self: Self) -> int:
+        return len(self._history)
+
+    def __getitem__(self: Self, index: int) -> float:
+        history = self._history
+        return history._starttimes[(self._oldest + index) % history.size]  # noqa: SLF001
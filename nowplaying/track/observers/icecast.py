@@ -18,13 +18,12 @@ if TYPE_CHECKING:  # pragma: no cover
 
 logger = logging.getLogger(__name__)
 
-_NOWPLAYING_TRACK_EXEPTION = "request failed"
-
 
 class IcecastTrackObserver(TrackObserver):
     """Update track metadata on an icecast mountpoint."""
 
     name = "Icecast"
+    retry = True
 
     class Options(TrackObserver.Options):
         """IcecastTrackObserver options."""
@@ -101,6 +100,10 @@ class IcecastTrackObserver(TrackObserver):
         self.options = options
         logger.info("Icecast URL: %s mount: %s", self.options.url, self.options.mount)
 
+    def get_endpoint(self: Self) -> str:
+        """Get the Icecast URL and mount without credentials."""
+        return f"{self.options.url}?mount={self.options.mount}"
+
     def track_started(self: Self, track: Track) -> None:
         """Track started."""
         logger.info(
@@ -122,15 +125,12 @@ class IcecastTrackObserver(TrackObserver):
             "charset": "utf-8",
             "song": f"{track.artist} - {title}",
         }
-        try:
-            requests.get(
-                self.options.url,
-                auth=(self.options.username, self.options.password),  # type: ignore[arg-type]
-                params=params,
-                timeout=60,
-            )
-        except requests.exceptions.RequestException:
-            logger.exception(_NOWPLAYING_TRACK_EXEPTION)
+        requests.get(
+            self.options.url,
+            auth=(self.options.username, self.options.password),  # type: ignore[arg-type]
+            params=params,
+            timeout=60,
+        ).raise_for_status()
 
         logger.info(
             "Icecast Metadata updated on %s with data: %s",
@@ -26,6 +26,7 @@ class SmcFtpTrackObserver(TrackObserver):
     """Update track metadata for DLS and DL+ to the SMC FTP server."""
 
     name = "SMC FTP"
+    retry = True
 
     class Options(TrackObserver.Options):  # pragma: no coverage
         """Options for SmcFtpTrackObserver."""
@@ -66,6 +67,10 @@ class SmcFtpTrackObserver(TrackObserver):
         """Create SmcFtpTrackObserver."""
         self._options = options
 
+    def get_endpoint(self: Self) -> str:
+        """Get the SMC FTP hostname."""
+        return self._options.hostname
+
     def track_started(self: Self, track: Track) -> None:
         """Track started."""
         logger.info(
@@ -0,0 +1,80 @@
+"""SnapshotTrackObserver keeps the current track ready to be served by the API."""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+from typing import TYPE_CHECKING, Self
+
+import lxml.etree
+
+from nowplaying.track.observers.base import TrackObserver
+from nowplaying.track.observers.ticker import render_ticker
+
+if TYPE_CHECKING:  # pragma: no cover
+    from nowplaying.track.track import Track
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """Immutable pre-rendered representations of a track.
+
+    Every representation is rendered once along with a strong ETag, serving
+    one is a dictionary lookup.
+    """
+
+    """Mimetypes of the available representations, the first is the default."""
+    MIMETYPES = ("application/json", "application/xml", "text/plain")
+
+    def __init__(self: Self, track: Track) -> None:
+        """Render all representations of a track."""
+        self.track = track
+        self.last_modified = datetime.datetime.now(datetime.UTC).replace(microsecond=0)
+        self.representations: dict[str, tuple[bytes, str]] = {}
+        for mimetype, body in (
+            ("application/json", json.dumps(track.to_dict()).encode()),
+            (
+                "application/xml",
+                lxml.etree.tostring(
+                    render_ticker(track),
+                    pretty_print=True,
+                    xml_declaration=True,
+                    encoding="utf-8",
+                ),
+            ),
+            ("text/plain", render_text(track).encode()),
+        ):
+            self.representations[mimetype] = (
+                body,
+                hashlib.sha256(body).hexdigest()[:32],
+            )
+
+
+class SnapshotTrackObserver(TrackObserver):
+    """Keep a snapshot of the current track for the /nowplaying endpoint."""
+
+    name = "Snapshot"
+
+    def __init__(self: Self) -> None:
+        """Create SnapshotTrackObserver."""
+        self.snapshot: Snapshot | None = None
+
+    def track_started(self: Self, track: Track) -> None:
+        """Render and swap in a snapshot of the new track."""
+        # swapping the reference is atomic, readers never see a partial snapshot
+        self.snapshot = Snapshot(track)
+        logger.debug("Updated snapshot for track: %s", track)
+
+    def track_finished(self: Self, _: Track) -> None:
+        """Keep the snapshot until the next track starts."""
+
+
+def render_text(track: Track) -> str:
+    """Render a track as one line of text like Icecast shows it."""
+    title = track.title
+    if track.has_default_title() and track.has_default_artist():
+        title = track.show.name
+    return f"{track.artist} - {title}"
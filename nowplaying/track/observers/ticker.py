@@ -62,6 +62,10 @@ class TickerTrackObserver(TrackObserver):
         )
         self.ticker_file_path = options.file_path
 
+    def get_endpoint(self: Self) -> str:
+        """Get the ticker file path."""
+        return self.ticker_file_path
+
     def track_started(self: Self, track: Track) -> None:
         """Track started."""
         logger.info(
@@ -69,52 +73,7 @@ class TickerTrackObserver(TrackObserver):
             track.artist,
             track.title,
         )
-        try:
-            tz = pytz.timezone("Europe/Zurich")
-        except (
-            pytz.exceptions.UnknownTimeZoneError
-        ):  # pragma: no coverage due to not knowing how to trigger
-            tz = pytz.timezone("UTC")
-
-        now = isodate.datetime_isoformat(datetime.datetime.now(tz))
-
-        MAIN_NAMESPACE = "http://rabe.ch/schema/ticker.xsd"  # noqa: N806
-        XLINK_NAMESPACE = "http://www.w3.org/1999/xlink"  # noqa: N806
-        XLINK = "{%s}" % XLINK_NAMESPACE  # noqa: N806, UP031
-
-        E = lxml.builder.ElementMaker(  # noqa: N806
-            namespace=MAIN_NAMESPACE,
-            nsmap={None: MAIN_NAMESPACE, "xlink": XLINK_NAMESPACE},
-        )
-        show_ref = E.link(track.show.url)
-        show_ref.attrib[XLINK + "type"] = "simple"
-        show_ref.attrib[XLINK + "href"] = track.show.url
-        show_ref.attrib[XLINK + "show"] = "replace"
-
-        ticker = E.ticker(
-            E.identifier(f"ticker-{uuid.uuid4()}"),
-            E.creator("now-playing daemon v2"),
-            E.date(now),
-            E.show(
-                E.name(track.show.name),
-                show_ref,
-                E.startTime(
-                    isodate.datetime_isoformat(track.show.starttime.astimezone(tz)),
-                ),
-                E.endTime(
-                    isodate.datetime_isoformat(track.show.endtime.astimezone(tz)),
-                ),
-                id=track.show.uuid,
-            ),
-            E.track(
-                E.show(track.show.name, ref=track.show.uuid),
-                E.artist(track.artist),
-                E.title(track.title),
-                E.startTime(isodate.datetime_isoformat(track.starttime.astimezone(tz))),
-                E.endTime(isodate.datetime_isoformat(track.endtime.astimezone(tz))),
-                id=track.uuid,
-            ),
-        )
+        ticker = render_ticker(track)
         lxml.etree.ElementTree(ticker).write(
             self.ticker_file_path,
             pretty_print=True,
@@ -124,3 +83,53 @@ class TickerTrackObserver(TrackObserver):
 
     def track_finished(self: Self, _: Track) -> None:
         """Track finished."""
+
+
+def render_ticker(track: Track) -> lxml.etree._Element:
+    """Render the ticker XML document for a track and its show."""
+    try:
+        tz = pytz.timezone("Europe/Zurich")
+    except (
+        pytz.exceptions.UnknownTimeZoneError
+    ):  # pragma: no coverage due to not knowing how to trigger
+        tz = pytz.timezone("UTC")
+
+    now = isodate.datetime_isoformat(datetime.datetime.now(tz))
+
+    MAIN_NAMESPACE = "http://rabe.ch/schema/ticker.xsd"  # noqa: N806
+    XLINK_NAMESPACE = "http://www.w3.org/1999/xlink"  # noqa: N806
+    XLINK = "{%s}" % XLINK_NAMESPACE  # noqa: N806, UP031
+
+    E = lxml.builder.ElementMaker(  # noqa: N806
+        namespace=MAIN_NAMESPACE,
+        nsmap={None: MAIN_NAMESPACE, "xlink": XLINK_NAMESPACE},
+    )
+    show_ref = E.link(track.show.url)
+    show_ref.attrib[XLINK + "type"] = "simple"
+    show_ref.attrib[XLINK + "href"] = track.show.url
+    show_ref.attrib[XLINK + "show"] = "replace"
+
+    return E.ticker(
+        E.identifier(f"ticker-{uuid.uuid4()}"),
+        E.creator("now-playing daemon v2"),
+        E.date(now),
+        E.show(
+            E.name(track.show.name),
+            show_ref,
+            E.startTime(
+                isodate.datetime_isoformat(track.show.starttime.astimezone(tz)),
+            ),
+            E.endTime(
+                isodate.datetime_isoformat(track.show.endtime.astimezone(tz)),
+            ),
+            id=track.show.uuid,
+        ),
+        E.track(
+            E.show(track.show.name, ref=track.show.uuid),
+            E.artist(track.artist),
+            E.title(track.title),
+            E.startTime(isodate.datetime_isoformat(track.starttime.astimezone(tz))),
+            E.endTime(isodate.datetime_isoformat(track.endtime.astimezone(tz))),
+            id=track.uuid,
+        ),
+    )
@@ -0,0 +1,106 @@
+"""Durable outbox for track observer deliveries."""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from threading import Lock
+from typing import Self
+
+from .track import Track
+
+logger = logging.getLogger(__name__)
+
+"""Number of recorded deliveries after which the outbox gets compacted."""
+DEFAULT_COMPACT_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    observer TEXT NOT NULL,
+    track TEXT NOT NULL,
+    created REAL NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+class Outbox:
+    """Record pending track-started deliveries in SQLite to survive restarts.
+
+    Every delivery gets appended before it is handed to an observer and marked
+    as done once the observer succeeded. Only the newest delivery per observer
+    matters, so compaction drops everything else and keeps the database at one
+    row per observer at most. After a restart :meth:`pending` returns the last
+    track an observer did not receive.
+    """
+
+    def __init__(
+        self: Self,
+        path: str,
+        compact_every: int = DEFAULT_COMPACT_EVERY,
+    ) -> None:
+        """Open or create the outbox database."""
+        self._lock = Lock()
+        self._compact_every = compact_every
+        self._since_compact = 0
+        self._db = sqlite3.connect(
+            path,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self.compact()
+
+    def add(self: Self, observer: str, track: Track) -> int:
+        """Record a pending delivery and return its id."""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO deliveries (observer, track, created) VALUES (?, ?, ?)",
+                (observer, json.dumps(track.to_dict()), time.time()),
+            )
+            self._since_compact += 1
+            compact = self._since_compact >= self._compact_every
+        if compact:
+            self.compact()
+        return cursor.lastrowid  # type: ignore[return-value]
+
+    def done(self: Self, delivery_id: int) -> None:
+        """Mark a delivery as successful."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE deliveries SET done = 1 WHERE id = ?",
+                (delivery_id,),
+            )
+
+    def pending(self: Self, observer: str) -> Track | None:
+        """Return the newest track if it was not delivered to the observer."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT track, done FROM deliveries WHERE observer = ? "
+                "ORDER BY id DESC LIMIT 1",
+                (observer,),
+            ).fetchone()
+        if row is None or row[1]:
+            return None
+        return Track.from_dict(json.loads(row[0]))
+
+    def compact(self: Self) -> None:
+        """Drop done and superseded deliveries and truncate the WAL."""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM deliveries WHERE done = 1 OR id NOT IN "
+                "(SELECT MAX(id) FROM deliveries GROUP BY observer)",
+            )
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._since_compact = 0
+        logger.debug("Compacted outbox")
+
+    def close(self: Self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,66 @@
+"""Retry policy for failed track observer deliveries."""
+
+from __future__ import annotations
+
+import random
+from typing import Self
+
+"""Max attempts per delivery including the first one."""
+DEFAULT_RETRY_ATTEMPTS = 3
+
+"""Seconds to wait before the first retry, doubled for each further retry."""
+DEFAULT_RETRY_BACKOFF = 1.0
+
+"""Upper limit in seconds for a single wait between retries."""
+DEFAULT_RETRY_MAX_BACKOFF = 30.0
+
+"""Seconds after which no further retry gets started."""
+DEFAULT_RETRY_BUDGET = 60.0
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for failed deliveries.
+
+    The wait before retry n is up to ``backoff * 2 ** (n - 1)`` seconds, capped
+    at ``max_backoff``. With a jitter of 1.0 the actual wait is picked at random
+    between zero and that limit so retries from several outputs spread out, a
+    jitter of 0.0 always waits the full limit.
+
+    >>> policy = RetryPolicy(backoff=2.0, max_backoff=5.0, jitter=0.0)
+    >>> [policy.delay(attempt) for attempt in (1, 2, 3)]
+    [2.0, 4.0, 5.0]
+
+    No retry is started once the attempts are used up or if waiting for it
+    would exceed the total budget.
+
+    >>> policy.should_retry(attempt=1, elapsed=0.5, delay=2.0)
+    True
+    >>> policy.should_retry(attempt=3, elapsed=0.5, delay=2.0)
+    False
+    >>> RetryPolicy(budget=10.0).should_retry(attempt=1, elapsed=9.0, delay=2.0)
+    False
+    """
+
+    def __init__(
+        self: Self,
+        attempts: int = DEFAULT_RETRY_ATTEMPTS,
+        backoff: float = DEFAULT_RETRY_BACKOFF,
+        max_backoff: float = DEFAULT_RETRY_MAX_BACKOFF,
+        budget: float = DEFAULT_RETRY_BUDGET,
+        jitter: float = 1.0,
+    ) -> None:
+        """Create RetryPolicy."""
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = budget
+        self.jitter = jitter
+
+    def delay(self: Self, attempt: int) -> float:
+        """Return how many seconds to wait after the given failed attempt."""
+        limit = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return limit - random.uniform(0, limit * self.jitter)  # noqa: S311
+
+    def should_retry(self: Self, attempt: int, elapsed: float, delay: float) -> bool:
+        """Return True if another attempt fits into the attempts and budget."""
+        return attempt < self.attempts and elapsed + delay <= self.budget
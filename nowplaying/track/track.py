@@ -4,7 +4,7 @@ import datetime
 import logging
 import logging.handlers
 import uuid
-from typing import Self
+from typing import Any, Self
 
 import pytz
 
@@ -18,6 +18,7 @@ DEFAULT_TITLE = "Livestream"
 _EXCEPTION_TRACK_ERROR_NUMBER_NOT_INT = "track number has to be a positive integer"
 _EXCEPTION_TRACK_ERROR_STARTTIME_NO_DATETIME = "starttime has to be a datetime object"
 _EXCEPTION_TRACK_ERROR_ENDTIME_NO_DATETIME = "endtime has to be a datetime object"
+_EXCEPTION_TRACK_ERROR_EVENT_TIME_NO_DATETIME = "event time has to be a datetime object"
 
 
 class TrackError(Exception):
@@ -49,6 +50,10 @@ class Track:
         # The show's end time, initially set to to now
         self.endtime = now
 
+        # The time of the CloudEvent that announced the track, None for tracks
+        # that didn't come from an event
+        self.event_time: datetime.datetime | None = None
+
     def set_artist(self: Self, artist: str) -> None:
         """Set Track artist."""
         self.artist = artist
@@ -84,6 +89,13 @@ class Track:
         # The track's end time as a datetime object
         self.endtime = endtime
 
+    def set_event_time(self: Self, event_time: datetime.datetime) -> None:
+        """Set the time of the CloudEvent that announced the Track."""
+        if not isinstance(event_time, datetime.datetime):
+            raise TrackError(_EXCEPTION_TRACK_ERROR_EVENT_TIME_NO_DATETIME)
+
+        self.event_time = event_time
+
     def set_duration(self: Self, seconds: int) -> None:
         """Set Track duration."""
         self.endtime = self.starttime + datetime.timedelta(seconds=int(seconds))
@@ -104,6 +116,35 @@ class Track:
         """Return True if Track has default title."""
         return self.title == DEFAULT_TITLE
 
+    def to_dict(self: Self) -> dict[str, Any]:
+        """Return Track and its Show as a dict of JSON serializable values."""
+        show = getattr(self, "show", None)
+        return {
+            "uuid": self.uuid,
+            "artist": self.artist,
+            "title": self.title,
+            "album": self.album,
+            "track": self.track,
+            "starttime": self.starttime.isoformat(),
+            "endtime": self.endtime.isoformat(),
+            "show": show.to_dict() if show is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls: type[Self], data: dict[str, Any]) -> Self:
+        """Create Track from the output of :meth:`to_dict`."""
+        track = cls()
+        track.uuid = data["uuid"]
+        track.set_artist(data["artist"])
+        track.set_title(data["title"])
+        track.set_album(data["album"])
+        track.set_track(data["track"])
+        track.set_starttime(datetime.datetime.fromisoformat(data["starttime"]))
+        track.set_endtime(datetime.datetime.fromisoformat(data["endtime"]))
+        if data["show"] is not None:
+            track.set_show(Show.from_dict(data["show"]))
+        return track
+
     def __str__(self: Self) -> str:
         """Stringify Track."""
         return (
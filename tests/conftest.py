@@ -4,6 +4,12 @@ from types import SimpleNamespace
 
 import pytest
 from faker import Faker
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
 from werkzeug.test import Client
 from werkzeug.wrappers import Response
 
@@ -12,6 +18,11 @@ from nowplaying.show.show import Show
 from nowplaying.track.observers.base import TrackObserver
 from nowplaying.track.track import Track
 
+_SPANS = InMemorySpanExporter()
+_TRACER_PROVIDER = TracerProvider()
+_TRACER_PROVIDER.add_span_processor(SimpleSpanProcessor(_SPANS))
+trace.set_tracer_provider(_TRACER_PROVIDER)
+
 
 class AuthenticatedClient(Client):
     """An authenticated client for testing."""
@@ -30,6 +41,13 @@ class AuthenticatedClient(Client):
         return super().post(*args, **kwargs)
 
 
+@pytest.fixture(name="spans")
+def fixture_spans():
+    """Collect the spans finished during a test."""
+    _SPANS.clear()
+    return _SPANS
+
+
 @pytest.fixture(name="user")
 def fixture_user():
     return Faker().user_name()
@@ -49,6 +67,9 @@ def fixture_users(user, password):
 def fixture_options(users):
     return SimpleNamespace(
         api_auth_users=users,
+        api_rate_limit=0.0,
+        api_rate_burst=1,
+        api_max_body_size=65536,
     )
 
 
@@ -1,17 +1,40 @@
 """Test the werkzeug based api server."""
 
+import asyncio
+import datetime
+import io
 import json
+from base64 import b64encode
 from queue import Queue
 from types import SimpleNamespace
 from unittest import mock
 
 import pytest
+from werkzeug.test import Client
 
 from nowplaying.api import ApiServer
+from nowplaying.broadcast import Broadcaster
+from nowplaying.event_queue import EventQueue
+from nowplaying.track.latency import LatencyTracker
+from nowplaying.track.observers.snapshot import SnapshotTrackObserver
+
+from .conftest import AuthenticatedClient
 
 _WEBHOOK_ENDPOINT = "/webhook"
 _CONTENT_TYPE_JSON = "application/json"
 _CONTENT_TYPE_CLOUDEVENTS = "application/cloudevents+json"
+_CONTENT_TYPE_BATCH = "application/cloudevents-batch+json"
+
+
+def _track_started(clock):
+    return json.dumps(
+        {
+            "specversion": "1.0",
+            "type": "ch.rabe.api.events.track.v1.trackStarted",
+            "source": "https://rabe.ch",
+            "id": f"crid://rabe.ch/v1#t=clock={clock}",
+        },
+    )
 
 
 @mock.patch("werkzeug.serving.run_simple")
@@ -24,6 +47,8 @@ def test_run_server_with_debug(mock_run_simple, users):
         api_bind_address="127.0.0.1",
         api_port=8080,
         api_auth_users=users,
+        api_rate_limit=0.0,
+        api_rate_burst=1,
         debug=True,
     )
     server = ApiServer(options, event_queue=Queue())
@@ -174,3 +199,734 @@ def test_webhook_auth_fail(unauthenticated_client):
     )
     assert resp.status_code == 401  # noqa: PLR2004
     assert resp.status == "401 UNAUTHORIZED"
+
+
+def test_webhook_queue_full(options, user, password):
+    """Test that a full queue rejects events with 503 and Retry-After."""
+    options.api_retry_after = 7
+    client = AuthenticatedClient(
+        ApiServer(options, event_queue=EventQueue(maxsize=1)),
+        user,
+        password,
+    )
+    headers = {"Content-Type": _CONTENT_TYPE_JSON}
+    resp = client.post(
+        _WEBHOOK_ENDPOINT,
+        data=_track_started("19930301T131200.00Z"),
+        headers=dict(headers),
+    )
+    assert resp.status_code == 200  # noqa: PLR2004
+
+    body = _track_started("19930301T131500.00Z")
+    resp = client.post(_WEBHOOK_ENDPOINT, data=body, headers=dict(headers))
+    assert resp.status_code == 503  # noqa: PLR2004
+    assert resp.headers["Retry-After"] == "7"
+    assert resp.json == "Event queue is full, retry later"
+    assert client.application.event_queue.qsize() == 1
+
+    # rejected events are accepted once there is room again
+    client.application.event_queue.get_nowait()
+    resp = client.post(_WEBHOOK_ENDPOINT, data=body, headers=dict(headers))
+    assert resp.status == "200 Event Received"
+
+
+def test_webhook_duplicate_event(client):
+    """Test that repeated deliveries of an event are only queued once."""
+    body = _track_started("19930301T131200.00Z")
+    for status in ("200 Event Received", "200 Event Already Received"):
+        resp = client.post(
+            _WEBHOOK_ENDPOINT,
+            data=body,
+            headers={"Content-Type": _CONTENT_TYPE_JSON},
+        )
+        assert resp.status == status
+    assert client.application.event_queue.qsize() == 1
+
+
+def test_metrics(unauthenticated_client):
+    """Test that metrics are exported without authentication."""
+    resp = unauthenticated_client.get("/metrics")
+    assert resp.status_code == 200  # noqa: PLR2004
+    assert resp.content_type.startswith("text/plain")
+    assert "# TYPE nowplaying_event_queue_depth gauge" in resp.text
+    resp = unauthenticated_client.get("/metrics")
+    assert 'nowplaying_api_requests_total{endpoint="metrics",code="200"}' in resp.text
+    assert 'nowplaying_api_request_duration_seconds_count{endpoint="metrics"}' in (
+        resp.text
+    )
+
+
+def test_unknown_endpoint_auth_fail(unauthenticated_client):
+    """Test that unknown endpoints still require authentication."""
+    resp = unauthenticated_client.get("/unknown")
+    assert resp.status_code == 401  # noqa: PLR2004
+
+
+def _event(clock, **kwargs):
+    return {
+        "specversion": "1.0",
+        "type": "ch.rabe.api.events.track.v1.trackStarted",
+        "source": "https://rabe.ch",
+        "id": f"crid://rabe.ch/v1#t=clock={clock}",
+        **kwargs,
+    }
+
+
+def test_webhook_batch(client):
+    """Test that a batch is queued in one request."""
+    batch = [_event("19930301T131200.00Z"), _event("19930301T131500.00Z")]
+    resp = client.post(
+        _WEBHOOK_ENDPOINT,
+        data=json.dumps(batch),
+        headers={"Content-Type": _CONTENT_TYPE_BATCH},
+    )
+    assert resp.status_code == 200  # noqa: PLR2004
+    assert [status["status"] for status in resp.json] == [200, 200]
+    assert resp.json[0]["id"] == batch[0]["id"]
+    assert "Retry-After" not in resp.headers
+    queue = client.application.event_queue
+    assert [queue.get()["id"], queue.get()["id"]] == [e["id"] for e in batch]
+
+
+def test_webhook_batch_partial(options, user, password):
+    """Test that every entry of a batch gets its own status."""
+    options.api_retry_after = 3
+    client = AuthenticatedClient(
+        ApiServer(options, event_queue=EventQueue(maxsize=2)),
+        user,
+        password,
+    )
+    batch = [
+        _event("19930301T131200.00Z"),
+        _event("19930301T131200.00Z"),
+        "not an object",
+        {"specversion": "1.0"},
+        _event("19930301T131300.00Z", id="not-a-crid"),
+        _event("19930301T131400.00Z"),
+        _event("19930301T131500.00Z"),
+    ]
+    resp = client.post(
+        _WEBHOOK_ENDPOINT,
+        data=json.dumps(batch),
+        headers={"Content-Type": _CONTENT_TYPE_BATCH},
+    )
+    assert resp.status_code == 207  # noqa: PLR2004
+    assert [(status["status"], status["detail"]) for status in resp.json] == [
+        (200, "Event Received"),
+        (200, "Event Already Received"),
+        (400, "Batch entry must be a JSON object"),
+        (400, mock.ANY),
+        (400, "CRID 'not-a-crid' is not a RaBe CRID"),
+        (200, "Event Received"),
+        (503, "Event queue is full, retry later"),
+    ]
+    assert resp.json[2]["id"] is None
+    assert resp.headers["Retry-After"] == "3"
+
+
+@pytest.mark.parametrize("data", ["{", "{}"])
+def test_webhook_batch_invalid(client, data):
+    """Test that a batch must be a JSON array."""
+    resp = client.post(
+        _WEBHOOK_ENDPOINT,
+        data=data,
+        headers={"Content-Type": _CONTENT_TYPE_BATCH},
+    )
+    assert resp.status_code == 400  # noqa: PLR2004
+    assert resp.json == "Batch must be a JSON array of CloudEvents"
+
+
+def _asgi_request(app, method, path, headers=(), body=b"", query=b""):  # noqa: PLR0913
+    """Call an ASGI app and return the status, headers and body it sent."""
+    chunks = [body[:1], body[1:]]
+    messages = []
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(_asgi_scope(method, path, headers, query), receive, send))
+    start, body = messages
+    return start["status"], dict(start["headers"]), body["body"]
+
+
+def _asgi_scope(method, path, headers=(), query=b""):
+    """Return the scope of an ASGI http request."""
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "query_string": query,
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        "server": ("127.0.0.1", 8080),
+        "client": ("127.0.0.1", 12345),
+    }
+
+
+def test_asgi_webhook(options, user, password):
+    """Test that the ASGI app serves the webhook like the WSGI app."""
+    api = ApiServer(options, event_queue=Queue())
+    auth = b64encode(f"{user}:{password}".encode()).decode()
+    status, headers, _ = _asgi_request(
+        api.asgi_app,
+        "POST",
+        _WEBHOOK_ENDPOINT,
+        headers=[
+            ("Content-Type", _CONTENT_TYPE_JSON),
+            ("Authorization", f"Basic {auth}"),
+            ("X-Forwarded-For", "10.0.0.1"),
+            ("X-Forwarded-For", "10.0.0.2"),
+        ],
+        body=_track_started("19930301T131200.00Z").encode(),
+        query=b"debug=1",
+    )
+    assert status == 200  # noqa: PLR2004
+    assert headers[b"content-length"] == b"0"
+    assert api.event_queue.get()["source"] == "https://rabe.ch"
+
+
+def test_asgi_auth_fail(options):
+    """Test that the ASGI app requires authentication."""
+    api = ApiServer(options, event_queue=Queue())
+    status, headers, _ = _asgi_request(api.asgi_app, "POST", _WEBHOOK_ENDPOINT)
+    assert status == 401  # noqa: PLR2004
+    assert headers[b"www-authenticate"] == b'Basic realm="nowplaying"'
+
+
+def test_asgi_ignores_other_scopes(options):
+    """Test that the ASGI app ignores lifespan and other scopes."""
+    api = ApiServer(options, event_queue=Queue())
+    asyncio.run(api.asgi_app({"type": "lifespan"}, None, None))
+
+
+@mock.patch("uvicorn.Server")
+def test_run_server_with_uvicorn(mock_server, options):
+    """Test that the uvicorn backend serves the ASGI app."""
+    options.debug = False
+    options.api_server = "uvicorn"
+    options.api_bind_address = "127.0.0.1"
+    options.api_port = 8080
+    options.api_keep_alive = 10
+    options.api_max_connections = 0
+    api = ApiServer(options, event_queue=Queue())
+    api.run_server()
+
+    config = mock_server.call_args.args[0]
+    assert config.app == api.asgi_app
+    assert config.interface == "asgi3"
+    assert config.timeout_keep_alive == 10  # noqa: PLR2004
+    assert config.limit_concurrency is None
+    mock_server.return_value.run.assert_called_once_with()
+
+    api.stop_server()
+    assert mock_server.return_value.should_exit
+
+
+@pytest.fixture(name="snapshot_client")
+def fixture_snapshot_client(options, track_factory, show_factory):
+    snapshot = SnapshotTrackObserver()
+    track = track_factory()
+    track.show = show_factory()
+    snapshot.track_started(track)
+    return Client(ApiServer(options, event_queue=Queue(), snapshot=snapshot))
+
+
+@pytest.mark.parametrize(
+    ("query", "accept", "mimetype"),
+    [
+        ("", None, "application/json"),
+        ("", "application/xml", "application/xml"),
+        ("", "text/plain", "text/plain"),
+        ("", "image/png", "application/json"),
+        ("?format=xml", "application/json", "application/xml"),
+        ("?format=txt", None, "text/plain"),
+    ],
+)
+def test_nowplaying(snapshot_client, query, accept, mimetype):
+    """Test that /nowplaying serves the snapshot without authentication."""
+    headers = {"Accept": accept} if accept else {}
+    resp = snapshot_client.get(f"/nowplaying{query}", headers=headers)
+    assert resp.status_code == 200  # noqa: PLR2004
+    assert resp.mimetype == mimetype
+    assert resp.headers["Cache-Control"] == "no-cache"
+    assert resp.headers["Vary"] == "Accept"
+    assert resp.last_modified is not None
+
+    etag, _ = resp.get_etag()
+    resp = snapshot_client.get(
+        f"/nowplaying{query}",
+        headers={**headers, "If-None-Match": f'"{etag}"'},
+    )
+    assert resp.status_code == 304  # noqa: PLR2004
+    assert resp.data == b""
+
+
+def test_nowplaying_unknown_format(snapshot_client):
+    """Test that unknown formats are refused."""
+    resp = snapshot_client.get("/nowplaying?format=yaml")
+    assert resp.status_code == 406  # noqa: PLR2004
+
+
+def test_nowplaying_nothing_playing(unauthenticated_client):
+    """Test that /nowplaying is a 404 before the first track."""
+    resp = unauthenticated_client.get("/nowplaying")
+    assert resp.status_code == 404  # noqa: PLR2004
+    assert resp.json == "No track has been played yet"
+
+    api = unauthenticated_client.application
+    api.snapshot = SnapshotTrackObserver()
+    assert unauthenticated_client.get("/nowplaying").status_code == 404  # noqa: PLR2004
+
+
+def test_events_wsgi(unauthenticated_client):
+    """Test that the WSGI server can't stream events."""
+    resp = unauthenticated_client.get("/events")
+    assert resp.status_code == 501  # noqa: PLR2004
+
+
+def test_events_stream(options):
+    """Test streaming events to a client that resumes and then disconnects."""
+    options.api_sse_heartbeat = 0.01
+    api = ApiServer(options, event_queue=Queue())
+    api.broadcaster.publish("track_started", '{"title": "old"}')
+    sent = []
+
+    async def run():
+        disconnected = asyncio.Event()
+        requests = [{"type": "http.request", "body": b""}] * 2
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == 3:  # noqa: PLR2004
+                api.broadcaster.publish("track_started", '{"title": "new"}')
+            if len(sent) == 5:  # noqa: PLR2004
+                disconnected.set()
+
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "path": "/events",
+            "query_string": b"events=track_started",
+            "headers": [(b"last-event-id", b"0")],
+        }
+        await api.asgi_app(scope, receive, send)
+
+    asyncio.run(run())
+
+    assert sent[0]["status"] == 200  # noqa: PLR2004
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in sent[0]["headers"]
+    bodies = [message["body"] for message in sent[1:]]
+    assert bodies[0] == b'id: 1\nevent: track_started\ndata: {"title": "old"}\n\n'
+    assert b": heartbeat\n\n" in bodies
+    assert b'id: 2\nevent: track_started\ndata: {"title": "new"}\n\n' in bodies
+    assert sent[-1] == {"type": "http.response.body", "body": b""}
+    assert not api.broadcaster._subscriptions  # noqa: SLF001
+
+
+def test_events_evicted(options):
+    """Test that the stream ends when the client gets evicted."""
+    options.api_sse_heartbeat = 1
+    api = ApiServer(options, event_queue=Queue(), broadcaster=Broadcaster(queue_size=1))
+    sent = []
+
+    async def run():
+        requests = [{"type": "http.request", "body": b""}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Event().wait()
+            return None  # pragma: no cover
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == 1:
+                for _ in range(3):
+                    api.broadcaster.publish("track_started", "{}")
+
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "path": "/events",
+            "query_string": b"",
+            "headers": [(b"last-event-id", b"invalid")],
+        }
+        await api.asgi_app(scope, receive, send)
+
+    asyncio.run(run())
+
+    assert sent[-1] == {"type": "http.response.body", "body": b""}
+
+
+def _websocket_scope(path="/ws", query=b""):
+    return {
+        "type": "websocket",
+        "http_version": "1.1",
+        "scheme": "ws",
+        "path": path,
+        "query_string": query,
+        "headers": [],
+    }
+
+
+def test_websocket(options):
+    """Test a WebSocket subscriber that resumes and changes its events."""
+    api = ApiServer(options, event_queue=Queue())
+    api.broadcaster.publish("track_started", '{"title": "old"}')
+    api.broadcaster.publish("show_changed", '{"name": "show"}')
+    sent = []
+
+    async def run():
+        received = asyncio.Event()
+        requests = [
+            {"type": "websocket.connect"},
+            {"type": "websocket.receive", "text": "invalid"},
+            {"type": "websocket.receive", "bytes": b"{}"},
+            {"type": "websocket.receive", "text": '{"events": "track_started"}'},
+            {"type": "websocket.receive", "text": '{"events": ["track_started"]}'},
+        ]
+
+        async def receive():
+            if requests:
+                return requests.pop(0)
+            api.broadcaster.publish("show_changed", '{"name": "filtered"}')
+            api.broadcaster.publish("track_started", '{"title": "new"}')
+            await received.wait()
+            return {"type": "websocket.disconnect", "code": 1000}
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == 3:  # noqa: PLR2004
+                received.set()
+
+        await api.asgi_app(
+            _websocket_scope(query=b"events=show_changed&last_event_id=0"),
+            receive,
+            send,
+        )
+
+    asyncio.run(run())
+
+    assert sent[0] == {"type": "websocket.accept"}
+    assert json.loads(sent[1]["text"]) == {
+        "id": 2,
+        "event": "show_changed",
+        "data": {"name": "show"},
+    }
+    assert json.loads(sent[2]["text"]) == {
+        "id": 4,
+        "event": "track_started",
+        "data": {"title": "new"},
+    }
+    assert len(sent) == 3  # noqa: PLR2004
+    assert not api.broadcaster._subscriptions  # noqa: SLF001
+
+
+def test_websocket_evicted(options):
+    """Test that slow WebSocket subscribers get closed."""
+    api = ApiServer(options, event_queue=Queue(), broadcaster=Broadcaster(queue_size=1))
+    sent = []
+
+    async def run():
+        requests = [{"type": "websocket.connect"}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await asyncio.Event().wait()
+            return None  # pragma: no cover
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == 1:
+                for _ in range(3):
+                    api.broadcaster.publish("track_started", "{}")
+
+        await api.asgi_app(_websocket_scope(), receive, send)
+
+    asyncio.run(run())
+
+    assert sent[-1] == {"type": "websocket.close", "code": 1013}
+    assert not api.broadcaster._subscriptions  # noqa: SLF001
+
+
+@pytest.mark.parametrize("path", ["/webhook", "/unknown"])
+def test_websocket_refused(options, path):
+    """Test that WebSockets are only accepted on the public endpoint."""
+    api = ApiServer(options, event_queue=Queue())
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(api.asgi_app(_websocket_scope(path), None, send))
+
+    assert sent == [{"type": "websocket.close", "code": 1008}]
+
+
+def test_websocket_disconnect_before_connect(options):
+    """Test that nothing gets sent if the client is gone before connecting."""
+    api = ApiServer(options, event_queue=Queue())
+    sent = []
+
+    async def receive():
+        return {"type": "websocket.disconnect", "code": 1006}
+
+    async def send(message):  # pragma: no cover
+        sent.append(message)
+
+    asyncio.run(api.asgi_app(_websocket_scope(), receive, send))
+
+    assert not sent
+
+
+def test_websocket_http(unauthenticated_client, user, password):
+    """Test that plain HTTP requests to the WebSocket endpoint get refused."""
+    auth = b64encode(f"{user}:{password}".encode()).decode()
+    resp = unauthenticated_client.get("/ws", headers={"Authorization": f"Basic {auth}"})
+    assert resp.status_code == 400  # noqa: PLR2004
+
+
+@pytest.fixture(name="history_client")
+def fixture_history_client(options, track_factory):
+    api = ApiServer(options, event_queue=Queue())
+    for minute in range(3):
+        track = track_factory(title=f"Track {minute}")
+        track.set_starttime(
+            datetime.datetime(2024, 1, 1, 0, minute, tzinfo=datetime.UTC),
+        )
+        api.history.track_started(track)
+    return Client(api)
+
+
+def test_history(history_client):
+    """Test paging through the history."""
+    resp = history_client.get("/history", query_string={"limit": 2})
+    assert resp.status_code == 200  # noqa: PLR2004
+    assert resp.mimetype == "application/json"
+    assert [track["title"] for track in resp.json["tracks"]] == ["Track 2", "Track 1"]
+    resp = history_client.get(
+        "/history",
+        query_string={"limit": 2, "before": resp.json["next"]},
+    )
+    assert [track["title"] for track in resp.json["tracks"]] == ["Track 0"]
+    assert resp.json["next"] is None
+
+
+def test_history_time_range(history_client):
+    """Test filtering the history by start time."""
+    resp = history_client.get(
+        "/history",
+        query_string={"since": "2024-01-01T00:01:00", "until": "2024-01-01T00:02Z"},
+    )
+    assert [track["title"] for track in resp.json["tracks"]] == ["Track 1"]
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"limit": "many"},
+        {"limit": 0},
+        {"before": "x"},
+        {"before": -1},
+        {"since": "yesterday"},
+    ],
+)
+def test_history_invalid(history_client, query):
+    """Test that invalid parameters get rejected."""
+    resp = history_client.get("/history", query_string=query)
+    assert resp.status_code == 400  # noqa: PLR2004
+
+
+_TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+_PARENT_ID = "00f067aa0ba902b7"
+
+
+def test_webhook_trace_context(client, spans):
+    """Test that the trace context of an event is carried on to the queue."""
+    body = json.dumps(
+        {
+            "specversion": "1.0",
+            "type": "ch.rabe.api.events.track.v1.trackStarted",
+            "source": "https://rabe.ch",
+            "id": "crid://rabe.ch/v1#t=clock=19930301T131200.00Z",
+            "traceparent": f"00-{_TRACE_ID}-{_PARENT_ID}-01",
+        },
+    )
+    resp = client.post(
+        _WEBHOOK_ENDPOINT,
+        data=body,
+        headers={"Content-Type": _CONTENT_TYPE_CLOUDEVENTS},
+    )
+    assert resp.status_code == 200  # noqa: PLR2004
+
+    span = next(
+        span
+        for span in spans.get_finished_spans()
+        if span.name == "ApiServer.enqueue_event"
+    )
+    assert f"{span.context.trace_id:032x}" == _TRACE_ID
+    assert f"{span.parent.span_id:016x}" == _PARENT_ID
+    event = client.application.event_queue.get()
+    assert event["traceparent"] == (f"00-{_TRACE_ID}-{span.context.span_id:016x}-01")
+
+
+def test_webhook_trace_context_header(client, spans):
+    """Test that the webhook continues the trace of the request."""
+    resp = client.post(
+        _WEBHOOK_ENDPOINT,
+        data="{}",
+        headers={
+            "Content-Type": _CONTENT_TYPE_CLOUDEVENTS,
+            "traceparent": f"00-{_TRACE_ID}-{_PARENT_ID}-01",
+        },
+    )
+    assert resp.status_code == 400  # noqa: PLR2004
+
+    (span,) = [
+        span
+        for span in spans.get_finished_spans()
+        if span.name == "ApiServer.on_webhook"
+    ]
+    assert f"{span.context.trace_id:032x}" == _TRACE_ID
+    assert not span.status.is_ok
+
+
+def test_latency(options):
+    """Test serving latency percentiles per observer."""
+    latency = LatencyTracker(objective=5.0, percentile=90.0, window=60.0)
+    latency.record("Ticker", 1.5)
+    client = Client(ApiServer(options, event_queue=Queue(), latency=latency))
+
+    resp = client.get("/latency")
+
+    assert resp.status_code == 200  # noqa: PLR2004
+    assert resp.json["objective"] == {
+        "seconds": 5.0,
+        "percentile": 90.0,
+        "window": 60.0,
+    }
+    assert resp.json["observers"]["Ticker"]["p50"] == 1.5  # noqa: PLR2004
+
+
+def test_health(options):
+    """Test the health and readiness endpoints."""
+    health = mock.Mock()
+    health.liveness.return_value = (True, {"main_loop": {"ok": True}})
+    health.readiness.return_value = (False, {"event_queue": {"ok": False}})
+    client = Client(ApiServer(options, event_queue=Queue(), health=health))
+
+    resp = client.get("/healthz")
+    assert resp.status_code == 200  # noqa: PLR2004
+    assert resp.json == {"status": "ok", "main_loop": {"ok": True}}
+    resp = client.get("/readyz")
+    assert resp.status_code == 503  # noqa: PLR2004
+    assert resp.json == {"status": "fail", "event_queue": {"ok": False}}
+
+
+def test_webhook_rate_limited(options, user, password):
+    """Test that clients get told to slow down before their events get parsed."""
+    options.api_rate_limit = 0.5
+    client = AuthenticatedClient(
+        ApiServer(options, event_queue=Queue()),
+        user,
+        password,
+    )
+    headers = {"Content-Type": _CONTENT_TYPE_CLOUDEVENTS}
+
+    assert client.post(_WEBHOOK_ENDPOINT, data="{}", headers=headers).status_code == 400  # noqa: PLR2004
+    resp = client.post(_WEBHOOK_ENDPOINT, data="{}", headers=headers)
+    assert resp.status_code == 429  # noqa: PLR2004
+    assert resp.headers["Retry-After"] == "2"
+
+
+def test_webhook_body_too_large(client):
+    """Test that large bodies are refused before they are read."""
+    resp = client.post(
+        _WEBHOOK_ENDPOINT,
+        data="x" * 65537,
+        headers={"Content-Type": _CONTENT_TYPE_CLOUDEVENTS},
+    )
+    assert resp.status_code == 413  # noqa: PLR2004
+
+
+def test_webhook_body_too_large_without_length(client):
+    """Test that reading bodies without a Content-Length stops at the limit."""
+    body = io.BytesIO(b"x" * 65537)
+    resp = client.post(
+        _WEBHOOK_ENDPOINT,
+        input_stream=body,
+        headers={
+            "Content-Type": _CONTENT_TYPE_CLOUDEVENTS,
+            "Transfer-Encoding": "chunked",
+        },
+        environ_overrides={"wsgi.input_terminated": True},
+    )
+    assert resp.status_code == 400  # noqa: PLR2004
+    assert body.tell() == 65536  # noqa: PLR2004
+
+
+def test_asgi_body_too_large(options, user, password):
+    """Test that the ASGI app stops reading bodies at the limit."""
+    api = ApiServer(options, event_queue=Queue())
+    auth = b64encode(f"{user}:{password}".encode())
+    status, _, _ = _asgi_request(
+        api.asgi_app,
+        "POST",
+        _WEBHOOK_ENDPOINT,
+        headers=[("Authorization", f"Basic {auth.decode()}")],
+        body=b"x" * 65537,
+    )
+    assert status == 413  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    ("headers", "rate_limit", "status"),
+    [
+        ([], 0.0, 401),
+        ([("Content-Length", "65537")], 0.0, 413),
+        ([], 0.5, 429),
+    ],
+)
+def test_asgi_rejects_before_reading_body(  # noqa: PLR0913
+    options,
+    user,
+    password,
+    headers,
+    rate_limit,
+    status,
+):
+    """Test that the ASGI app rejects requests without reading their body."""
+    options.api_rate_limit = rate_limit
+    api = ApiServer(options, event_queue=Queue())
+    if status != 401:  # noqa: PLR2004
+        auth = b64encode(f"{user}:{password}".encode()).decode()
+        headers = [*headers, ("Authorization", f"Basic {auth}")]
+    if rate_limit:
+        # use up the burst
+        _asgi_request(api.asgi_app, "POST", _WEBHOOK_ENDPOINT, headers=headers)
+    messages = []
+
+    async def receive():
+        pytest.fail("body was read")
+
+    async def send(message):
+        messages.append(message)
+
+    scope = _asgi_scope("POST", _WEBHOOK_ENDPOINT, headers)
+    asyncio.run(api.asgi_app(scope, receive, send))
+    assert messages[0]["status"] == status
@@ -0,0 +1,110 @@
+"""Tests for :mod:`nowplaying.broadcast`."""
+
+import asyncio
+import json
+from threading import Thread
+
+from nowplaying.broadcast import Broadcaster, Message, Subscription
+
+
+def test_publish():
+    """Test that messages reach subscribers on their loop, also from threads."""
+
+    async def run():
+        broadcaster = Broadcaster()
+        subscription = broadcaster.subscribe()
+        tracks = broadcaster.subscribe(events=["track_started"])
+        broadcaster.publish("show_changed", "{}")
+        thread = Thread(target=broadcaster.publish, args=("track_started", "[]"))
+        thread.start()
+        thread.join()
+
+        first = await subscription.get(1)
+        assert first.sse == b"id: 1\nevent: show_changed\ndata: {}\n\n"
+        assert (await subscription.get(1)).data == "[]"
+        assert (await tracks.get(1)).id == 2  # noqa: PLR2004
+        assert await tracks.get(0.01) is None
+
+        broadcaster.unsubscribe(subscription)
+        broadcaster.publish("track_started", "[]")
+        assert await subscription.get(1) is None
+
+    asyncio.run(run())
+
+
+def test_resume():
+    """Test that subscribers resume from the history."""
+
+    async def run():
+        broadcaster = Broadcaster(history=2)
+        for event in ("a", "b", "c"):
+            broadcaster.publish(event, "")
+        resumed = broadcaster.subscribe(last_id=1)
+        assert [(await resumed.get(1)).event for _ in range(2)] == ["b", "c"]
+
+    asyncio.run(run())
+
+
+def test_resume_capped():
+    """Test that resuming replays no more than fits the subscriber's queue."""
+
+    async def run():
+        broadcaster = Broadcaster(history=4, queue_size=2)
+        for event in ("a", "b", "c", "d"):
+            broadcaster.publish(event, "")
+        resumed = broadcaster.subscribe(last_id=0)
+        assert not resumed.closed
+        assert [(await resumed.get(1)).event for _ in range(2)] == ["c", "d"]
+
+        filtered = broadcaster.subscribe(last_id=0, events=["a", "b"])
+        assert [(await filtered.get(1)).event for _ in range(2)] == ["a", "b"]
+
+    asyncio.run(run())
+
+
+def test_evict_slow_subscriber():
+    """Test that subscribers falling behind get evicted."""
+
+    async def run():
+        broadcaster = Broadcaster(queue_size=1)
+        slow = broadcaster.subscribe()
+        broadcaster.publish("a", "")
+        broadcaster.publish("b", "")
+        await asyncio.sleep(0)
+        assert slow.evicted
+        assert slow.closed
+        assert await slow.get() is None
+
+    asyncio.run(run())
+
+
+def test_publish_closed_loop():
+    """Test that subscribers on a closed loop don't break publishing."""
+
+    async def subscribe(broadcaster):
+        return broadcaster.subscribe()
+
+    broadcaster = Broadcaster()
+    asyncio.run(subscribe(broadcaster))
+    assert broadcaster.publish("a", "").id == 1
+
+
+def test_message_json():
+    """Test the pre-rendered WebSocket frame."""
+    message = Message(1, "track_started", '{"title": "Title"}')
+    assert json.loads(message.json) == {
+        "id": 1,
+        "event": "track_started",
+        "data": {"title": "Title"},
+    }
+
+
+def test_select():
+    """Test changing the events of a subscription."""
+    subscription = Subscription(None, events=["track_started"])
+    message = Message(1, "show_changed", "{}")
+    assert not subscription.wants(message)
+    subscription.select(["show_changed"])
+    assert subscription.wants(message)
+    subscription.select(None)
+    assert subscription.wants(Message(2, "track_finished", "{}"))
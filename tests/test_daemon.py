@@ -1,13 +1,26 @@
 """Tests for :class:`NowPlayingDaemon`."""
 
+import math
+import time
+from datetime import datetime, timedelta
 from os import EX_OK
 from signal import SIGINT
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
 
 import pytest
+import pytz
 
-from nowplaying.daemon import NowPlayingDaemon
-from nowplaying.misc.saemubox import SaemuBox
+from nowplaying.daemon import (
+    _MAIN_LOOP_LAG,
+    _PENDING_DROPPED,
+    WAKEUP,
+    NowPlayingDaemon,
+)
+from nowplaying.input.handler import InputHandler
+from nowplaying.input.observer import NonKlangbeckenInputObserver
+from nowplaying.misc.saemubox import SaemuBox, SaemuBoxError
+from nowplaying.runtime import AsyncRuntime
+from nowplaying.show.show import Show
 
 
 @pytest.fixture(name="options")
@@ -15,7 +28,25 @@ def fixture_options():
     class _Options:
         def __init__(self):
             self.saemubox_ip = ""
+            self.saemubox_retry_seconds = 0.05
             self.check_saemubox_sender = True
+            self.runtime = "threads"
+            self.runtime_workers = 2
+            self.api_queue_size = 10
+            self.api_queue_policy = "reject"
+            self.api_dedup_size = 10
+            self.api_dedup_ttl = 60.0
+            self.reorder_window = 0.0
+            self.api_stream_history = 10
+            self.api_stream_queue_size = 10
+            self.api_history_size = 10
+            self.latency_objective = 10.0
+            self.latency_percentile = 99.0
+            self.latency_window = 60.0
+            self.health_max_busy = 60.0
+            self.api_rate_limit = 0.0
+            self.api_rate_burst = 1
+            self.api_max_body_size = 65536
 
     return _Options()
 
@@ -42,6 +73,20 @@ def test_signal_handler(mock_sys_exit, options):
         mock_sys_exit.assert_called_with(EX_OK)
 
 
+@patch("sys.exit")
+def test_signal_handler_stops_runtime(mock_sys_exit, options):
+    """Test that :meth:`signal_handler` stops the asyncio runtime."""
+
+    with patch.object(SaemuBox, "__init__", lambda *_: None):
+        nowplaying_daemon = NowPlayingDaemon(options)
+        nowplaying_daemon._api = Mock()  # noqa: SLF001
+        nowplaying_daemon.runtime = Mock()
+        nowplaying_daemon.signal_handler(SIGINT, None)
+
+        nowplaying_daemon.runtime.stop.assert_called_once()
+        mock_sys_exit.assert_called_with(EX_OK)
+
+
 @patch("nowplaying.api.ApiServer.run_server")
 def test__start_apiserver(mock_run_server, options):
     """Test the start_apiserver function."""
@@ -52,3 +97,238 @@ def test__start_apiserver(mock_run_server, options):
         daemon._start_apiserver()  # noqa: SLF001
 
     mock_run_server.assert_called_with()
+
+
+@pytest.fixture(name="daemon")
+def fixture_daemon(options):
+    with patch.object(SaemuBox, "__init__", lambda *_: None):
+        return NowPlayingDaemon(options)
+
+
+def test_wait_for_events(daemon):
+    """Test that :meth:`wait_for_events` drains the queue and skips wakeups."""
+    event_1 = {"type": "test", "source": "test", "time": "2021-12-28T19:31:00Z"}
+    event_2 = {"type": "test", "source": "test", "time": "2021-12-28T19:32:00Z"}
+    daemon.event_queue.put(event_1)
+    daemon.event_queue.put(WAKEUP)
+    daemon.event_queue.put(event_2)
+
+    daemon.wait_for_events(timeout=None)
+
+    assert list(daemon._pending_events) == [event_1, event_2]  # noqa: SLF001
+    assert not daemon.reorder_buffer
+    assert daemon.event_queue.empty()
+
+
+def test_wait_for_events_reorder(daemon):
+    """Test that :meth:`wait_for_events` holds events back with a reorder window."""
+    event_1 = {"type": "test", "source": "test", "time": "2021-12-28T19:32:00Z"}
+    event_2 = {"type": "test", "source": "test", "time": "2021-12-28T19:31:00Z"}
+    daemon.reorder_buffer.window = 5
+    daemon.event_queue.put(event_1)
+    daemon.event_queue.put(event_2)
+
+    daemon.wait_for_events(timeout=None)
+
+    assert not daemon._pending_events  # noqa: SLF001
+    assert daemon.reorder_buffer.pop_ready(now=math.inf) == [event_2, event_1]
+
+
+def test_wait_for_events_timeout(daemon):
+    """Test that :meth:`wait_for_events` returns once the timeout passes."""
+    daemon.wait_for_events(timeout=0)
+
+    assert not daemon.reorder_buffer
+
+
+def test_wakeup(daemon):
+    """Test that :meth:`wakeup` puts a marker on the queue."""
+    daemon.wakeup()
+
+    assert daemon.event_queue.get_nowait() is WAKEUP
+
+
+def test_get_time_to_deadline(daemon):
+    """Test :meth:`get_time_to_deadline` with and without deadlines."""
+    input_handler = Mock()
+
+    input_handler.next_deadline.return_value = None
+    assert daemon.get_time_to_deadline(input_handler) is None
+
+    now = datetime.now(pytz.timezone("UTC"))
+    input_handler.next_deadline.return_value = now + timedelta(hours=1)
+    assert 3590 < daemon.get_time_to_deadline(input_handler) <= 3600  # noqa: PLR2004
+
+    input_handler.next_deadline.return_value = now - timedelta(minutes=1)
+    assert -70 < daemon.get_time_to_deadline(input_handler) <= -60  # noqa: PLR2004
+
+    input_handler.next_deadline.return_value = now + timedelta(hours=1)
+    daemon.reorder_buffer.window = 5
+    daemon.reorder_buffer.push({"type": "test", "source": "test"})
+    assert 4 < daemon.get_time_to_deadline(input_handler) <= 5  # noqa: PLR2004
+
+    input_handler.next_deadline.return_value = None
+    assert 4 < daemon.get_time_to_deadline(input_handler) <= 5  # noqa: PLR2004
+
+
+@patch("nowplaying.show.client.ShowClient.get_show_info")
+def test_get_time_to_deadline_klangbecken(mock_get_show_info, daemon):
+    """Test that a show ending while Klangbecken is on air doesn't spin the loop."""
+    show = Show()
+    show.set_endtime(datetime.now(pytz.timezone("UTC")) - timedelta(hours=1))
+    mock_get_show_info.return_value = show
+    input_handler = InputHandler()
+    observer = NonKlangbeckenInputObserver("http://www.rabe.ch/klangbecken/")
+    input_handler.register_observer(observer)
+
+    input_handler.update(1)
+
+    assert daemon.get_time_to_deadline(input_handler) is None
+
+
+def test_handle_events(daemon):
+    """Test that :meth:`handle_events` passes events and then updates."""
+    event = {"type": "test", "source": "test"}
+    daemon.event_queue.put(event)
+    daemon.poll_saemubox = Mock(return_value=1)
+    input_handler = Mock()
+    input_handler.next_deadline.return_value = None
+
+    daemon.handle_events(input_handler)
+
+    assert input_handler.update.call_args_list == [call(1, event), call(1)]
+    assert not daemon._pending_events  # noqa: SLF001
+
+
+def test_handle_events_trace_context(daemon, spans):
+    """Test that events get handled in the trace they carry."""
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    event = {
+        "type": "test",
+        "source": "test",
+        "traceparent": f"00-{trace_id}-00f067aa0ba902b7-01",
+    }
+    daemon.event_queue.put(event)
+    daemon.poll_saemubox = Mock(return_value=1)
+    input_handler = Mock()
+    input_handler.next_deadline.return_value = None
+
+    daemon.handle_events(input_handler)
+
+    (span,) = [
+        span
+        for span in spans.get_finished_spans()
+        if span.name == "NowPlayingDaemon.handle_event"
+    ]
+    assert f"{span.context.trace_id:032x}" == trace_id
+
+
+def test_handle_events_lag(daemon):
+    """Test that a deadline that passed already is reported as lag."""
+    daemon.poll_saemubox = Mock(return_value=1)
+    input_handler = Mock()
+    now = datetime.now(pytz.timezone("UTC"))
+    input_handler.next_deadline.return_value = now - timedelta(seconds=10)
+
+    daemon.handle_events(input_handler)
+
+    assert 10 <= _MAIN_LOOP_LAG.get() < 11  # noqa: PLR2004
+
+
+def test_handle_events_keeps_events_on_error(daemon):
+    """Test that :meth:`handle_events` keeps events if the Sämubox fails."""
+    event = {"type": "test", "source": "test"}
+    daemon.event_queue.put(event)
+    daemon.poll_saemubox = Mock(side_effect=SaemuBoxError)
+    input_handler = Mock()
+    input_handler.next_deadline.return_value = None
+
+    with pytest.raises(SaemuBoxError):
+        daemon.handle_events(input_handler)
+
+    input_handler.update.assert_not_called()
+    assert list(daemon._pending_events) == [event]  # noqa: SLF001
+
+
+def test_handle_events_drops_failing_event(daemon):
+    """Test that an event that fails to be handled doesn't block the others."""
+    event_1 = {"type": "test", "source": "test"}
+    event_2 = {"type": "test", "source": "other"}
+    daemon.event_queue.put(event_1)
+    daemon.event_queue.put(event_2)
+    daemon.poll_saemubox = Mock(return_value=1)
+    input_handler = Mock()
+    input_handler.next_deadline.return_value = None
+    input_handler.update.side_effect = [Exception, None, None]
+
+    daemon.handle_events(input_handler)
+
+    assert input_handler.update.call_args_list == [
+        call(1, event_1),
+        call(1, event_2),
+        call(1),
+    ]
+    assert not daemon._pending_events  # noqa: SLF001
+
+
+def test_handle_events_bounds_pending_events(daemon, options):
+    """Test that only the newest events are kept while the Sämubox fails."""
+    events = [{"type": "test", "source": str(i)} for i in range(3)]
+    options.api_queue_size = 2
+    daemon.poll_saemubox = Mock(side_effect=SaemuBoxError)
+    input_handler = Mock()
+    input_handler.next_deadline.return_value = None
+    dropped = _PENDING_DROPPED.get()
+
+    for event in events:
+        daemon.event_queue.put(event)
+        with pytest.raises(SaemuBoxError):
+            daemon.handle_events(input_handler)
+
+    assert list(daemon._pending_events) == events[1:]  # noqa: SLF001
+    assert _PENDING_DROPPED.get() == dropped + 1
+
+
+@patch("nowplaying.daemon.OVERDUE_RETRY_SECONDS", 0.05)
+def test_handle_events_overdue(daemon):
+    """Test that a deadline that stays passed doesn't get retried right away."""
+    daemon.poll_saemubox = Mock(return_value=1)
+    daemon.wait_for_events = Mock()
+    input_handler = Mock()
+    now = datetime.now(pytz.timezone("UTC"))
+    input_handler.next_deadline.return_value = now - timedelta(seconds=10)
+
+    daemon.handle_events(input_handler)
+    daemon.handle_events(input_handler)
+    input_handler.next_deadline.return_value = now + timedelta(hours=1)
+    daemon.handle_events(input_handler)
+    input_handler.next_deadline.return_value = now - timedelta(seconds=10)
+    daemon.handle_events(input_handler)
+
+    timeouts = [args.args[0] for args in daemon.wait_for_events.call_args_list]
+    assert timeouts[:2] == [0.0, 0.05]
+    assert timeouts[2] > 3590  # noqa: PLR2004
+    assert timeouts[3] == 0.0
+
+
+def test_run_once_backs_off(daemon):
+    """Test that the main loop doesn't spin while the Sämubox keeps failing."""
+    daemon.poll_saemubox = Mock(side_effect=SaemuBoxError)
+    input_handler = Mock()
+    now = datetime.now(pytz.timezone("UTC"))
+    input_handler.next_deadline.return_value = now - timedelta(seconds=10)
+
+    started = time.monotonic()
+    while time.monotonic() - started < 0.2:  # noqa: PLR2004
+        daemon.run_once(input_handler)
+
+    # one try every 50ms plus the one the loop started with
+    assert daemon.poll_saemubox.call_count <= 5  # noqa: PLR2004
+
+
+def test_get_runtime(daemon, options):
+    """Test that :meth:`get_runtime` only creates a runtime for asyncio."""
+    assert daemon.get_runtime() is None
+
+    options.runtime = "asyncio"
+    assert isinstance(daemon.get_runtime(), AsyncRuntime)
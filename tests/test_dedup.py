@@ -0,0 +1,30 @@
+"""Tests for :class:`nowplaying.dedup.DedupCache`."""
+
+from unittest.mock import patch
+
+from nowplaying.dedup import DedupCache
+
+
+def test_ttl():
+    """Test that keys expire after their ttl."""
+    cache = DedupCache(ttl=10)
+    with patch("time.monotonic", return_value=100):
+        assert cache.add("a")
+    with patch("time.monotonic", return_value=105):
+        assert cache.add("b")
+        assert "a" in cache
+    with patch("time.monotonic", return_value=110):
+        assert "a" not in cache
+        assert "b" in cache
+        assert len(cache) == 1
+        assert cache.add("a")
+
+
+def test_discard():
+    """Test that discarded keys are accepted again."""
+    cache = DedupCache()
+    assert cache.add(("id", "source"))
+    cache.discard(("id", "source"))
+    cache.discard("unknown")
+    assert cache.add(("id", "source"))
+    assert not cache.add(("id", "source"))
@@ -0,0 +1,79 @@
+"""Tests for :class:`nowplaying.event_queue.EventQueue`."""
+
+from queue import Full
+
+import pytest
+from cloudevents.http import CloudEvent
+
+from nowplaying.event_queue import (
+    _QUEUE_COALESCED,
+    _QUEUE_REJECTED,
+    _QUEUE_WAIT,
+    EventQueue,
+)
+
+
+def _event(source, event_id="1"):
+    return CloudEvent(
+        {
+            "type": "ch.rabe.api.events.track.v1.trackStarted",
+            "source": source,
+            "id": event_id,
+        },
+    )
+
+
+def test_fifo():
+    """Test that items come out in order and their wait time is recorded."""
+    queue = EventQueue(maxsize=3)
+    count = _QUEUE_WAIT.get_count()
+    queue.put_nowait("a")
+    queue.put_nowait("b")
+    assert queue.qsize() == 2  # noqa: PLR2004
+    assert queue.get_nowait() == "a"
+    assert queue.get_nowait() == "b"
+    assert _QUEUE_WAIT.get_count() == count + 2
+
+
+def test_reject():
+    """Test that a full queue rejects events."""
+    queue = EventQueue(maxsize=1)
+    rejected = _QUEUE_REJECTED.get()
+    queue.put_nowait(_event("a"))
+    with pytest.raises(Full):
+        queue.put_nowait(_event("a", "2"))
+    assert _QUEUE_REJECTED.get() == rejected + 1
+    assert queue.get_nowait()["id"] == "1"
+
+
+def test_coalesce():
+    """Test that a full queue replaces the queued event from the same source."""
+    queue = EventQueue(maxsize=2, policy="coalesce")
+    coalesced = _QUEUE_COALESCED.get()
+    queue.put_nowait(_event("a"))
+    queue.put_nowait(_event("b"))
+    queue.put_nowait(_event("a", "2"))
+    assert _QUEUE_COALESCED.get() == coalesced + 1
+    assert queue.qsize() == 2  # noqa: PLR2004
+    assert queue.get_nowait()["source"] == "b"
+    assert queue.get_nowait()["id"] == "2"
+
+
+def test_coalesce_other_source():
+    """Test that events without a queued event from their source get rejected."""
+    queue = EventQueue(maxsize=1, policy="coalesce")
+    queue.put_nowait(_event("a"))
+    with pytest.raises(Full):
+        queue.put_nowait(_event("b"))
+    with pytest.raises(Full):
+        queue.put_nowait("wakeup")
+
+
+def test_coalesce_not_full():
+    """Test that events only get coalesced when the queue is full."""
+    queue = EventQueue(maxsize=2, policy="coalesce")
+    queue.put_nowait("wakeup")
+    queue.put_nowait(_event("a"))
+    queue.get_nowait()
+    queue.put_nowait(_event("a", "2"))
+    assert queue.qsize() == 2  # noqa: PLR2004
@@ -0,0 +1,55 @@
+"""Tests for :mod:`nowplaying.health`."""
+
+from queue import Queue
+
+import pytest
+
+from nowplaying import health
+from nowplaying.health import Health
+
+
+@pytest.fixture(autouse=True)
+def _reset_gauges():
+    """Start every test without a heartbeat."""
+    health.LOOP_HEARTBEAT.set(0.0)
+    health.LOOP_BUSY_SINCE.set(0.0)
+
+
+def test_liveness():
+    """Test that a main loop busy for too long is reported as stuck."""
+    checker = Health(Queue(), max_busy=10)
+    health.loop_waiting()
+    alive, report = checker.liveness()
+    assert alive
+    assert report["main_loop"]["busy_for"] == 0
+
+    health.loop_busy()
+    now = health.LOOP_BUSY_SINCE.get()
+    assert checker.liveness(now + 5)[0]
+    alive, report = checker.liveness(now + 11)
+    assert not alive
+    assert report["main_loop"] == {"ok": False, "heartbeat_age": 11, "busy_for": 11}
+
+
+def test_readiness():
+    """Test that the daemon is ready once the loop ran and events are accepted."""
+    queue = Queue(maxsize=1)
+    checker = Health(queue)
+    ready, report = checker.readiness()
+    assert not ready
+    assert report["main_loop"]["started"] is False
+    assert report["main_loop"]["heartbeat_age"] is None
+
+    health.loop_waiting()
+    health.observer_delivered("Ticker")
+    health.show_updated()
+    ready, report = checker.readiness()
+    assert ready
+    assert report["event_queue"] == {"ok": True, "depth": 0, "maxsize": 1}
+    assert report["observers"]["Ticker"]["last_success_age"] < 1
+    assert report["show"]["age"] < 1
+
+    queue.put("event")
+    ready, report = checker.readiness()
+    assert not ready
+    assert not report["event_queue"]["ok"]
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+from datetime import UTC, datetime
 from queue import Queue
 
 from cloudevents.http.event import CloudEvent
 
 from nowplaying.input.handler import InputHandler
 from nowplaying.input.observer import InputObserver
+from nowplaying.runtime import AsyncRuntime
 
 
 class ShuntInputObserver(InputObserver):
@@ -65,3 +67,51 @@ def test_update():
     )
     handler.update(1, event)
     assert observer.update_call == (1, event)
+
+
+def test_next_deadline():
+    """Test that next_deadline returns the earliest observer deadline."""
+    handler = InputHandler()
+    assert handler.next_deadline() is None
+
+    early = ShuntInputObserver()
+    early.next_deadline = lambda: datetime(2020, 1, 1, tzinfo=UTC)
+    late = ShuntInputObserver()
+    late.next_deadline = lambda: datetime(2021, 1, 1, tzinfo=UTC)
+    idle = ShuntInputObserver()
+    for observer in (late, idle, early):
+        handler.register_observer(observer)
+
+    assert handler.next_deadline() == datetime(2020, 1, 1, tzinfo=UTC)
+
+
+class AsyncShuntInputObserver(ShuntInputObserver):
+    async def update(self, saemubox_id: int, event: CloudEvent | None = None):
+        self.update_call = (saemubox_id, event)
+
+
+def test_update_async_observer():
+    """Test that update runs async observers."""
+    handler = InputHandler()
+    observer = AsyncShuntInputObserver()
+    handler.register_observer(observer)
+
+    handler.update(1)
+    assert observer.update_call == (1, None)
+
+
+def test_update_with_runtime():
+    """Test that update runs all observers on the runtime."""
+    runtime = AsyncRuntime(max_workers=2)
+    runtime.start()
+    handler = InputHandler(runtime=runtime)
+    observer = ShuntInputObserver()
+    async_observer = AsyncShuntInputObserver()
+    handler.register_observer(observer)
+    handler.register_observer(async_observer)
+
+    handler.update(2)
+    runtime.stop()
+
+    assert observer.update_call == (2, None)
+    assert async_observer.update_call == (2, None)
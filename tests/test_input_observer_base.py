@@ -50,3 +50,9 @@ def test_update():
     observer.update(saemubox_id)
 
     assert observer.handle_called
+
+
+def test_next_deadline():
+    observer = ShuntObserver("http://www.rabe.ch/klangbecken/")
+
+    assert observer.next_deadline() is None
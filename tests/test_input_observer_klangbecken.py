@@ -78,6 +78,7 @@ def test_parse_event(event: CloudEvent):
 
     assert track.artist == expected_track.artist
     assert track.title == expected_track.title
+    assert track.event_time == track.starttime
 
     event["type"] = "ch.rabe.api.events.track.v1.trackFinished"
     track = observer.parse_event(event)
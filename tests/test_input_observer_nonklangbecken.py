@@ -39,3 +39,18 @@ def test_handle(mock_get_show_info):
     observer.handle()
     mock_get_show_info.assert_called_once()
     assert observer.show == mock_show
+
+
+@patch("nowplaying.show.client.ShowClient.get_show_info")
+def test_next_deadline(mock_get_show_info):
+    mock_show = Mock()
+    mock_show.endtime = datetime(2018, 1, 1, 1, 0, 0)
+    mock_get_show_info.return_value = mock_show
+
+    observer = NonKlangbeckenInputObserver("http://www.rabe.ch/klangbecken/")
+
+    assert observer.next_deadline() == mock_show.endtime
+
+    # the show doesn't get updated while Klangbecken is on air
+    observer.handle_id(1)
+    assert observer.next_deadline() is None
@@ -0,0 +1,41 @@
+"""Tests for the metrics module."""
+
+from nowplaying.metrics import Registry
+
+
+def test_counter():
+    """Test counters with labels."""
+    registry = Registry()
+    counter = registry.counter("events_total", "Events.", ("source",))
+    counter.inc(source='a"b')
+    counter.inc(2, source='a"b')
+    assert counter.get(source='a"b') == 3  # noqa: PLR2004
+    assert counter.get(source="c") == 0
+    assert counter.items() == [({"source": 'a"b'}, 3.0)]
+    assert 'events_total{source="a\\"b"} 3.0' in registry.render()
+
+
+def test_gauge():
+    """Test that gauges render the value they were set to."""
+    registry = Registry()
+    registry.gauge("depth", "Depth.").set(4)
+    output = registry.render()
+    assert "# TYPE depth gauge\ndepth 4.0\n" in output
+
+
+def test_histogram():
+    """Test histograms render cumulative buckets."""
+    registry = Registry()
+    histogram = registry.histogram("wait_seconds", "Wait.", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+    assert histogram.get_count() == 3  # noqa: PLR2004
+    assert registry.histogram("other", "Other.").get_count() == 0
+    assert registry.render().splitlines()[2:7] == [
+        'wait_seconds_bucket{le="0.1"} 1.0',
+        'wait_seconds_bucket{le="1.0"} 2.0',
+        'wait_seconds_bucket{le="+Inf"} 3.0',
+        "wait_seconds_sum 5.55",
+        "wait_seconds_count 3.0",
+    ]
@@ -0,0 +1,20 @@
+"""Tests for :mod:`nowplaying.otel`."""
+
+from opentelemetry import trace
+
+from nowplaying.otel import extract_context, inject_context
+
+
+def test_inject_extract(spans):  # noqa: ARG001
+    """Test carrying the trace context with an event."""
+    event = {"type": "test"}
+    assert extract_context(event) is None
+
+    tracer = trace.get_tracer(__name__)
+    with tracer.start_as_current_span("test") as span:
+        inject_context(event)
+
+    context = extract_context(event)
+    assert trace.get_current_span(context).get_span_context().span_id == (
+        span.get_span_context().span_id
+    )
@@ -0,0 +1,31 @@
+"""Tests for :class:`RateLimiter`."""
+
+from nowplaying.ratelimit import RateLimiter
+
+
+def test_acquire():
+    """Test that buckets refill over time up to the burst."""
+    limiter = RateLimiter(rate=2.0, burst=1)
+
+    assert limiter.acquire("a", now=0.0) == 0
+    assert limiter.acquire("a", now=0.0) == 0.5  # noqa: PLR2004
+    assert limiter.acquire("a", now=0.25) == 0.25  # noqa: PLR2004
+    assert limiter.acquire("a", now=10.0) == 0
+    assert limiter.acquire("b", now=10.0) == 0
+
+
+def test_disabled():
+    """Test that a rate of 0 never limits."""
+    limiter = RateLimiter(rate=0.0, burst=0)
+    assert all(limiter.acquire("a") == 0 for _ in range(10))
+
+
+def test_maxsize():
+    """Test that the least recently seen clients get forgotten."""
+    limiter = RateLimiter(rate=1.0, burst=1, maxsize=1)
+
+    limiter.acquire("a", now=0.0)
+    limiter.acquire("b", now=0.0)
+
+    assert limiter.acquire("a", now=0.0) == 0
+    assert limiter.acquire("b", now=0.0) == 0
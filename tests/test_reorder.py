@@ -0,0 +1,70 @@
+"""Tests for :class:`nowplaying.reorder.ReorderBuffer`."""
+
+from datetime import UTC, datetime, timedelta
+
+from cloudevents.http import CloudEvent
+
+from nowplaying.reorder import ReorderBuffer, _event_time
+
+_STARTED = "ch.rabe.api.events.track.v1.trackStarted"
+_FINISHED = "ch.rabe.api.events.track.v1.trackFinished"
+
+
+def _event(event_type, minute, source="klangbecken"):
+    return CloudEvent(
+        {
+            "type": event_type,
+            "source": source,
+            "time": f"2021-12-28T19:{minute:02}:00Z",
+        },
+    )
+
+
+def test_reorder():
+    """Test that events get released in event time order once their window passed."""
+    buffer = ReorderBuffer(window=1)
+    earlier = _event(_FINISHED, 30)
+    later = _event(_FINISHED, 31)
+    buffer.push(later, now=10)
+    buffer.push(earlier, now=10.5)
+
+    # the earlier event arrived last, it holds back the later event
+    assert buffer.next_release() == 11.5  # noqa: PLR2004
+    assert buffer.pop_ready(now=11) == []
+    assert len(buffer) == 2  # noqa: PLR2004
+    assert buffer.pop_ready(now=11.5) == [earlier, later]
+    assert buffer.next_release() is None
+
+
+def test_drop_late():
+    """Test that events older than released ones get dropped."""
+    buffer = ReorderBuffer(window=0)
+    buffer.push(_event(_STARTED, 31), now=0)
+    assert len(buffer.pop_ready(now=0)) == 1
+
+    buffer.push(_event(_FINISHED, 30), now=1)
+    assert not buffer
+    # other sources are not affected
+    buffer.push(_event(_FINISHED, 30, source="other"), now=1)
+    assert len(buffer) == 1
+
+
+def test_drop_superseded():
+    """Test that a newer trackStarted supersedes events released with it."""
+    buffer = ReorderBuffer(window=0)
+    first = _event(_STARTED, 30)
+    other = _event(_STARTED, 30, source="other")
+    finished = _event(_FINISHED, 31)
+    second = _event(_STARTED, 31)
+    last = _event(_FINISHED, 32)
+    for event in (last, second, finished, other, first):
+        buffer.push(event, now=0)
+
+    assert buffer.pop_ready(now=0) == [other, second, last]
+
+
+def test_event_time():
+    """Test parsing event times."""
+    naive = {"time": "2021-12-28T19:31:00"}
+    assert _event_time(naive) == datetime(2021, 12, 28, 19, 31, tzinfo=UTC)
+    assert datetime.now(UTC) - _event_time({}) < timedelta(seconds=1)
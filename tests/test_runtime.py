@@ -0,0 +1,60 @@
+"""Tests for :mod:`nowplaying.runtime`."""
+
+import asyncio
+import threading
+
+import pytest
+
+from nowplaying.runtime import AsyncRuntime, call_async, call_sync
+
+
+@pytest.fixture(name="runtime")
+def fixture_runtime():
+    runtime = AsyncRuntime(max_workers=2)
+    runtime.start()
+    yield runtime
+    runtime.stop()
+
+
+async def _async_add(a, b):
+    await asyncio.sleep(0)
+    return a + b
+
+
+def _sync_add(a, b):
+    return a + b
+
+
+def test_run(runtime):
+    """Test that :meth:`AsyncRuntime.run` runs coroutines on the loop thread."""
+
+    async def _thread_name():
+        return threading.current_thread().name
+
+    assert runtime.run(_thread_name()) == "nowplaying-asyncio"
+
+
+def test_submit(runtime):
+    """Test that :meth:`AsyncRuntime.submit` returns a future."""
+    future = runtime.submit(_async_add(1, 2))
+
+    assert future.result(timeout=1) == 3  # noqa: PLR2004
+
+
+def test_call_async(runtime):
+    """Test that :func:`call_async` handles sync and async functions."""
+
+    async def _call():
+        return (
+            await call_async(_async_add, 1, 2),
+            await call_async(_sync_add, 3, 4),
+        )
+
+    assert runtime.run(_call()) == (3, 7)
+
+
+def test_call_sync(runtime):
+    """Test that :func:`call_sync` handles sync and async functions."""
+    assert call_sync(_sync_add, 1, 2) == 3  # noqa: PLR2004
+    assert call_sync(_async_add, 3, 4) == 7  # noqa: PLR2004
+    assert call_sync(_async_add, 5, 6, runtime=runtime) == 11  # noqa: PLR2004
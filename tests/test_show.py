@@ -58,3 +58,22 @@ def test_prettyprinting():
     """Test :class:`Show`'s :meth:`__str__` method."""
     show = Show()
     assert "Show ''" in str(show)
+
+
+def test_to_dict_from_dict():
+    """Test that :meth:`Show.to_dict` round trips through :meth:`Show.from_dict`."""
+    show = Show()
+    show.set_name("Test")
+    show.set_url("http://example.com/show")
+    show.set_endtime(datetime(2020, 1, 1, 12, tzinfo=pytz.timezone("UTC")))
+
+    data = show.to_dict()
+    assert data["name"] == "Test"
+    assert data["endtime"] == "2020-01-01T12:00:00+00:00"
+
+    copy = Show.from_dict(data)
+    assert copy.uuid == show.uuid
+    assert copy.name == show.name
+    assert copy.url == show.url
+    assert copy.starttime == show.starttime
+    assert copy.endtime == show.endtime
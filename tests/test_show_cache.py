@@ -0,0 +1,61 @@
+"""Tests for :class:`ShowCache`."""
+
+import json
+from datetime import datetime, timedelta
+
+import pytz
+
+from nowplaying.show.cache import VERSION, ShowCache
+from nowplaying.show.show import Show
+from nowplaying.show.timeline import ShowTimeline
+
+_NOW = datetime(2024, 1, 1, 12, tzinfo=pytz.timezone("UTC"))
+
+
+def _show(name: str, starttime: datetime) -> Show:
+    show = Show()
+    show.set_name(name)
+    show.set_starttime(starttime)
+    show.set_endtime(starttime + timedelta(hours=1))
+    return show
+
+
+def test_save_and_load(tmp_path):
+    """Test that the timeline and validators survive a round trip."""
+    path = tmp_path / "shows.json"
+    current = _show("current", _NOW)
+    later = _show("later", _NOW + timedelta(hours=1))
+
+    ShowCache(str(path)).save(ShowTimeline([current, later]), {"If-None-Match": "a"})
+    timeline, validators = ShowCache(str(path)).load()
+
+    assert [show.to_dict() for show in timeline] == [
+        current.to_dict(),
+        later.to_dict(),
+    ]
+    assert validators == {"If-None-Match": "a"}
+    assert [p.name for p in tmp_path.iterdir()] == ["shows.json"]
+
+
+def test_load_missing(tmp_path):
+    """Test that a missing cache is empty."""
+    assert ShowCache(str(tmp_path / "shows.json")).load() is None
+
+
+def test_load_invalid(tmp_path, caplog):
+    """Test that broken caches get ignored."""
+    path = tmp_path / "shows.json"
+    path.write_text("{")
+    assert ShowCache(str(path)).load() is None
+    assert "Failed to load show cache" in caplog.text
+
+    path.write_text(json.dumps({"version": VERSION + 1}))
+    assert ShowCache(str(path)).load() is None
+
+
+def test_save_error(tmp_path, caplog):
+    """Test that failing to save the cache only gets logged."""
+    cache = ShowCache(str(tmp_path / "missing" / "shows.json"))
+    cache.save(ShowTimeline([_show("current", _NOW)]), {})
+    assert "Failed to save show cache" in caplog.text
+    assert cache.load() is None
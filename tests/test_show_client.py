@@ -1,6 +1,8 @@
 """Tests for :class:`ShowClient`."""
 
 import json
+import math
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 from unittest.mock import Mock, patch
@@ -9,8 +11,20 @@ import pytest
 import pytz
 import requests
 
-from nowplaying.show.client import ShowClient, ShowClientError
+from nowplaying.show.cache import ShowCache
+from nowplaying.show.client import (
+    _LOOKUP_DURATION,
+    _LOOKUP_FAILURES,
+    _LOOKUP_NOT_MODIFIED,
+    CONNECT_TIMEOUT,
+    READ_TIMEOUT,
+    SESSION,
+    ShowClient,
+    ShowClientError,
+    create_session,
+)
 from nowplaying.show.show import Show
+from nowplaying.show.timeline import ShowTimeline
 
 _BASE_URL = "http://example.com/api/live-info-v2/format/json"
 
@@ -25,6 +39,288 @@ def test_init():
     """Test :class:`ShowClient`'s :meth:`.__init__` method."""
     show_client = ShowClient(_BASE_URL)
     assert show_client.current_show_url == _BASE_URL
+    assert show_client.session is SESSION
+
+
+def test_create_session():
+    """Test that sessions keep a bounded pool of connections."""
+    session = create_session(pool_maxsize=2)
+    for prefix in ("http://", "https://"):
+        adapter = session.get_adapter(prefix)
+        assert adapter._pool_maxsize == 2  # noqa: PLR2004, SLF001
+        assert adapter._pool_block  # noqa: SLF001
+
+
+def test_update_uses_session():
+    """Test that lookups go through the session with both timeouts."""
+    session = Mock()
+    session.get.return_value.json.return_value = json.loads(
+        file_get_contents("tests/fixtures/cast_now_during_show.json"),
+    )
+    show_client = ShowClient(_BASE_URL, session=session)
+    show_client.update()
+    session.get.assert_called_once_with(
+        _BASE_URL,
+        headers={},
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+    )
+    assert show_client.show.name == "Voice of Hindu Kush"
+
+
+def _conditional_session():
+    session = Mock()
+    response = session.get.return_value
+    response.status_code = 200
+    response.headers = {
+        "ETag": '"abc"',
+        "Last-Modified": "Sun, 27 Jan 2019 13:00:00 GMT",
+    }
+    response.json.return_value = json.loads(
+        file_get_contents("tests/fixtures/cast_now_during_show.json"),
+    )
+    return session
+
+
+def test_update_not_modified():
+    """Test that the parsed show gets reused when LibreTime answers with 304."""
+    session = _conditional_session()
+    on_change = Mock()
+    show_client = ShowClient(_BASE_URL, session=session, on_change=on_change)
+    show_client.update()
+    show = show_client.show
+
+    session.get.return_value.status_code = 304
+    session.get.return_value.json.side_effect = ValueError
+    not_modified = _LOOKUP_NOT_MODIFIED.get()
+    show_client.update()
+
+    assert session.get.call_args.kwargs["headers"] == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Sun, 27 Jan 2019 13:00:00 GMT",
+    }
+    assert _LOOKUP_NOT_MODIFIED.get() == not_modified + 1
+    assert show_client.show.name == "Voice of Hindu Kush"
+    assert show_client.show is show
+    on_change.assert_called_once_with()
+
+
+def test_update_not_modified_without_validators():
+    """Test that a 304 for an unconditional lookup keeps the default show."""
+    session = _conditional_session()
+    session.get.return_value.status_code = 304
+    show_client = ShowClient(_BASE_URL, session=session)
+    show_client.update()
+    assert show_client.show.name == ""
+
+
+def test_update_not_modified_past_show():
+    """Test that a cached show that has ended doesn't get reused."""
+    session = _conditional_session()
+    show_client = ShowClient(_BASE_URL, session=session)
+    show_client.update()
+    show_client.show.endtime = datetime.now(pytz.timezone("UTC"))
+
+    session.get.return_value.status_code = 304
+    show_client.update()
+    assert show_client.show.name == ""
+
+
+def test_update_on_change():
+    """Test that the caller gets told when an update changed the show."""
+    on_change = Mock()
+    show_client = ShowClient(
+        _BASE_URL,
+        session=_conditional_session(),
+        on_change=on_change,
+    )
+    show_client.update()
+    on_change.assert_called_once_with()
+
+
+def test_update_same_show():
+    """Test that looking up the same show again keeps its uuid."""
+    on_change = Mock()
+    show_client = ShowClient(
+        _BASE_URL,
+        session=_conditional_session(),
+        on_change=on_change,
+    )
+    show_client.update()
+    show = show_client.show
+
+    show_client.update()
+    assert show_client.show is not show
+    assert show_client.show.uuid == show.uuid
+    assert next(iter(show_client.timeline)).uuid == show.uuid
+    on_change.assert_called_once_with()
+
+
+def test_update_on_change_failed():
+    """Test that failed updates don't tell the caller about a change."""
+    on_change = Mock()
+    session = Mock()
+    session.get.side_effect = requests.exceptions.ConnectionError
+    show_client = ShowClient(_BASE_URL, session=session, on_change=on_change)
+    show_client.update()
+    on_change.assert_not_called()
+
+
+def _schedule(current, *upcoming):
+    """Return live-info with shows given as (name, starts, ends) in UTC."""
+
+    def _show(name, starts, ends):
+        return {
+            "name": name,
+            "url": f"https://www.rabe.ch/{name}/",
+            "starts": starts.strftime("%Y-%m-%d %H:%M:%S"),
+            "ends": ends.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    return {
+        "station": {"timezone": "UTC"},
+        "shows": {
+            "current": _show(*current) if current else None,
+            "next": [_show(*show) for show in upcoming],
+        },
+    }
+
+
+def _show(name, starts, ends):
+    show = Show()
+    show.set_name(name)
+    show.set_starttime(starts)
+    show.set_endtime(ends)
+    return show
+
+
+def test_update_timeline():
+    """Test that the current and upcoming shows end up in the timeline."""
+    now = datetime.now(pytz.timezone("UTC")).replace(microsecond=0)
+    hour = timedelta(hours=1)
+    session = Mock()
+    session.get.return_value.json.return_value = _schedule(
+        ("current", now - hour, now + hour),
+        ("next", now + hour, now + 2 * hour),
+        ("", now + 2 * hour, now + 3 * hour),
+        ("later", now + 3 * hour, now + 4 * hour),
+    )
+    show_client = ShowClient(_BASE_URL, session=session)
+    show_client.update()
+
+    assert show_client.show.name == "current"
+    assert [show.name for show in show_client.timeline] == [
+        "current",
+        "next",
+        "later",
+    ]
+
+
+def test_update_timeline_without_current_show():
+    """Test that updates wait for the next show when there is no current one."""
+    now = datetime.now(pytz.timezone("UTC")).replace(microsecond=0)
+    hour = timedelta(hours=1)
+    session = Mock()
+    session.get.return_value.json.return_value = _schedule(
+        None,
+        ("next", now + hour, now + 2 * hour),
+    )
+    show_client = ShowClient(_BASE_URL, session=session)
+    show_client.update()
+
+    assert show_client.show.name == ""
+    assert show_client.show.endtime == now + hour - timedelta(minutes=15)
+    assert [show.name for show in show_client.timeline] == ["next"]
+
+
+def test_lazy_update_from_timeline():
+    """Test that show changes are resolved from the timeline without lookups."""
+    now = datetime.now(pytz.timezone("UTC"))
+    hour = timedelta(hours=1)
+    session = Mock()
+    show_client = ShowClient(_BASE_URL, session=session, max_age=math.inf)
+    show_client.timeline = ShowTimeline(
+        [
+            _show("previous", now - hour, now),
+            _show("next", now + timedelta(minutes=5), now + hour),
+        ],
+    )
+    show_client.show = show_client.timeline.at(now - hour)
+
+    show_client.lazy_update()
+
+    assert show_client.show.name == "next"
+    session.get.assert_not_called()
+
+
+def test_lazy_update_after_timeline():
+    """Test that the show gets updated once the timeline runs out."""
+    now = datetime.now(pytz.timezone("UTC"))
+    hour = timedelta(hours=1)
+    show_client = ShowClient(_BASE_URL, session=Mock())
+    show_client.timeline = ShowTimeline([_show("next", now + hour, now + 2 * hour)])
+    show_client.revalidate = Mock()
+
+    show_client.lazy_update()
+
+    show_client.revalidate.assert_called_once()
+    # the default show lasts until the next show in the timeline gets picked
+    assert show_client.show.endtime == now + hour - timedelta(minutes=15)
+
+
+def test_revalidate():
+    """Test that updates run in the background one at a time."""
+    fetching = threading.Event()
+    release = threading.Event()
+    data = json.loads(file_get_contents("tests/fixtures/cast_now_during_show.json"))
+
+    def _get(*_, **__):
+        fetching.set()
+        release.wait()
+        return Mock(**{"json.return_value": data})
+
+    session = Mock(**{"get.side_effect": _get})
+    show_client = ShowClient(_BASE_URL, session=session)
+
+    show_client.revalidate()
+    assert fetching.wait(timeout=5)
+    # the last known show is served while the update runs
+    assert show_client.get_show_info(force_update=True).name == ""
+    release.set()
+    show_client._refresh.join()  # noqa: SLF001
+
+    assert session.get.call_count == 1
+    assert show_client.show.name == "Voice of Hindu Kush"
+    assert not show_client.stale
+
+    # updates don't happen more often than every few seconds unless forced
+    show_client.revalidate()
+    show_client._refresh.join()  # noqa: SLF001
+    assert session.get.call_count == 1
+    show_client.revalidate(force=True)
+    show_client._refresh.join()  # noqa: SLF001
+    assert session.get.call_count == 2  # noqa: PLR2004
+
+
+def test_revalidate_error():
+    """Test that failed background updates keep the last known show."""
+    session = Mock()
+    session.get.return_value.json.return_value = json.loads(
+        file_get_contents("tests/fixtures/cast_now_during_show.json"),
+    )
+    show_client = ShowClient(_BASE_URL, session=session)
+    show_client.update()
+    show = show_client.show
+
+    session.get.return_value.json.return_value = json.loads(
+        file_get_contents("tests/fixtures/cast_now_past_show.json"),
+    )
+    show_client.revalidate(force=True)
+    show_client._refresh.join()  # noqa: SLF001
+    assert show_client.show is show
+
+    session.get.side_effect = requests.exceptions.ConnectionError()
+    show_client.update()
+    assert show_client.show is show
 
 
 def test_get_show_info():
@@ -42,28 +338,44 @@ def test_get_show_info_with_force_update_true():
     """Test :class:`ShowClient`'s :meth:`get_show_info` with force_update=True."""
     show_client = ShowClient(_BASE_URL)
     show_client.lazy_update = Mock()
-    show_client.update = Mock()
+    show_client.revalidate = Mock()
 
     show_client.get_show_info(force_update=True)
-    show_client.lazy_update.assert_not_called()
-    show_client.update.assert_called_once()
+    show_client.lazy_update.assert_called_once()
+    show_client.revalidate.assert_called_once_with(force=True)
 
 
 def test_lazy_update():
     """Test :class:`ShowClient`'s :meth:`lazy_update` method."""
     show_client = ShowClient(_BASE_URL)
-    show_client.update = Mock()
+    show_client.revalidate = Mock()
     show_client.get_show_info = Mock()
 
-    # it calls update if the show is not set
+    # it revalidates if the show is not set
     show_client.lazy_update()
-    show_client.update.assert_called_once()
+    show_client.revalidate.assert_called_once()
+    assert show_client.show.name == ""
+    assert show_client.show.endtime > datetime.now(pytz.timezone("UTC"))
+
+
+def test_lazy_update_stale():
+    """Test that running shows get revalidated once they are older than max_age."""
+    show_client = ShowClient(_BASE_URL, max_age=0)
+    show_client.revalidate = Mock()
+    show = Show()
+    show.endtime = datetime.now(pytz.timezone("UTC")) + timedelta(hours=1)
+    show_client.show = show
+
+    assert show_client.stale
+    show_client.lazy_update()
+    show_client.revalidate.assert_called_once()
+    assert show_client.show is show
 
 
 @patch("logging.Logger.debug")
 def test_lazy_update_with_show_set(mock_logger_debug):
     """Test :class:`ShowClient`'s :meth:`lazy_update` method with a show set."""
-    show_client = ShowClient(_BASE_URL)
+    show_client = ShowClient(_BASE_URL, max_age=math.inf)
     show_client.update = Mock()
     show_client.get_show_info = Mock()
     show = Show()
@@ -78,7 +390,7 @@ def test_lazy_update_with_show_set(mock_logger_debug):
     )
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_update(mock_requests_get):
     """Test :class:`ShowClient`'s :meth:`update` method."""
     mock_requests_get.return_value.json = Mock(
@@ -106,20 +418,24 @@ def test_update(mock_requests_get):
     assert show_client.show.url == "https://www.rabe.ch/stimme-der-kutuesch/"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_update_connection_error(mock_requests_get):
     """Test :class:`ShowClient`'s :meth:`update` method when a connection error occurs.
 
     It should not crash if external api refuses to connect.
     """
     mock_requests_get.side_effect = requests.exceptions.ConnectionError()
+    failures = _LOOKUP_FAILURES.get()
+    lookups = _LOOKUP_DURATION.get_count()
     show_client = ShowClient(_BASE_URL)
     show_client.update()
     assert show_client.show.name == ""
+    assert _LOOKUP_FAILURES.get() == failures + 1
+    assert _LOOKUP_DURATION.get_count() == lookups + 1
     assert show_client.show.url == "https://www.rabe.ch"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_update_no_url(mock_requests_get):
     """Test :class:`ShowClient`'s :meth:`update` method when no url is returned."""
     mock_requests_get.return_value.json = Mock(
@@ -132,7 +448,7 @@ def test_update_no_url(mock_requests_get):
     assert show_client.show.url == "https://www.rabe.ch"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 @pytest.mark.parametrize(
     ("fixture", "field"),
     [
@@ -152,7 +468,7 @@ def test_update_empty_field(mock_requests_get, fixture, field):
     assert str(info.value) == f"Missing show {field}"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_update_past_show(mock_requests_get):
     """Test :class:`ShowClient`'s :meth:`update` method when the show is in the past."""
     mock_requests_get.return_value.json = Mock(
@@ -166,7 +482,7 @@ def test_update_past_show(mock_requests_get):
     assert str(info.value) == "Show end time (2019-01-27 14:00:00+00:00) is in the past"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_update_show_empty(mock_requests_get):
     """Test :class:`ShowClient`'s :meth:`update` method when the show is empty.
 
@@ -183,7 +499,7 @@ def test_update_show_empty(mock_requests_get):
     assert show_client.show.url == "https://www.rabe.ch"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_update_show_encoding_fix_in_name(mock_requests_get):
     """Test :class:`ShowClient`'s :meth:`update` for show name with encoding fix."""
     mock_requests_get.return_value.json = Mock(
@@ -196,7 +512,7 @@ def test_update_show_encoding_fix_in_name(mock_requests_get):
     assert show_client.show.name == "Rhythm & Blues Juke Box öç &nope;"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_update_when_show_is_in_next_array(mock_requests_get):
     """Test :class:`ShowClient`'s :meth:`update` method."""
     mock_requests_get.return_value.json = Mock(
@@ -222,3 +538,21 @@ def test_update_when_show_is_in_next_array(mock_requests_get):
         tzinfo=pytz.timezone("UTC"),
     )
     assert show_client.show.url == "https://www.rabe.ch/stimme-der-kutuesch/"
+
+
+def test_cache(tmp_path):
+    """Test that the cached timeline is served until LibreTime answers."""
+    cache = ShowCache(str(tmp_path / "shows.json"))
+    session = _conditional_session()
+    ShowClient(_BASE_URL, session=session, cache=cache).update()
+
+    session.get.side_effect = requests.exceptions.ConnectionError()
+    show_client = ShowClient(_BASE_URL, session=session, cache=cache)
+    show_client.revalidate = Mock()
+
+    assert show_client.get_show_info().name == "Voice of Hindu Kush"
+    # cached show info still needs to be revalidated
+    show_client.revalidate.assert_called_once()
+    show_client.update()
+    assert show_client.show.name == "Voice of Hindu Kush"
+    assert session.get.call_args.kwargs["headers"]["If-None-Match"] == '"abc"'
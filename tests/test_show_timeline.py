@@ -0,0 +1,36 @@
+"""Tests for :class:`ShowTimeline`."""
+
+from datetime import datetime, timedelta
+
+import pytz
+
+from nowplaying.show.show import Show
+from nowplaying.show.timeline import ShowTimeline
+
+_NOW = datetime(2024, 1, 1, 12, tzinfo=pytz.timezone("UTC"))
+_HOUR = timedelta(hours=1)
+
+
+def _show(name: str, starttime: datetime, endtime: datetime) -> Show:
+    show = Show()
+    show.set_name(name)
+    show.set_starttime(starttime)
+    show.set_endtime(endtime)
+    return show
+
+
+def test_timeline():
+    """Test that shows are looked up by time in the order they start."""
+    later = _show("later", _NOW + 2 * _HOUR, _NOW + 3 * _HOUR)
+    current = _show("current", _NOW, _NOW + _HOUR)
+    timeline = ShowTimeline([later, current])
+
+    assert len(timeline) == 2  # noqa: PLR2004
+    assert list(timeline) == [current, later]
+    assert timeline.at(_NOW - _HOUR) is None
+    assert timeline.at(_NOW) is current
+    assert timeline.at(_NOW + _HOUR) is None
+    assert timeline.at(_NOW + 2 * _HOUR) is later
+    assert timeline.next(_NOW - _HOUR) is current
+    assert timeline.next(_NOW) is later
+    assert timeline.next(_NOW + 2 * _HOUR) is None
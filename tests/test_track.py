@@ -83,6 +83,17 @@ def test_endtime():
         track.set_endtime("2019-01-01")
 
 
+def test_event_time():
+    """Test :class:`Track`'s :meth:`event_time` property."""
+    track = Track()
+    assert track.event_time is None
+    time = datetime.now(pytz.timezone("UTC"))
+    track.set_event_time(time)
+    assert track.event_time == time
+    with pytest.raises(TrackError):
+        track.set_event_time("2019-01-01")
+
+
 def test_show():
     """Test :class:`Track`'s :meth:`show` property."""
     track = Track()
@@ -103,3 +114,25 @@ def test_prettyprinting():
     """Test :class:`Track`'s :meth:`__str__` method."""
     track = Track()
     assert "Track ''" in str(track)
+
+
+def test_to_dict_from_dict(track_factory, show_factory):
+    """Test that :meth:`Track.to_dict` round trips through :meth:`Track.from_dict`."""
+    track = track_factory()
+    assert track.to_dict()["show"] is None
+    assert not hasattr(Track.from_dict(track.to_dict()), "show")
+
+    track.set_show(show_factory())
+    data = track.to_dict()
+    assert data["artist"] == "Hairmare and the Band"
+    assert data["show"]["name"] == "Hairmare Traveling Medicine Show"
+
+    copy = Track.from_dict(data)
+    assert copy.uuid == track.uuid
+    assert copy.artist == track.artist
+    assert copy.title == track.title
+    assert copy.album == track.album
+    assert copy.track == track.track
+    assert copy.starttime == track.starttime
+    assert copy.endtime == track.endtime
+    assert copy.show.uuid == track.show.uuid
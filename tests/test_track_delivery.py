@@ -0,0 +1,282 @@
+"""Tests for :class:`DeliveryWorker`."""
+
+import asyncio
+import threading
+import time
+
+from opentelemetry import trace
+
+from nowplaying.health import OBSERVER_LAST_SUCCESS
+from nowplaying.track.delivery import (
+    _DELIVERIES,
+    _DELIVERY_DURATION,
+    DeliveryWorker,
+    observer_label,
+)
+from nowplaying.track.latency import LatencyTracker
+from nowplaying.track.retry import RetryPolicy
+
+from .conftest import DummyObserver
+
+
+class _BlockingObserver(DummyObserver):
+    """Observer that blocks on its first call until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.busy = threading.Event()
+        self.release = threading.Event()
+
+    def track_started(self, track):
+        self.calls.append(("track_started", track))
+        self.busy.set()
+        self.release.wait(1)
+
+    def track_finished(self, track):
+        self.calls.append(("track_finished", track))
+
+
+class _SlowAsyncObserver(DummyObserver):
+    async def track_started(self, track):  # noqa: ARG002
+        await asyncio.sleep(1)
+
+
+def test_submit(track_factory):
+    """Test that events get delivered and report their results."""
+    observer = _BlockingObserver()
+    observer.release.set()
+    worker = DeliveryWorker(observer, timeout=1)
+    track = track_factory()
+    labels = {"observer": "_BlockingObserver", "hook": "track_started"}
+    delivered = _DELIVERIES.get(endpoint="", status="ok", **labels)
+    observed = _DELIVERY_DURATION.get_count(**labels)
+
+    result = worker.submit("track_started", track).result(timeout=1)
+
+    assert result.ok
+    assert result.status == "ok"
+    assert observer.calls == [("track_started", track)]
+    assert _DELIVERIES.get(endpoint="", status="ok", **labels) == delivered + 1
+    assert _DELIVERY_DURATION.get_count(**labels) == observed + 1
+    worker.stop()
+
+
+def test_observer_label():
+    """Test that observers are labeled by their name and endpoint."""
+    observer = _BlockingObserver()
+    assert observer_label(observer) == "TrackObserver"
+    observer.get_endpoint = lambda: "http://localhost:8000"
+    assert observer_label(observer) == "TrackObserver http://localhost:8000"
+
+
+def test_submit_marks_observer_delivered(track_factory):
+    """Test that health reports successful deliveries per endpoint."""
+    observer = _BlockingObserver()
+    observer.release.set()
+    observer.get_endpoint = lambda: "http://localhost:8000"
+    worker = DeliveryWorker(observer, timeout=1)
+
+    worker.submit("track_started", track_factory()).result(timeout=1)
+
+    label = "TrackObserver http://localhost:8000"
+    assert OBSERVER_LAST_SUCCESS.get(observer=label) > 0
+    worker.stop()
+
+
+def test_submit_records_latency(track_factory):
+    """Test that delivered track-started events record their latency."""
+    observer = _BlockingObserver()
+    observer.release.set()
+    latency = LatencyTracker()
+    worker = DeliveryWorker(observer, timeout=1, latency=latency)
+    track = track_factory()
+    track.set_event_time(track.starttime)
+
+    worker.submit("track_started", track).result(timeout=1)
+    worker.submit("track_finished", track).result(timeout=1)
+
+    assert latency.summary()["TrackObserver"]["count"] == 1
+    worker.stop()
+
+
+def test_submit_trace_context(track_factory, spans):
+    """Test that deliveries continue the trace they were submitted in."""
+    observer = _BlockingObserver()
+    observer.release.set()
+    worker = DeliveryWorker(observer, timeout=1)
+
+    with trace.get_tracer(__name__).start_as_current_span("submit") as parent:
+        worker.submit("track_started", track_factory()).result(timeout=1)
+
+    span = next(
+        span
+        for span in spans.get_finished_spans()
+        if span.parent and span.parent.span_id == parent.get_span_context().span_id
+    )
+    assert span.name == "_BlockingObserver.track_started"
+    assert span.status.is_ok
+    worker.stop()
+
+
+def test_submit_supersedes_waiting_events(track_factory):
+    """Test that a new track replaces everything waiting for a busy observer."""
+    observer = _BlockingObserver()
+    worker = DeliveryWorker(observer, timeout=1)
+    first, second, third = track_factory(), track_factory(), track_factory()
+
+    worker.submit("track_started", first)
+    assert observer.busy.wait(1)
+    finished = worker.submit("track_finished", first)
+    superseded = worker.submit("track_started", second)
+    latest = worker.submit("track_started", third)
+
+    assert finished.result(timeout=1).superseded
+    assert superseded.result(timeout=1).status == "superseded"
+    observer.release.set()
+    assert latest.result(timeout=1).ok
+    assert observer.calls == [("track_started", first), ("track_started", third)]
+    worker.stop()
+
+
+def test_submit_bounds_queue(track_factory):
+    """Test that the oldest event is dropped once the queue is full."""
+    observer = _BlockingObserver()
+    worker = DeliveryWorker(observer, timeout=1, queue_size=1)
+    first, second, third = track_factory(), track_factory(), track_factory()
+
+    worker.submit("track_started", first)
+    assert observer.busy.wait(1)
+    dropped = worker.submit("track_finished", second)
+    kept = worker.submit("track_finished", third)
+
+    assert dropped.result(timeout=1).superseded
+    observer.release.set()
+    assert kept.result(timeout=1).ok
+    worker.stop()
+
+
+def test_stop_drops_waiting_events(track_factory):
+    """Test that stopping a worker resolves all waiting events."""
+    observer = _BlockingObserver()
+    worker = DeliveryWorker(observer, timeout=1)
+    labels = {
+        "observer": "_BlockingObserver",
+        "endpoint": "",
+        "hook": "track_finished",
+        "status": "superseded",
+    }
+    dropped = _DELIVERIES.get(**labels)
+
+    worker.submit("track_started", track_factory())
+    assert observer.busy.wait(1)
+    waiting = worker.submit("track_finished", track_factory())
+    worker.stop()
+
+    assert waiting.result(timeout=1).superseded
+    assert _DELIVERIES.get(**labels) == dropped + 1
+    observer.release.set()
+
+
+def test_deliver_async_timeout(track_factory):
+    """Test that async observers get cancelled once their deadline passes."""
+    worker = DeliveryWorker(_SlowAsyncObserver(), timeout=0.01)
+
+    result = worker.deliver("track_started", track_factory())
+
+    assert result.timed_out
+    assert result.status == "timeout"
+    worker.stop()
+
+
+class _FlakyObserver(DummyObserver):
+    """Observer that fails a number of times before succeeding."""
+
+    retry = True
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def track_started(self, track):  # noqa: ARG002
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError
+
+
+def test_deliver_retries(track_factory):
+    """Test that failed deliveries get retried until they succeed."""
+    observer = _FlakyObserver(failures=2)
+    worker = DeliveryWorker(
+        observer,
+        timeout=1,
+        retry_policy=RetryPolicy(attempts=3, backoff=0.001),
+    )
+
+    result = worker.deliver("track_started", track_factory())
+
+    assert result.ok
+    assert result.attempts == 3  # noqa: PLR2004
+    assert observer.calls == 3  # noqa: PLR2004
+    worker.stop()
+
+
+def test_deliver_gives_up(track_factory, spans):
+    """Test that retries stop once the policy runs out of attempts."""
+    observer = _FlakyObserver(failures=5)
+    worker = DeliveryWorker(
+        observer,
+        timeout=1,
+        retry_policy=RetryPolicy(attempts=2, backoff=0.001),
+    )
+
+    with trace.get_tracer(__name__).start_as_current_span("deliver") as parent:
+        result = worker.deliver("track_started", track_factory())
+
+    assert result.status == "failed"
+    assert isinstance(result.error, ConnectionError)
+    assert observer.calls == 2  # noqa: PLR2004
+    (span,) = [
+        span
+        for span in spans.get_finished_spans()
+        if span.parent and span.parent.span_id == parent.get_span_context().span_id
+    ]
+    assert span.attributes["nowplaying.delivery.attempts"] == 2  # noqa: PLR2004
+    assert not span.status.is_ok
+    worker.stop()
+
+
+def test_deliver_retry_cancelled_by_newer_track(track_factory):
+    """Test that a newer track cancels a pending retry."""
+    observer = _FlakyObserver(failures=5)
+    worker = DeliveryWorker(
+        observer,
+        timeout=1,
+        retry_policy=RetryPolicy(attempts=5, backoff=10, jitter=0.0),
+    )
+
+    first = worker.submit("track_started", track_factory())
+    while observer.calls == 0:
+        time.sleep(0.001)
+    worker.submit("track_started", track_factory())
+    result = first.result(timeout=1)
+
+    assert result.superseded
+    assert result.attempts == 1
+    worker.stop()
+
+
+def test_deliver_retry_cancelled_by_stop(track_factory):
+    """Test that stopping the worker cancels a pending retry."""
+    observer = _FlakyObserver(failures=5)
+    worker = DeliveryWorker(
+        observer,
+        timeout=1,
+        retry_policy=RetryPolicy(attempts=5, backoff=10, jitter=0.0),
+    )
+
+    first = worker.submit("track_started", track_factory())
+    while observer.calls == 0:
+        time.sleep(0.001)
+    worker.stop()
+
+    assert first.result(timeout=1).superseded
@@ -1,8 +1,18 @@
 """Tests for :class:`TrackEventHandler`."""
 
+import asyncio
+import threading
 from unittest.mock import Mock
 
+import pytest
+
+from nowplaying.runtime import AsyncRuntime
 from nowplaying.track.handler import TrackEventHandler
+from nowplaying.track.observers.base import AsyncTrackObserver
+from nowplaying.track.outbox import Outbox
+from nowplaying.track.retry import RetryPolicy
+
+from .conftest import DummyObserver
 
 
 def test_init():
@@ -35,7 +45,7 @@ def test_remove_observer(dummy_observer):
 def test_track_started(track_factory):
     """Test :class:`TrackEventHandler`'s :meth:`track_started` method."""
     track = track_factory()
-    mock_observer = Mock()
+    mock_observer = Mock(timeout=None)
 
     track_event_handler = TrackEventHandler()
     track_event_handler.register_observer(mock_observer)
@@ -48,7 +58,7 @@ def test_track_started(track_factory):
 def test_track_started_isolates_exception(track_factory):
     """Test :class:`TrackEventHandler`'s :meth:`track_started` exception isolation."""
     track = track_factory()
-    mock_observer = Mock()
+    mock_observer = Mock(timeout=None)
     mock_observer.track_started.side_effect = Exception
 
     track_event_handler = TrackEventHandler()
@@ -60,7 +70,7 @@ def test_track_started_isolates_exception(track_factory):
 def test_track_finished(track_factory):
     """Test :class:`TrackEventHandler`'s :meth:`track_finished` method."""
     track = track_factory()
-    mock_observer = Mock()
+    mock_observer = Mock(timeout=None)
 
     track_event_handler = TrackEventHandler()
     track_event_handler.register_observer(mock_observer)
@@ -73,10 +83,277 @@ def test_track_finished(track_factory):
 def test_track_finished_isolates_exception(track_factory):
     """Test :class:`TrackEventHandler`'s :meth:`track_finished` exception isolation."""
     track = track_factory()
-    mock_observer = Mock()
+    mock_observer = Mock(timeout=None)
     mock_observer.track_finished.side_effect = Exception
 
     track_event_handler = TrackEventHandler()
     track_event_handler.register_observer(mock_observer)
 
     track_event_handler.track_finished(track)
+
+
+class _AsyncObserver(AsyncTrackObserver):
+    def __init__(self, *, fail=False):
+        self.fail = fail
+        self.started = []
+        self.finished = []
+
+    async def track_started(self, track):
+        if self.fail:
+            raise RuntimeError
+        self.started.append(track)
+
+    async def track_finished(self, track):
+        if self.fail:
+            raise RuntimeError
+        self.finished.append(track)
+
+
+@pytest.fixture(name="runtime")
+def fixture_runtime():
+    runtime = AsyncRuntime(max_workers=2)
+    runtime.start()
+    yield runtime
+    runtime.stop()
+
+
+def test_track_started_async_observer(track_factory):
+    """Test that sync dispatch awaits async observers."""
+    track = track_factory()
+    observer = _AsyncObserver()
+
+    track_event_handler = TrackEventHandler()
+    track_event_handler.register_observer(observer)
+
+    track_event_handler.track_started(track)
+    track_event_handler.track_finished(track)
+
+    assert observer.started == [track]
+    assert observer.finished == [track]
+
+
+def test_track_events_with_runtime(track_factory, runtime):
+    """Test that a handler with runtime calls sync and async observers."""
+    track = track_factory()
+    async_observer = _AsyncObserver()
+    mock_observer = Mock(timeout=None)
+
+    track_event_handler = TrackEventHandler(runtime=runtime)
+    track_event_handler.register_observer(async_observer)
+    track_event_handler.register_observer(mock_observer)
+
+    track_event_handler.track_started(track)
+    track_event_handler.track_finished(track)
+
+    assert async_observer.started == [track]
+    assert async_observer.finished == [track]
+    mock_observer.track_started.assert_called_once_with(track)
+    mock_observer.track_finished.assert_called_once_with(track)
+
+
+def test_track_events_with_runtime_isolates_exception(track_factory, runtime):
+    """Test that failing observers do not stop the async dispatch."""
+    track = track_factory()
+    failing_observer = _AsyncObserver(fail=True)
+    async_observer = _AsyncObserver()
+
+    track_event_handler = TrackEventHandler(runtime=runtime)
+    track_event_handler.register_observer(failing_observer)
+    track_event_handler.register_observer(async_observer)
+
+    track_event_handler.track_started(track)
+    track_event_handler.track_finished(track)
+
+    assert async_observer.started == [track]
+    assert async_observer.finished == [track]
+
+
+class _SlowObserver(DummyObserver):
+    timeout = 0.05
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def track_started(self, track):  # noqa: ARG002
+        self.release.wait(1)
+
+
+class _SlowAsyncObserver(_AsyncObserver):
+    timeout = 0.05
+
+    async def track_started(self, track):  # noqa: ARG002
+        await asyncio.sleep(1)
+
+
+def test_track_started_results(track_factory):
+    """Test that :meth:`track_started` returns a result per observer."""
+    track = track_factory()
+    ok_observer = DummyObserver()
+    failing_observer = _AsyncObserver(fail=True)
+
+    track_event_handler = TrackEventHandler()
+    track_event_handler.register_observer(ok_observer)
+    track_event_handler.register_observer(failing_observer)
+
+    results = track_event_handler.track_started(track)
+
+    assert [result.ok for result in results] == [True, False]
+    assert isinstance(results[1].error, RuntimeError)
+    assert str(results[0]).startswith("TrackObserver  ok in ")
+    assert "failed" in str(results[1])
+
+
+def test_track_started_runs_observers_concurrently(track_factory):
+    """Test that a slow observer does not delay the others past its deadline."""
+    track = track_factory()
+    slow_observer = _SlowObserver()
+    ok_observer = DummyObserver()
+
+    track_event_handler = TrackEventHandler(timeout=5)
+    track_event_handler.register_observer(slow_observer)
+    track_event_handler.register_observer(ok_observer)
+
+    results = track_event_handler.track_started(track)
+    slow_observer.release.set()
+
+    assert results[0].timed_out
+    assert not results[0].ok
+    assert "timeout" in str(results[0])
+    assert results[0].duration < 1
+    assert results[1].ok
+
+
+def test_track_started_timeout_with_runtime(track_factory, runtime):
+    """Test that async observers get cancelled once their deadline passes."""
+    track = track_factory()
+    slow_observer = _SlowAsyncObserver()
+    ok_observer = _AsyncObserver()
+
+    track_event_handler = TrackEventHandler(runtime=runtime)
+    track_event_handler.register_observer(slow_observer)
+    track_event_handler.register_observer(ok_observer)
+
+    results = track_event_handler.track_started(track)
+
+    assert results[0].timed_out
+    assert results[1].ok
+    assert ok_observer.started == [track]
+
+
+def test_get_timeout(dummy_observer):
+    """Test that observers can override the handler's timeout."""
+    track_event_handler = TrackEventHandler(timeout=10)
+
+    assert track_event_handler.get_timeout(dummy_observer) == 10  # noqa: PLR2004
+    assert track_event_handler.get_timeout(_SlowObserver()) == 0.05  # noqa: PLR2004
+
+
+def test_track_events_async(track_factory, runtime):
+    """Test awaiting the handler from a coroutine."""
+    track = track_factory()
+    observer = _AsyncObserver()
+
+    track_event_handler = TrackEventHandler()
+    track_event_handler.register_observer(observer)
+
+    started = runtime.run(track_event_handler.track_started_async(track))
+    finished = runtime.run(track_event_handler.track_finished_async(track))
+
+    assert [result.ok for result in started + finished] == [True, True]
+    assert observer.started == [track]
+    assert observer.finished == [track]
+
+
+def test_remove_observer_stops_worker(track_factory):
+    """Test that removed observers no longer receive events."""
+    mock_observer = Mock(timeout=None)
+    track_event_handler = TrackEventHandler()
+    track_event_handler.register_observer(mock_observer)
+    track_event_handler.remove_observer(mock_observer)
+
+    assert track_event_handler.track_started(track_factory()) == []
+    mock_observer.track_started.assert_not_called()
+
+
+def test_track_started_async_timeout(track_factory, runtime):
+    """Test that waiting from a coroutine gives up once the deadline passed."""
+    track = track_factory()
+    slow_observer = _SlowObserver()
+
+    track_event_handler = TrackEventHandler()
+    track_event_handler.register_observer(slow_observer)
+
+    results = runtime.run(track_event_handler.track_started_async(track))
+    slow_observer.release.set()
+
+    assert results[0].timed_out
+
+
+def test_retry_policy_only_for_opted_in_observers(track_factory):
+    """Test that only observers with retry enabled get retried."""
+    mock_observer = Mock(timeout=None, retry=False)
+    mock_observer.track_started.side_effect = ConnectionError
+    retrying_observer = Mock(timeout=None, retry=True)
+    retrying_observer.track_started.side_effect = [ConnectionError, None]
+
+    track_event_handler = TrackEventHandler(
+        retry_policy=RetryPolicy(attempts=2, backoff=0.001),
+    )
+    track_event_handler.register_observer(mock_observer)
+    track_event_handler.register_observer(retrying_observer)
+
+    results = track_event_handler.track_started(track_factory())
+
+    assert [result.attempts for result in results] == [1, 2]
+    assert [result.ok for result in results] == [False, True]
+
+
+def test_outbox(track_factory, tmp_path):
+    """Test that successful deliveries are marked done in the outbox."""
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"))
+    ok_observer = DummyObserver()
+    failing_observer = _AsyncObserver(fail=True)
+    failing_observer.name = "Failing"
+    track = track_factory()
+
+    track_event_handler = TrackEventHandler(outbox=outbox)
+    track_event_handler.register_observer(ok_observer)
+    track_event_handler.register_observer(failing_observer)
+    track_event_handler.track_started(track)
+    track_event_handler.track_finished(track)
+
+    assert outbox.pending("TrackObserver ") is None
+    assert outbox.pending("Failing ").uuid == track.uuid
+
+
+def test_replay_outbox(track_factory, tmp_path):
+    """Test that pending deliveries get replayed to their observer."""
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"))
+    track = track_factory()
+    outbox.add("Icecast http://localhost:80/?mount=foo.mp3", track)
+    icecast_observer = Mock(timeout=None, retry=False)
+    icecast_observer.get_name.return_value = "Icecast"
+    icecast_observer.get_endpoint.return_value = "http://localhost:80/?mount=foo.mp3"
+    ticker_observer = Mock(timeout=None, retry=False)
+
+    track_event_handler = TrackEventHandler(outbox=outbox)
+    track_event_handler.register_observer(icecast_observer)
+    track_event_handler.register_observer(ticker_observer)
+    track_event_handler.replay_outbox()
+    track_event_handler.track_finished(track)  # waits for the replay
+
+    icecast_observer.track_started.assert_called_once()
+    assert icecast_observer.track_started.call_args[0][0].uuid == track.uuid
+    ticker_observer.track_started.assert_not_called()
+    assert outbox.pending("Icecast http://localhost:80/?mount=foo.mp3") is None
+
+
+def test_replay_outbox_without_outbox():
+    """Test that replaying without outbox does nothing."""
+    mock_observer = Mock(timeout=None)
+    track_event_handler = TrackEventHandler()
+    track_event_handler.register_observer(mock_observer)
+
+    track_event_handler.replay_outbox()
+
+    mock_observer.track_started.assert_not_called()
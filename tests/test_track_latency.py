@@ -0,0 +1,70 @@
+"""Tests for :class:`LatencyTracker`."""
+
+import datetime
+import logging
+
+from nowplaying.track.latency import LatencyTracker
+
+
+def test_summary():
+    """Test percentiles over the sliding window."""
+    tracker = LatencyTracker(window=60)
+    tracker.record("Old", 100.0, now=0.0)
+    for latency in range(1, 101):
+        tracker.record("Ticker", float(latency), now=100.0)
+
+    summary = tracker.summary(now=100.0)
+
+    assert list(summary) == ["Ticker"]
+    assert summary["Ticker"] == {
+        "count": 100,
+        "p50": 50.0,
+        "p90": 90.0,
+        "p99": 99.0,
+        "max": 100.0,
+        "breached": True,
+    }
+
+
+def test_objective(caplog):
+    """Test that missing and meeting the objective again gets logged once."""
+    tracker = LatencyTracker(objective=1.0, percentile=50.0, window=10)
+
+    with caplog.at_level(logging.INFO):
+        tracker.record("Icecast", 0.5, now=0.0)
+        tracker.record("Icecast", 5.0, now=1.0)
+        tracker.record("Icecast", 6.0, now=2.0)
+        tracker.record("Icecast", 0.5, now=20.0)
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == [
+        "Observer Icecast misses the latency objective, p50 is 5.000s > 1.000s",
+        "Observer Icecast meets the latency objective again",
+    ]
+    assert not tracker.summary(now=20.0)["Icecast"]["breached"]
+
+
+def test_track_delivered(track_factory):
+    """Test that latency is measured from the time of the event."""
+    tracker = LatencyTracker()
+    track = track_factory()
+    track.set_event_time(
+        datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=3),
+    )
+
+    tracker.track_delivered("Ticker", track)
+
+    assert 3 <= tracker.summary()["Ticker"]["max"] < 4  # noqa: PLR2004
+
+
+def test_track_delivered_without_event(track_factory):
+    """Test that tracks that didn't come from an event aren't recorded."""
+    tracker = LatencyTracker()
+    track = track_factory()
+    track.set_starttime(
+        datetime.datetime.now(datetime.UTC) - datetime.timedelta(hours=1),
+    )
+
+    tracker.track_delivered("Ticker", track)
+
+    assert tracker.summary() == {}
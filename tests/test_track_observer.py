@@ -4,3 +4,8 @@
 def test_get_name(dummy_observer):
     """Test :class:`TrackObserver`'s :meth:`get_name` method."""
     assert dummy_observer.get_name() == "TrackObserver"
+
+
+def test_get_endpoint(dummy_observer):
+    """Test :class:`TrackObserver`'s :meth:`get_endpoint` method."""
+    assert dummy_observer.get_endpoint() == ""
@@ -0,0 +1,39 @@
+"""Tests for :class:`BroadcastTrackObserver`."""
+
+import json
+from unittest.mock import Mock, call
+
+from nowplaying.track.observers.broadcast import BroadcastTrackObserver
+
+
+def test_track_events(track_factory, show_factory):
+    """Test that tracks get published along with show changes."""
+    broadcaster = Mock()
+    observer = BroadcastTrackObserver(broadcaster)
+    track = track_factory()
+    track.show = show_factory()
+    observer.track_started(track)
+    second = track_factory(title="Second")
+    second.show = show_factory()
+    observer.track_started(second)
+    observer.track_finished(second)
+    third = track_factory(title="Third")
+    third.show = show_factory(name="Other Show")
+    observer.track_started(third)
+
+    events = [c.args[0] for c in broadcaster.publish.call_args_list]
+    assert events == [
+        "show_changed",
+        "track_started",
+        "track_started",
+        "track_finished",
+        "show_changed",
+        "track_started",
+    ]
+    assert broadcaster.publish.call_args_list[1] == call(
+        "track_started",
+        json.dumps(track.to_dict()),
+    )
+    assert json.loads(broadcaster.publish.call_args_list[4].args[1])["name"] == (
+        "Other Show"
+    )
@@ -5,6 +5,8 @@
 
 from unittest.mock import MagicMock, Mock, patch
 
+import pytest
+
 from nowplaying.track.observers.dab_audio_companion import (
     DabAudioCompanionTrackObserver,
 )
@@ -49,6 +51,7 @@ def test_track_started(mock_requests_post, track_factory, show_factory):
     mock_requests_post.assert_called_with(
         f"{_BASE_URL}/api/setDLS",
         {"artist": "Hairmare and the Band", "title": "An Ode to legacy Python Code"},
+        timeout=60,
     )
 
     track = track_factory(artist="Radio Bern", title="Livestream")
@@ -83,6 +86,7 @@ def test_track_started(mock_requests_post, track_factory, show_factory):
     mock_requests_post.assert_called_with(
         f"{_BASE_URL}/api/setDLS",
         {"dls": "Radio Bern - Hairmare Traveling Medicine Show"},
+        timeout=60,
     )
 
     # check that short tracks dont get sent
@@ -116,6 +120,7 @@ def test_track_started_plain(mock_urlopen, track_factory, show_factory):
     assert not o.last_frame_was_dl_plus
     mock_urlopen.assert_called_with(
         "http://localhost:80/api/setDLS?dls=b%27Hairmare+and+the+Band%27+-+b%27An+Ode+to+legacy+Python+Code%27",
+        timeout=60,
     )
 
     track = track_factory(artist="Radio Bern", title="Livestream")
@@ -124,9 +129,27 @@ def test_track_started_plain(mock_urlopen, track_factory, show_factory):
     o.track_started(track)
     mock_urlopen.assert_called_with(
         "http://localhost:80/api/setDLS?dls=b%27Radio+Bern%27+-+b%27Hairmare+Traveling+Medicine+Show%27",
+        timeout=60,
     )
 
 
+@patch("urllib.request.urlopen")
+def test_track_started_plain_timeout(mock_urlopen, track_factory, show_factory):
+    """Test that a DAB+ host that doesn't answer fails the delivery."""
+    mock_urlopen.side_effect = TimeoutError
+    track = track_factory()
+    track.show = show_factory()
+    o = DabAudioCompanionTrackObserver(
+        options=DabAudioCompanionTrackObserver.Options(
+            url=_BASE_URL,
+            dl_plus=False,
+        ),
+    )
+
+    with pytest.raises(TimeoutError):
+        o.track_started(track)
+
+
 def test_track_finished():
     """Test :class:`DabAudioCompanionTrackObserver`'s :meth:`track_finished` method."""
     dab_audio_companion_track_observer = DabAudioCompanionTrackObserver(
@@ -135,3 +158,15 @@ def test_track_finished():
         ),
     )
     assert dab_audio_companion_track_observer.track_finished(Track())
+
+
+def test_get_endpoint():
+    """Test :class:`DabAudioCompanionTrackObserver`'s :meth:`get_endpoint` method."""
+    dab_audio_companion_track_observer = DabAudioCompanionTrackObserver(
+        options=DabAudioCompanionTrackObserver.Options(
+            url=_BASE_URL,
+        ),
+    )
+    assert dab_audio_companion_track_observer.get_endpoint() == (
+        f"{_BASE_URL}/api/setDLS"
+    )
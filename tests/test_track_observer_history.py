@@ -0,0 +1,70 @@
+"""Tests for :class:`HistoryTrackObserver`."""
+
+import datetime
+import json
+
+from nowplaying.track.observers.history import HistoryTrackObserver
+
+_START = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+
+
+def _history(track_factory, count, size=5):
+    history = HistoryTrackObserver(size=size)
+    for minute in range(count):
+        track = track_factory(title=f"Track {minute}")
+        track.set_starttime(_START + datetime.timedelta(minutes=minute))
+        history.track_started(track)
+        history.track_finished(track)
+    return history
+
+
+def _titles(records):
+    return [json.loads(record)["title"] for record in records]
+
+
+def test_ring_buffer(track_factory):
+    """Test that only the last tracks are kept."""
+    history = _history(track_factory, 8)
+
+    assert len(history) == 5  # noqa: PLR2004
+    records, cursor = history.page(limit=10)
+    assert _titles(records) == [f"Track {minute}" for minute in range(7, 2, -1)]
+    assert cursor is None
+
+
+def test_page_cursor(track_factory):
+    """Test paging back through the history with cursors."""
+    history = _history(track_factory, 8)
+
+    records, cursor = history.page(limit=2)
+    assert _titles(records) == ["Track 7", "Track 6"]
+    records, cursor = history.page(limit=2, before=cursor)
+    assert _titles(records) == ["Track 5", "Track 4"]
+    records, cursor = history.page(limit=2, before=cursor)
+    assert _titles(records) == ["Track 3"]
+    assert cursor is None
+
+
+def test_page_time_range(track_factory):
+    """Test that tracks are filtered by their start time."""
+    history = _history(track_factory, 8)
+
+    records, cursor = history.page(
+        since=_START + datetime.timedelta(minutes=4),
+        until=_START + datetime.timedelta(minutes=6, seconds=30),
+    )
+    assert _titles(records) == ["Track 6", "Track 5", "Track 4"]
+    assert cursor is None
+    records, _ = history.page(until=_START)
+    assert records == []
+
+
+def test_out_of_order_start(track_factory):
+    """Test that a track starting before the last one keeps the order."""
+    history = _history(track_factory, 2)
+    track = track_factory(title="Early")
+    track.set_starttime(_START)
+    history.track_started(track)
+
+    records, _ = history.page(since=_START + datetime.timedelta(minutes=1))
+    assert _titles(records) == ["Early", "Track 1"]
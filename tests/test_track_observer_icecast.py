@@ -83,6 +83,7 @@ def test_init():
     )
     assert icecast_track_observer.options.url == "http://localhost:80/"
     assert icecast_track_observer.options.mount == "foo.mp3"
+    assert icecast_track_observer.get_endpoint() == "http://localhost:80/?mount=foo.mp3"
 
     icecast_track_observer = IcecastTrackObserver(
         options=IcecastTrackObserver.Options(
@@ -159,10 +160,11 @@ def test_track_started(mock_requests_get, track_factory, show_factory):
         timeout=60,
     )
 
-    # test for ignoring of failed requests
+    # test that failed requests raise so they get retried
     mock_requests_get.reset_mock()
     mock_requests_get.side_effect = requests.exceptions.RequestException
-    icecast_track_observer.track_started(track)
+    with pytest.raises(requests.exceptions.RequestException):
+        icecast_track_observer.track_started(track)
     mock_requests_get.assert_called_with(
         "http://localhost:80/",
         auth=("foo", "bar"),
@@ -8,13 +8,14 @@ from nowplaying.track.track import Track
 
 def test_init():
     """Test class:`SmcFrpTrackObserver`'s :meth:`.__init__` method."""
-    SmcFtpTrackObserver(
+    smc_ftp_track_observer = SmcFtpTrackObserver(
         options=SmcFtpTrackObserver.Options(
             hostname="hostname",
             username="username",
             password="password",  # noqa: S106
         ),
     )
+    assert smc_ftp_track_observer.get_endpoint() == "hostname"
 
 
 @patch("nowplaying.track.observers.smc_ftp.FTP_TLS")
@@ -0,0 +1,39 @@
+"""Tests for :class:`SnapshotTrackObserver`."""
+
+import json
+
+import lxml.etree
+
+from nowplaying.track.observers.snapshot import SnapshotTrackObserver
+
+
+def test_track_started(track_factory, show_factory):
+    """Test that a snapshot gets rendered when a track starts."""
+    observer = SnapshotTrackObserver()
+    assert observer.snapshot is None
+
+    track = track_factory()
+    track.show = show_factory()
+    observer.track_started(track)
+    observer.track_finished(track)
+
+    snapshot = observer.snapshot
+    assert snapshot.track is track
+    body, etag = snapshot.representations["application/json"]
+    assert json.loads(body)["artist"] == "Hairmare and the Band"
+    assert len(etag) == 32  # noqa: PLR2004
+    body, _ = snapshot.representations["application/xml"]
+    assert lxml.etree.fromstring(body).tag == "{http://rabe.ch/schema/ticker.xsd}ticker"
+    body, _ = snapshot.representations["text/plain"]
+    assert body == b"Hairmare and the Band - An Ode to legacy Python Code"
+
+
+def test_text_default_track(track_factory, show_factory):
+    """Test that tracks without info show the show name."""
+    observer = SnapshotTrackObserver()
+    track = track_factory(artist="Radio Bern", title="Livestream")
+    track.show = show_factory()
+    observer.track_started(track)
+
+    body, _ = observer.snapshot.representations["text/plain"]
+    assert body == b"Radio Bern - Hairmare Traveling Medicine Show"
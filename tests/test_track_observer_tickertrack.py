@@ -18,6 +18,7 @@ def test_init():
         options=TickerTrackObserver.Options(file_path=""),
     )
     assert ticker_track_observer.ticker_file_path == ""
+    assert ticker_track_observer.get_endpoint() == ""
 
 
 @pytest.mark.filterwarnings(
@@ -0,0 +1,69 @@
+"""Tests for :class:`Outbox`."""
+
+import pytest
+
+from nowplaying.track.outbox import Outbox
+
+
+@pytest.fixture(name="outbox")
+def fixture_outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"))
+    yield outbox
+    outbox.close()
+
+
+def test_pending(outbox, track_factory, show_factory):
+    """Test that the newest undelivered track is pending."""
+    first = track_factory(title="first")
+    second = track_factory(title="second")
+    second.set_show(show_factory())
+
+    assert outbox.pending("Icecast") is None
+
+    outbox.add("Icecast", first)
+    outbox.add("Icecast", second)
+
+    pending = outbox.pending("Icecast")
+    assert pending.uuid == second.uuid
+    assert pending.show.name == second.show.name
+    assert outbox.pending("Ticker") is None
+
+
+def test_done(outbox, track_factory):
+    """Test that delivered tracks are no longer pending."""
+    outbox.add("Icecast", track_factory())
+    outbox.done(outbox.add("Icecast", track_factory()))
+
+    assert outbox.pending("Icecast") is None
+
+
+def test_persists(tmp_path, track_factory):
+    """Test that pending deliveries survive reopening the outbox."""
+    path = str(tmp_path / "outbox.sqlite")
+    track = track_factory()
+    outbox = Outbox(path)
+    outbox.add("Icecast", track)
+    outbox.close()
+
+    outbox = Outbox(path)
+    assert outbox.pending("Icecast").uuid == track.uuid
+    outbox.close()
+
+
+def test_compact(tmp_path, track_factory):
+    """Test that compaction keeps only the newest delivery per observer."""
+    outbox = Outbox(str(tmp_path / "outbox.sqlite"), compact_every=3)
+    tracks = [track_factory() for _ in range(3)]
+    for track in tracks:
+        outbox.add("Icecast", track)
+    done = outbox.add("Ticker", tracks[0])
+    outbox.done(done)
+
+    rows = outbox._db.execute("SELECT observer FROM deliveries").fetchall()  # noqa: SLF001
+    assert rows == [("Icecast",), ("Ticker",)]
+    assert outbox.pending("Icecast").uuid == tracks[-1].uuid
+
+    outbox.compact()
+    rows = outbox._db.execute("SELECT observer FROM deliveries").fetchall()  # noqa: SLF001
+    assert rows == [("Icecast",)]
+    outbox.close()